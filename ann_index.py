@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+ANN Index - inverted-file (IVF) search over a local vector snapshot
+Vectors are clustered with spherical k-means; a query only scans the nprobe
+closest clusters, so latency grows with cluster size instead of corpus size
+
+Index layout (one directory, built from a local_vector_index.py snapshot):
+  manifest.json       kind "ivf", n_lists, nprobe, relative path of the snapshot
+  centroids.npy       float32 [n_lists, dim], L2-normalized
+  vectors.npy         float32 [count, dim], snapshot vectors grouped by list
+  rows.npy            int64 [count], snapshot row of each entry in vectors.npy
+  list_offsets.npy    int64 [n_lists + 1], start of each list in vectors.npy
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from local_vector_index import LocalVectorIndex, SnapshotDocs, normalize_rows
+
+
+def spherical_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 20,
+                     seed: int = 0) -> np.ndarray:
+    """Cluster normalized vectors by cosine similarity; returns normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        # Reseed empty lists with random points so every list stays useful
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+
+        centroids = normalize_rows(sums)
+
+    return centroids.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """Closest centroid for every vector, computed in blocks to bound memory"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size])
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def build_ivf_index(snapshot_path: str, out_dir: str, n_lists: Optional[int] = None,
+                    nprobe: int = 8, iterations: int = 20, train_size: int = 50000) -> Dict[str, Any]:
+    """Cluster a snapshot's vectors and write an IVF index next to it"""
+    matrix = np.load(os.path.join(snapshot_path, 'embeddings.npy'), mmap_mode='r')
+    count = len(matrix)
+    if n_lists is None:
+        n_lists = max(1, int(4 * np.sqrt(count)))
+    n_lists = min(n_lists, count)
+
+    print(f"🧮 Training {n_lists} lists on {min(count, train_size)} of {count} vectors...")
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(count, size=min(count, train_size), replace=False))
+    centroids = spherical_kmeans(np.asarray(matrix[sample]), n_lists, iterations)
+
+    assignments = assign_lists(matrix, centroids)
+    rows = np.argsort(assignments, kind='stable')
+    list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    list_offsets[1:] = np.cumsum(np.bincount(assignments, minlength=n_lists))
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, 'centroids.npy'), centroids)
+    np.save(os.path.join(out_dir, 'rows.npy'), rows)
+    np.save(os.path.join(out_dir, 'list_offsets.npy'), list_offsets)
+
+    vectors = np.lib.format.open_memmap(
+        os.path.join(out_dir, 'vectors.npy'), mode='w+', dtype=np.float32, shape=matrix.shape
+    )
+    for start in range(0, count, 8192):
+        vectors[start:start + 8192] = matrix[rows[start:start + 8192]]
+    vectors.flush()
+    del vectors
+
+    sizes = np.diff(list_offsets)
+    manifest = {
+        'kind': 'ivf',
+        'count': int(count),
+        'dim': int(matrix.shape[1]),
+        'n_lists': int(n_lists),
+        'nprobe': int(nprobe),
+        'snapshot': os.path.relpath(os.path.abspath(snapshot_path), os.path.abspath(out_dir)),
+        'list_size_max': int(sizes.max()),
+        'list_size_mean': float(sizes.mean()),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"🎉 IVF index written: {n_lists} lists, mean size {sizes.mean():.1f}, max {sizes.max()}")
+    return manifest
+
+
+class IVFIndex(LocalVectorIndex):
+    def __init__(self, path: str, nprobe: Optional[int] = None):
+        """Load an IVF index; nprobe trades recall for latency (LOCAL_INDEX_NPROBE)"""
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+        self.centroids = np.load(os.path.join(path, 'centroids.npy'))
+        self.list_offsets = np.load(os.path.join(path, 'list_offsets.npy'))
+        self.rows = np.load(os.path.join(path, 'rows.npy'), mmap_mode='r')
+        self.matrix = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.snapshot_path = os.path.join(path, self.manifest['snapshot'])
+        self.docs = SnapshotDocs(self.snapshot_path)
+
+        self.nprobe = nprobe or int(os.getenv('LOCAL_INDEX_NPROBE', '0')) or self.manifest['nprobe']
+
+    def top_k(self, query_embedding, k: int, nprobe: Optional[int] = None):
+        """Snapshot rows and cosine scores of the k best matches in the probed lists"""
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        # Sorting the probed lists keeps the scan moving forward through the file
+        positions = np.concatenate([
+            np.arange(self.list_offsets[i], self.list_offsets[i + 1]) for i in np.sort(probed)
+        ])
+        if len(positions) == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = self.matrix[positions] @ query
+        k = min(k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        order = candidates[np.argsort(-scores[candidates])]
+        return np.asarray(self.rows[positions[order]]), scores[order]
+
+
+def measure_recall(exact_path: str, ivf_path: str, k: int = 10, queries: int = 200,
+                   nprobes: Optional[List[int]] = None) -> List[Dict[str, float]]:
+    """recall@k of the IVF index against exact search, using stored vectors as queries"""
+    exact = LocalVectorIndex(exact_path)
+    ivf = IVFIndex(ivf_path)
+    nprobes = nprobes or [1, 2, 4, 8, 16, 32]
+
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(exact), size=min(queries, len(exact)), replace=False)
+    query_vectors = [np.asarray(exact.matrix[row]) for row in query_rows]
+
+    start_time = time.perf_counter()
+    truth = [set(exact.top_k(vector, k)[0].tolist()) for vector in query_vectors]
+    exact_ms = (time.perf_counter() - start_time) / len(query_vectors) * 1000
+    print(f"📏 Exact search: {exact_ms:.3f} ms/query over {len(exact)} vectors")
+
+    report = []
+    for nprobe in nprobes:
+        if nprobe > len(ivf.centroids):
+            break
+        start_time = time.perf_counter()
+        found = [set(ivf.top_k(vector, k, nprobe)[0].tolist()) for vector in query_vectors]
+        ivf_ms = (time.perf_counter() - start_time) / len(query_vectors) * 1000
+
+        recall = float(np.mean([len(f & t) / len(t) for f, t in zip(found, truth)]))
+        report.append({'nprobe': nprobe, 'recall': recall, 'ms_per_query': ivf_ms})
+        print(f"  nprobe={nprobe:<4} recall@{k}={recall:.3f}  {ivf_ms:.3f} ms/query")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF approximate nearest-neighbour index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build an IVF index from a snapshot")
+    build_parser.add_argument('snapshot', help="Directory written by local_vector_index.py export")
+    build_parser.add_argument('--out', default="local_index_ivf")
+    build_parser.add_argument('--lists', type=int, help="Number of clusters (default 4*sqrt(N))")
+    build_parser.add_argument('--nprobe', type=int, default=8, help="Default lists scanned per query")
+    build_parser.add_argument('--iterations', type=int, default=20)
+
+    recall_parser = subparsers.add_parser('recall', help="Measure recall@k against exact search")
+    recall_parser.add_argument('snapshot')
+    recall_parser.add_argument('index')
+    recall_parser.add_argument('-k', type=int, default=10)
+    recall_parser.add_argument('--queries', type=int, default=200)
+    recall_parser.add_argument('--nprobe', type=int, nargs='+')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            build_ivf_index(args.snapshot, args.out, args.lists, args.nprobe, args.iterations)
+        elif args.command == 'recall':
+            measure_recall(args.snapshot, args.index, args.k, args.queries, args.nprobe)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Semantic Answer Cache - reuse full LLM answers for near-identical questions
+Entries are keyed by query embedding; a cosine threshold decides a hit
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+def retrieval_namespace(backend: str, model: str, sources: List[str],
+                        local_index_path: Optional[str] = None) -> str:
+    """Cache namespace for one model over one retrieval setup (collections/namespaces, local index)"""
+    local_index = os.path.abspath(local_index_path) if local_index_path else "-"
+    return f"{backend}:{model}:{','.join(sorted(sources))}:{local_index}"
+
+
+class SemanticAnswerCache:
+    def __init__(self, path: str = ":memory:", namespace: str = "default",
+                 threshold: float = 0.92, ttl_seconds: float = 86400,
+                 max_entries: int = 5000):
+        """Open (or create) the SQLite-backed cache"""
+        self.path = path
+        self.namespace = namespace
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " namespace TEXT NOT NULL,"
+            " query TEXT NOT NULL,"
+            " embedding BLOB NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " sources TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_hit REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS answers_namespace ON answers (namespace, last_hit)")
+        self._db.commit()
+
+        # In-memory copy of the (unit-normalized) embeddings for fast similarity scans
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._last_hit = np.zeros(0, dtype=np.float64)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._data_version = None
+        self._reload()
+
+    @classmethod
+    def from_env(cls, namespace: str) -> Optional["SemanticAnswerCache"]:
+        """Build a cache from ANSWER_CACHE_* variables (None unless ANSWER_CACHE_ENABLED is set)"""
+        # Opt-in: a close paraphrase of a different question can be served another answer
+        if os.getenv('ANSWER_CACHE_ENABLED', '0').lower() not in ('1', 'true', 'yes'):
+            return None
+        return cls(
+            path=os.getenv('ANSWER_CACHE_PATH') or ":memory:",
+            namespace=namespace,
+            threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92')),
+            ttl_seconds=float(os.getenv('ANSWER_CACHE_TTL', '86400')),
+            max_entries=int(os.getenv('ANSWER_CACHE_SIZE', '5000'))
+        )
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _refresh(self):
+        """Reload if another connection (e.g. a sibling server worker) changed the database"""
+        data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._reload()
+
+    def _reload(self):
+        """Rebuild the in-memory embedding matrix from SQLite"""
+        # data_version only moves for other connections' commits, never for our own
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        rows = self._db.execute(
+            "SELECT id, created_at, last_hit, embedding FROM answers WHERE namespace = ? ORDER BY id",
+            (self.namespace,)
+        ).fetchall()
+        if rows:
+            self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+            self._created = np.array([row[1] for row in rows], dtype=np.float64)
+            self._last_hit = np.array([row[2] for row in rows], dtype=np.float64)
+            self._matrix = np.vstack([np.frombuffer(row[3], dtype=np.float32) for row in rows])
+        else:
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._created = np.zeros(0, dtype=np.float64)
+            self._last_hit = np.zeros(0, dtype=np.float64)
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _keep(self, mask: np.ndarray):
+        """Drop the in-memory rows where mask is False"""
+        self._ids = self._ids[mask]
+        self._created = self._created[mask]
+        self._last_hit = self._last_hit[mask]
+        self._matrix = self._matrix[mask]
+
+    def lookup(self, embedding) -> Optional[Dict[str, Any]]:
+        """Return the cached answer closest to this embedding, if similar enough and fresh"""
+        with self._lock:
+            self._refresh()
+            if not len(self._ids):
+                self.misses += 1
+                return None
+
+            now = time.time()
+            similarities = self._matrix @ self._unit(embedding)
+            similarities[now - self._created > self.ttl_seconds] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id = int(self._ids[best])
+            row = self._db.execute(
+                "SELECT query, answer, sources FROM answers WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE answers SET last_hit = ? WHERE id = ?", (now, entry_id))
+            self._db.commit()
+            self._last_hit[best] = now
+            self.hits += 1
+
+        return {
+            'query': row[0],
+            'answer': row[1],
+            'sources': json.loads(row[2]),
+            'similarity': similarity
+        }
+
+    def store(self, query: str, embedding, answer: str, sources: List[Any]):
+        """Cache an answer, then drop expired and least recently used entries
+
+        The new row is appended to the in-memory matrix and evictions are
+        applied to it in place, so a miss never re-reads the whole namespace;
+        only writes by other processes sharing the file trigger a reload
+        """
+        now = time.time()
+        vector = self._unit(embedding)
+        with self._lock:
+            self._refresh()
+            cursor = self._db.execute(
+                "INSERT INTO answers (namespace, query, embedding, answer, sources, created_at, last_hit)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.namespace, query, vector.tobytes(), answer,
+                 json.dumps(sources, ensure_ascii=False), now, now)
+            )
+            self._ids = np.append(self._ids, cursor.lastrowid)
+            self._created = np.append(self._created, now)
+            self._last_hit = np.append(self._last_hit, now)
+            self._matrix = np.vstack([self._matrix.reshape(-1, len(vector)), vector[None, :]])
+
+            keep = now - self._created <= self.ttl_seconds
+            if keep.sum() > self.max_entries:
+                live = np.flatnonzero(keep)
+                oldest = live[np.argsort(-self._last_hit[live], kind='stable')[self.max_entries:]]
+                keep[oldest] = False
+
+            if not keep.all():
+                self._db.executemany(
+                    "DELETE FROM answers WHERE id = ?", [(int(entry_id),) for entry_id in self._ids[~keep]]
+                )
+                self._keep(keep)
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for health checks"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': int(len(self._ids)),
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'persistent': self.path != ":memory:"
+        }
@@ -13,6 +13,215 @@ const __dirname = path.dirname(__filename);
 
 const PORT = 3001;
 
+// Number of warm Python RAG workers to keep (0 = spawn a process per request)
+const RAG_WORKER_POOL_SIZE = parseInt(process.env.RAG_WORKER_POOL_SIZE || '0', 10);
+
+// Crashed workers are restarted after 1s, doubling per consecutive crash up to this cap
+const RAG_WORKER_RESTART_MAX_MS = 30000;
+
+// Pool of long-lived rag_worker.py processes speaking newline-delimited JSON
+class RagWorkerPool {
+    constructor(size, script) {
+        this.size = size;
+        this.script = script;
+        this.workers = [];
+        this.crashes = new Array(size).fill(0);
+        this.nextId = 1;
+        for (let i = 0; i < size; i++) {
+            this.workers.push(this.startWorker());
+        }
+    }
+
+    startWorker() {
+        const worker = {
+            process: spawn('python3', [this.script], {
+                env: { ...process.env },
+                stdio: ['pipe', 'pipe', 'inherit']
+            }),
+            pending: new Map(),
+            buffer: '',
+            ready: false,
+            alive: true
+        };
+
+        worker.process.stdout.on('data', (data) => {
+            worker.buffer += data.toString();
+            let newline;
+            while ((newline = worker.buffer.indexOf('\n')) >= 0) {
+                const line = worker.buffer.slice(0, newline).trim();
+                worker.buffer = worker.buffer.slice(newline + 1);
+                if (line) {
+                    this.handleReply(worker, line);
+                }
+            }
+        });
+
+        // Without these, a missing python3 (ENOENT) or a write to a worker that just
+        // died (EPIPE) is an unhandled 'error' event that takes the whole server down;
+        // 'close' still follows and restarts the worker
+        const onError = (error) => {
+            console.log(`❌ RAG worker ${worker.process.pid ?? '(not started)'} error: ${error.message}`);
+            this.failWorker(worker, `RAG worker error: ${error.message}`);
+        };
+        worker.process.on('error', onError);
+        worker.process.stdin.on('error', onError);
+
+        worker.process.on('close', (code) => {
+            this.failWorker(worker, 'RAG worker exited');
+
+            // Replaced workers (see replaceWorker) no longer own a slot
+            const index = this.workers.indexOf(worker);
+            if (index < 0) return;
+            const delay = Math.min(1000 * 2 ** this.crashes[index], RAG_WORKER_RESTART_MAX_MS);
+            this.crashes[index]++;
+            console.log(`⚠️  RAG worker ${worker.process.pid ?? '(not started)'} exited with code ${code}, restarting in ${delay}ms`);
+            setTimeout(() => {
+                if (this.workers[index] === worker) {
+                    this.workers[index] = this.startWorker();
+                }
+            }, delay);
+        });
+
+        return worker;
+    }
+
+    failWorker(worker, reason) {
+        // Stop routing to the worker and fail everything it still owes a reply
+        worker.alive = false;
+        for (const { reject } of worker.pending.values()) {
+            reject(new Error(reason));
+        }
+        worker.pending.clear();
+    }
+
+    replaceWorker(worker, reason) {
+        // A wedged worker would keep receiving requests, so swap in a fresh one now;
+        // requests queued behind the stuck one never started, so they move elsewhere
+        const index = this.workers.indexOf(worker);
+        if (index < 0) return;
+        console.log(`⚠️  Replacing RAG worker ${worker.process.pid}: ${reason}`);
+        this.workers[index] = this.startWorker();
+        const queued = [...worker.pending.values()];
+        worker.pending.clear();
+        worker.alive = false;
+        worker.process.kill('SIGKILL');
+        for (const entry of queued) {
+            this.dispatch(entry);
+        }
+    }
+
+    handleReply(worker, line) {
+        let reply;
+        try {
+            reply = JSON.parse(line);
+        } catch (error) {
+            console.log(`⚠️  Ignoring non-JSON worker output: ${line}`);
+            return;
+        }
+
+        if (reply.event === 'ready') {
+            worker.ready = true;
+            const index = this.workers.indexOf(worker);
+            if (index >= 0) this.crashes[index] = 0;
+            return;
+        }
+
+        const entry = worker.pending.get(reply.id);
+        if (!entry) return;
+        worker.pending.delete(reply.id);
+
+        if (reply.ok) {
+            entry.resolve(reply.result);
+        } else {
+            entry.reject(new Error(reply.error || 'RAG worker error'));
+        }
+    }
+
+    pickWorker() {
+        // Least-busy ready worker; workers still loading only when none is ready, and
+        // crashed ones not at all while they wait out their restart delay
+        const live = this.workers.filter((w) => w.alive);
+        const ready = live.filter((w) => w.ready);
+        const candidates = ready.length > 0 ? ready : live;
+        if (candidates.length === 0) return null;
+        return candidates.reduce((best, w) => (w.pending.size < best.pending.size ? w : best));
+    }
+
+    dispatch(entry) {
+        const worker = this.pickWorker();
+        if (!worker) {
+            entry.reject(new Error('No RAG worker available'));
+            return;
+        }
+        entry.worker = worker;
+        worker.pending.set(entry.id, entry);
+        worker.process.stdin.write(JSON.stringify({ id: entry.id, ...entry.payload }) + '\n');
+    }
+
+    expire(entry, timeoutMs) {
+        const worker = entry.worker;
+        if (!worker || !worker.pending.has(entry.id)) return;
+        // A worker answers one request at a time, oldest first: if this one was
+        // running the worker is stuck on it, otherwise it only waited in the queue
+        const running = worker.pending.keys().next().value === entry.id;
+        worker.pending.delete(entry.id);
+        entry.reject(new Error('Request timeout'));
+        if (running) {
+            this.replaceWorker(worker, `request ${entry.id} timed out after ${timeoutMs}ms`);
+        }
+    }
+
+    request(payload, timeoutMs) {
+        return new Promise((resolve, reject) => {
+            const entry = { id: this.nextId++, payload, worker: null };
+            const timeoutId = setTimeout(() => this.expire(entry, timeoutMs), timeoutMs);
+            entry.resolve = (result) => { clearTimeout(timeoutId); resolve(result); };
+            entry.reject = (error) => { clearTimeout(timeoutId); reject(error); };
+            this.dispatch(entry);
+        });
+    }
+}
+
+const ragPool = RAG_WORKER_POOL_SIZE > 0
+    ? new RagWorkerPool(RAG_WORKER_POOL_SIZE, path.join(__dirname, '..', 'rag_worker.py'))
+    : null;
+
+// Extract the INTRODUCTION / LEARNING PATHWAYS / MCQ sections from a Groq answer
+function parseAnswerSections(fullResponse) {
+    let introduction = '';
+    let learningPathways = [];
+    let mcqQuestion = '';
+
+    // Use regex to extract sections from the Groq response
+    const introMatch = fullResponse.match(/\*\*INTRODUCTION\*\*([\s\S]*?)(?=\*\*LEARNING PATHWAYS\*\*|\*\*MCQ QUESTION\*\*|$)/i);
+    const pathwaysMatch = fullResponse.match(/\*\*LEARNING PATHWAYS\*\*([\s\S]*?)(?=\*\*MCQ QUESTION\*\*|📚 Sources:|$)/i);
+    const mcqMatch = fullResponse.match(/\*\*MCQ QUESTION\*\*([\s\S]*?)(?=📚 Sources:|⏱️|$)/i);
+
+    // Extract introduction
+    if (introMatch) {
+        introduction = introMatch[1].trim();
+    }
+
+    // Extract learning pathways
+    if (pathwaysMatch) {
+        const pathwaysText = pathwaysMatch[1].trim();
+        const pathwayLines = pathwaysText.split('\n').filter(line => line.trim());
+
+        for (const line of pathwayLines) {
+            if (line.match(/^\s*\d+\./)) {
+                learningPathways.push(line.trim());
+            }
+        }
+    }
+
+    // Extract MCQ question
+    if (mcqMatch) {
+        mcqQuestion = mcqMatch[1].trim();
+    }
+
+    return { introduction, learningPathways, mcqQuestion };
+}
+
 // Create basic HTTP server
 const server = http.createServer((req, res) => {
     // Set CORS headers
@@ -114,6 +323,11 @@ function handleBiologyRequest(data, res) {
         console.log('📝 Using demo mode - set PINECONE_API_KEY for full functionality');
     }
     
+    if (ragPool && !useDemo) {
+        handleBiologyRequestWithPool(topic, res, startTime);
+        return;
+    }
+    
     // Spawn Python process with environment variables
     const pythonProcess = spawn('python3', [pythonScript, topic], {
         env: {
@@ -146,46 +360,12 @@ function handleBiologyRequest(data, res) {
         if (code === 0) {
             // Parse the output to extract different sections
             const lines = output.split('\n');
-            let introduction = '';
-            let learningPathways = [];
-            let mcqQuestion = '';
             let sources = [];
-            
-            let currentSection = '';
-            let inIntroduction = false;
-            let inPathways = false;
-            let inMcq = false;
             let inSources = false;
             
             // Parse the full Groq response directly
             const fullResponse = output.split('🤖 Answer:')[1] || output;
-            
-            // Use regex to extract sections from the Groq response
-            const introMatch = fullResponse.match(/\*\*INTRODUCTION\*\*([\s\S]*?)(?=\*\*LEARNING PATHWAYS\*\*|\*\*MCQ QUESTION\*\*|$)/i);
-            const pathwaysMatch = fullResponse.match(/\*\*LEARNING PATHWAYS\*\*([\s\S]*?)(?=\*\*MCQ QUESTION\*\*|📚 Sources:|$)/i);
-            const mcqMatch = fullResponse.match(/\*\*MCQ QUESTION\*\*([\s\S]*?)(?=📚 Sources:|⏱️|$)/i);
-            
-            // Extract introduction
-            if (introMatch) {
-                introduction = introMatch[1].trim();
-            }
-            
-            // Extract learning pathways
-            if (pathwaysMatch) {
-                const pathwaysText = pathwaysMatch[1].trim();
-                const pathwayLines = pathwaysText.split('\n').filter(line => line.trim());
-                
-                for (const line of pathwayLines) {
-                    if (line.match(/^\s*\d+\./)) {
-                        learningPathways.push(line.trim());
-                    }
-                }
-            }
-            
-            // Extract MCQ question
-            if (mcqMatch) {
-                mcqQuestion = mcqMatch[1].trim();
-            }
+            const { introduction, learningPathways, mcqQuestion } = parseAnswerSections(fullResponse);
             
             // Extract sources from the original format
             for (let i = 0; i < lines.length; i++) {
@@ -245,6 +425,34 @@ function handleBiologyRequest(data, res) {
     });
 }
 
+function handleBiologyRequestWithPool(topic, res, startTime) {
+    ragPool.request({ op: 'ask_cloud', query: topic }, 60000)
+        .then((result) => {
+            const { introduction, learningPathways, mcqQuestion } = parseAnswerSections(result.answer || '');
+            res.writeHead(200);
+            res.end(JSON.stringify({
+                success: true,
+                topic,
+                introduction: introduction.trim(),
+                learningPathways,
+                mcqQuestion: mcqQuestion.trim(),
+                sources: result.sources || [],
+                responseTime: Date.now() - startTime,
+                timestamp: new Date().toISOString()
+            }));
+        })
+        .catch((error) => {
+            const timedOut = error.message === 'Request timeout';
+            res.writeHead(timedOut ? 408 : 500);
+            res.end(JSON.stringify({
+                success: false,
+                error: timedOut ? 'Request timeout' : error.message || 'Failed to generate biology content',
+                responseTime: Date.now() - startTime,
+                timestamp: new Date().toISOString()
+            }));
+        });
+}
+
 function handleWordExplanationRequest(data, res) {
     const { word, context } = data;
     
@@ -273,6 +481,31 @@ function handleWordExplanationRequest(data, res) {
         return;
     }
     
+    if (ragPool) {
+        ragPool.request({ op: 'word_explanation', word, context: context || 'biology' }, 10000)
+            .then((result) => {
+                res.writeHead(200);
+                res.end(JSON.stringify({
+                    success: true,
+                    word,
+                    explanation: result.explanation.trim(),
+                    responseTime: Date.now() - startTime,
+                    timestamp: new Date().toISOString()
+                }));
+            })
+            .catch((error) => {
+                const timedOut = error.message === 'Request timeout';
+                res.writeHead(timedOut ? 408 : 500);
+                res.end(JSON.stringify({
+                    success: false,
+                    error: timedOut ? 'Request timeout' : error.message || 'Failed to generate word explanation',
+                    responseTime: Date.now() - startTime,
+                    timestamp: new Date().toISOString()
+                }));
+            });
+        return;
+    }
+    
     // Spawn Python process with word explanation
     const pythonProcess = spawn('python3', [pythonScript, word, context || 'biology'], {
         env: {
@@ -346,4 +579,7 @@ server.listen(PORT, () => {
     console.log(`🧬 Biology Learning RAG API running on http://localhost:${PORT}`);
     console.log(`📡 API endpoint: http://localhost:${PORT}/api/biology/learn`);
     console.log(`📖 Word explanation endpoint: http://localhost:${PORT}/api/biology/word-explanation`);
+    if (ragPool) {
+        console.log(`🔥 Using ${RAG_WORKER_POOL_SIZE} warm RAG worker(s)`);
+    }
 });
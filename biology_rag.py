@@ -3,27 +3,50 @@
 Biology RAG System - Retrieval Augmented Generation
 Connects the biology vector database with Ollama Llama 3.2 1B for intelligent Q&A
 """
+import os
 import sys
 import json
+import time
 import requests
 import chromadb
-from typing import List, Dict
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Any, Iterator
+
+import http_transport
+from llm_stream import iter_ollama_ndjson
+from rag_batch import ask_many_pipelined, batch_main
+from local_vector_index import load_local_index
+from federated_retrieval import FederatedRetriever, parse_names
 
 
 class BiologyRAG:
     def __init__(self, db_path="/Users/mihirdhankani/biologyVectorDatabase", 
-                 ollama_url="http://localhost:11434", model="llama3.2:1b"):
+                 ollama_url="http://localhost:11434", model="llama3.2:1b",
+                 local_index_path=None, collections=None):
         """Initialize the RAG system"""
         self.db_path = db_path
+        self.collections = collections or parse_names(os.getenv('RAG_COLLECTIONS')) or ["biology_textbook"]
         self.ollama_url = ollama_url
         self.model = model
         
         # Initialize ChromaDB
         print("🔗 Connecting to vector database...")
         self.client = chromadb.PersistentClient(path=db_path)
-        self.collection = self.client.get_collection("biology_textbook")
+        self.collection = self.client.get_collection(self.collections[0])
         print("✅ Vector database connected")
         
+        # Optional in-process snapshot of the collection (see local_vector_index.py) or
+        # a fan-out over several collections; queries are then embedded here with the
+        # collections' default MiniLM function
+        self.retriever = load_local_index(local_index_path or os.getenv('LOCAL_INDEX_PATH'))
+        if self.retriever:
+            print(f"📦 Searching local index at {self.retriever.path}")
+        elif len(self.collections) > 1:
+            self.retriever = FederatedRetriever.from_chroma(self.client, self.collections)
+            print(f"🔀 Searching collections: {', '.join(self.collections)}")
+        if self.retriever:
+            self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
         # Test Ollama connection
         print("🤖 Testing Ollama connection...")
         self._test_ollama_connection()
@@ -32,7 +55,7 @@ class BiologyRAG:
     def _test_ollama_connection(self):
         """Test connection to Ollama"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags")
+            response = http_transport.get(f"{self.ollama_url}/api/tags", max_retries=0)
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 model_names = [m['name'] for m in models]
@@ -50,6 +73,12 @@ class BiologyRAG:
         """Retrieve relevant context from the vector database"""
         print(f"🔍 Searching for relevant content...")
         
+        if self.retriever:
+            query_embedding = self.embedding_function([query])[0]
+            context_chunks = self.retriever.search(query_embedding, n_results, query_text=query)
+            print(f"📊 Found {len(context_chunks)} relevant chunks")
+            return context_chunks
+        
         results = self.collection.query(
             query_texts=[query],
             n_results=n_results
@@ -90,10 +119,8 @@ class BiologyRAG:
         
         return formatted_context.strip()
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Generate response using Ollama"""
-        print("🤖 Generating response with Ollama...")
-        
+    def build_prompt(self, query: str, context: str) -> str:
+        """Build the tutoring prompt for Ollama"""
         prompt = f"""You are a biology tutor helping students understand concepts from their textbook. Use the provided context from the Biology 2e textbook to answer the student's question accurately and comprehensively.
 
 Context from Biology Textbook:
@@ -111,21 +138,32 @@ Instructions:
 
 Answer:"""
 
+        return prompt
+    
+    def _ollama_request(self, query: str, context: str, stream: bool = False):
+        """POST a generate request to Ollama"""
+        return http_transport.post(
+            f"{self.ollama_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": self.build_prompt(query, context),
+                "stream": stream,
+                "options": {
+                    "temperature": 0.3,  # Lower temperature for more factual responses
+                    "top_p": 0.9,
+                    "top_k": 40
+                }
+            },
+            timeout=120,  # 2 minute timeout
+            stream=stream
+        )
+    
+    def generate_response(self, query: str, context: str) -> str:
+        """Generate response using Ollama"""
+        print("🤖 Generating response with Ollama...")
+        
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,  # Lower temperature for more factual responses
-                        "top_p": 0.9,
-                        "top_k": 40
-                    }
-                },
-                timeout=120  # 2 minute timeout
-            )
+            response = self._ollama_request(query, context)
             
             if response.status_code == 200:
                 result = response.json()
@@ -138,6 +176,36 @@ Answer:"""
         except Exception as e:
             return f"Error generating response: {e}"
     
+    def generate_response_stream(self, query: str, context: str) -> Iterator[str]:
+        """Stream the Ollama response as it is generated (NDJSON)"""
+        try:
+            with self._ollama_request(query, context, stream=True) as response:
+                if response.status_code != 200:
+                    yield f"Error: Ollama API returned status {response.status_code}"
+                    return
+                
+                yield from iter_ollama_ndjson(response)
+                
+        except requests.exceptions.Timeout:
+            yield "Error: Request timed out. The model might be taking too long to respond."
+        except Exception as e:
+            yield f"Error generating response: {e}"
+    
+    def format_sources(self, context_chunks: List[Dict]) -> List[Dict]:
+        """Source details (score, chapter, section, preview) for each chunk"""
+        sources = []
+        for chunk in context_chunks:
+            source_info = {
+                'relevance_score': chunk['relevance_score'],
+                'text_preview': chunk['text'][:150] + "..." if len(chunk['text']) > 150 else chunk['text']
+            }
+            if 'chapter' in chunk['metadata']:
+                source_info['chapter'] = chunk['metadata']['chapter']
+            if 'section' in chunk['metadata']:
+                source_info['section'] = chunk['metadata']['section']
+            sources.append(source_info)
+        return sources
+    
     def ask(self, query: str, n_context_chunks: int = 4) -> Dict:
         """Main method to ask a question and get a RAG response"""
         print(f"\n🎓 Biology RAG System")
@@ -161,17 +229,7 @@ Answer:"""
         answer = self.generate_response(query, formatted_context)
         
         # Prepare sources information
-        sources = []
-        for chunk in context_chunks:
-            source_info = {
-                'relevance_score': chunk['relevance_score'],
-                'text_preview': chunk['text'][:150] + "..." if len(chunk['text']) > 150 else chunk['text']
-            }
-            if 'chapter' in chunk['metadata']:
-                source_info['chapter'] = chunk['metadata']['chapter']
-            if 'section' in chunk['metadata']:
-                source_info['section'] = chunk['metadata']['section']
-            sources.append(source_info)
+        sources = self.format_sources(context_chunks)
         
         return {
             'query': query,
@@ -179,6 +237,64 @@ Answer:"""
             'sources': sources
         }
     
+    def ask_many(self, queries: List[str], concurrency: int = 2, n_context_chunks: int = 4) -> List[Dict]:
+        """Answer many questions: one batched ChromaDB query, then pipelined generation"""
+        print(f"🔍 Searching for {len(queries)} questions in one batch...")
+        
+        if self.retriever:
+            query_embeddings = self.embedding_function(queries)
+            
+            def retrieve(i):
+                return self.retriever.search(query_embeddings[i], n_context_chunks, query_text=queries[i])
+        else:
+            # ChromaDB encodes all query texts in one batch and searches them together
+            results = self.collection.query(
+                query_texts=queries,
+                n_results=n_context_chunks
+            )
+            
+            def retrieve(i):
+                return [
+                    {'text': doc, 'metadata': metadata, 'relevance_score': 1 - distance}
+                    for doc, metadata, distance in zip(
+                        results['documents'][i], results['metadatas'][i], results['distances'][i]
+                    )
+                ]
+        
+        def generate(i, context_chunks):
+            if not context_chunks:
+                return {'answer': 'No relevant context found in the biology textbook.', 'sources': []}
+            answer = self.generate_response(queries[i], self.format_context(context_chunks))
+            return {'answer': answer, 'sources': self.format_sources(context_chunks)}
+        
+        return ask_many_pipelined(queries, retrieve, generate, concurrency)
+    
+    def ask_stream(self, query: str, n_context_chunks: int = 4) -> Iterator[Dict[str, Any]]:
+        """Stream an answer: sources first, then answer deltas, then timing"""
+        start_time = time.time()
+        
+        context_chunks = self.retrieve_context(query, n_context_chunks)
+        yield {'type': 'sources', 'query': query, 'sources': self.format_sources(context_chunks)}
+        
+        if not context_chunks:
+            yield {'type': 'delta', 'text': 'No relevant context found in the biology textbook.'}
+            yield {'type': 'done', 'response_time': (time.time() - start_time) * 1000}
+            return
+        
+        formatted_context = self.format_context(context_chunks)
+        
+        first_token_time = None
+        for text in self.generate_response_stream(query, formatted_context):
+            if first_token_time is None:
+                first_token_time = (time.time() - start_time) * 1000
+            yield {'type': 'delta', 'text': text}
+        
+        yield {
+            'type': 'done',
+            'response_time': (time.time() - start_time) * 1000,
+            'first_token_time': first_token_time
+        }
+    
     def interactive_mode(self):
         """Start interactive Q&A session"""
         print("\n🎓 Biology RAG System - Interactive Mode")
@@ -221,7 +337,10 @@ Answer:"""
 
 
 def main():
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        # Batch mode: topics from a file, JSONL results
+        batch_main(sys.argv[1:], BiologyRAG)
+    elif len(sys.argv) > 1:
         # Command line mode
         query = ' '.join(sys.argv[1:])
         rag = BiologyRAG()
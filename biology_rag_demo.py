@@ -6,8 +6,15 @@ Works without external databases, using predefined biology content
 import os
 import sys
 import json
-import requests
+import math
+import bisect
 import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+import http_transport
+from bm25_index import tokenize
 
 # Predefined biology knowledge base for demo
 BIOLOGY_KNOWLEDGE = {
@@ -43,27 +50,140 @@ BIOLOGY_KNOWLEDGE = {
     }
 }
 
-def find_relevant_content(topic):
-    """Find relevant content for a given topic"""
-    topic_lower = topic.lower()
-    relevant_content = []
+def load_knowledge_base(path):
+    """Knowledge entries from a JSON object ({key: entry}), JSON list or JSONL file of
+    {"key", "content", "chapter", "section"} records"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = json.load(f)
     
-    # Direct matches
-    for key, content in BIOLOGY_KNOWLEDGE.items():
-        if key in topic_lower or topic_lower in key:
-            relevant_content.append(content)
+    if isinstance(records, dict):
+        return records
     
-    # If no direct matches, search within content
-    if not relevant_content:
-        for key, content in BIOLOGY_KNOWLEDGE.items():
-            if any(word in content['content'].lower() for word in topic_lower.split()):
-                relevant_content.append(content)
+    knowledge = {}
+    for number, record in enumerate(records, 1):
+        key = record.get('key') or record.get('topic')
+        if not isinstance(key, str) or not key.strip():
+            print(f"⚠️  Skipping knowledge record {number} in {path}: no \"key\" or \"topic\"", file=sys.stderr)
+            continue
+        knowledge[key] = record
+    return knowledge
+
+def index_tokens(text):
+    """Tokens for the index: bm25 tokens with a plural 's' stripped (cells -> cell)"""
+    return [token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token
+            for token in tokenize(text)]
+
+class KnowledgeIndex:
+    def __init__(self, knowledge):
+        """Build key and content indexes over {key: {content, chapter, section}}"""
+        self.keys = [key.lower() for key in knowledge]
+        self.entries = list(knowledge.values())
+        
+        # Exact keys (for keys inside the topic: 'cell' in 'cellular respiration') and
+        # every key suffix, sorted (for topics inside a key: 'synthesis' -> photosynthesis)
+        self.key_lookup = defaultdict(list)
+        self.key_suffixes = []
+        for i, key in enumerate(self.keys):
+            self.key_lookup[key].append(i)
+            self.key_suffixes.extend((key[start:], i) for start in range(len(key)))
+        self.key_suffixes.sort()
+        self.max_key_length = max(map(len, self.keys), default=0)
+        
+        # token -> (entries, 1 + log tf) arrays over the content, plus every suffix of
+        # the vocabulary, sorted, to find the words a topic word occurs in
+        postings = defaultdict(list)
+        for i, entry in enumerate(self.entries):
+            for token, count in Counter(index_tokens(entry['content'])).items():
+                postings[token].append((i, 1 + math.log(count)))
+        self.content_postings = {
+            token: (np.array([i for i, _ in rows], dtype=np.int32), np.array([w for _, w in rows], dtype=np.float32))
+            for token, rows in postings.items()
+        }
+        self.vocabulary_suffixes = sorted(
+            (token[start:], token) for token in self.content_postings for start in range(len(token))
+        )
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def key_matches(self, topic_lower):
+        """Entries whose key occurs in the topic or contains it"""
+        matches = set()
+        for start in range(len(topic_lower)):
+            rest = topic_lower[start:start + self.max_key_length]
+            for end in range(1, len(rest) + 1):
+                matches.update(self.key_lookup.get(rest[:end], ()))
+        
+        if len(topic_lower) >= 3:
+            position = bisect.bisect_left(self.key_suffixes, (topic_lower, -1))
+            while position < len(self.key_suffixes) and self.key_suffixes[position][0].startswith(topic_lower):
+                matches.add(self.key_suffixes[position][1])
+                position += 1
+        return sorted(matches)
+    
+    def expand(self, token):
+        """Content tokens a topic token occurs in ('gene' -> genetic, 'cellular' -> multicellular)
+
+        Unlike the old substring scan, tokens shorter than 3 characters only match
+        themselves (or they would match almost every word), and stopwords are not
+        topic tokens at all
+        """
+        if len(token) < 3:
+            return [token] if token in self.content_postings else []
+        position = bisect.bisect_left(self.vocabulary_suffixes, (token, ''))
+        expanded = set()
+        while position < len(self.vocabulary_suffixes) and self.vocabulary_suffixes[position][0].startswith(token):
+            expanded.add(self.vocabulary_suffixes[position][1])
+            position += 1
+        return expanded
+    
+    def content_matches(self, topic_tokens, limit):
+        """Entries sharing words with the topic, most topic words covered first, then by TF-IDF"""
+        coverage = np.zeros(len(self.entries), dtype=np.int32)
+        scores = np.zeros(len(self.entries), dtype=np.float32)
+        for topic_token in topic_tokens:
+            token_scores = np.zeros(len(self.entries), dtype=np.float32)
+            for token in self.expand(topic_token):
+                rows, weights = self.content_postings[token]
+                token_scores[rows] += math.log(1 + len(self.entries) / len(rows)) * weights
+            coverage += token_scores > 0
+            scores += token_scores
+        
+        matched = np.flatnonzero(coverage)
+        best = np.lexsort((matched, -scores[matched], -coverage[matched]))[:limit]
+        return matched[best].tolist()
+    
+    def search(self, topic, limit=3):
+        """Entries whose key matches the topic; only without any, the best content matches"""
+        topic_lower = topic.lower().strip()
+        ranked = self.key_matches(topic_lower)
+        if not ranked:
+            ranked = self.content_matches(set(index_tokens(topic_lower)), limit)
+        return [self.entries[i] for i in ranked[:limit]]
+
+_knowledge_index = None
+
+def get_knowledge_index():
+    """Index over BIOLOGY_KNOWLEDGE_PATH when set, otherwise the built-in knowledge base"""
+    global _knowledge_index
+    if _knowledge_index is None:
+        path = os.getenv('BIOLOGY_KNOWLEDGE_PATH')
+        _knowledge_index = KnowledgeIndex(load_knowledge_base(path) if path else BIOLOGY_KNOWLEDGE)
+    return _knowledge_index
+
+def find_relevant_content(topic):
+    """Find relevant content for a given topic"""
+    index = get_knowledge_index()
+    relevant_content = index.search(topic, limit=3)
     
-    # If still no matches, provide general biology content
+    # If no matches, provide general biology content
     if not relevant_content:
-        relevant_content = [list(BIOLOGY_KNOWLEDGE.values())[0]]  # Default to first entry
+        relevant_content = index.entries[:1]  # Default to first entry
     
-    return relevant_content[:3]  # Return top 3 relevant pieces
+    return relevant_content  # Top 3 relevant pieces
 
 def generate_response_with_groq(topic, context):
     """Generate response using Groq API"""
@@ -106,7 +226,7 @@ D) [Option]
 Correct Answer: [Letter] - [Brief explanation why this is correct]"""
 
     try:
-        response = requests.post(
+        response = http_transport.post(
             groq_url,
             headers={
                 "Authorization": f"Bearer {groq_api_key}",
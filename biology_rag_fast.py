@@ -8,27 +8,65 @@ import json
 import requests
 import chromadb
 import os
-from typing import List, Dict
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Any, Iterator
+
+import http_transport
+from embedding_cache import EmbeddingCache
+from answer_cache import SemanticAnswerCache, retrieval_namespace
+from llm_stream import iter_openai_sse
+from rag_batch import ask_many_pipelined, batch_main
+from local_vector_index import load_local_index
+from federated_retrieval import FederatedRetriever, parse_names
 
 
 class BiologyLearningRAG:
     def __init__(self, db_path="/Users/mihirdhankani/biologyVectorDatabase", 
                  groq_api_key=os.getenv('GROQ_API_KEY'),
-                 model="llama3-70b-8192"):
+                 model="llama3-70b-8192",
+                 local_index_path=None,
+                 collections=None):
         """Initialize the FAST RAG system with Groq API"""
         self.db_path = db_path
+        self.collections = collections or parse_names(os.getenv('RAG_COLLECTIONS')) or ["biology_textbook"]
         self.groq_api_key = groq_api_key
         self.model = model
         self.groq_url = "https://api.groq.com/openai/v1/chat/completions"
         
-        # Initialize ChromaDB quietly
+        # Initialize ChromaDB quietly; embed queries ourselves (same default
+        # MiniLM function as the collection) so embeddings can be cached
         self.client = chromadb.PersistentClient(path=db_path)
-        self.collection = self.client.get_collection("biology_textbook")
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        self.collection = self.client.get_collection(self.collections[0], embedding_function=self.embedding_function)
+        self.embedding_cache = EmbeddingCache.from_env(namespace="chroma-default-minilm")
+        # Optional in-process snapshot of the collection (see local_vector_index.py),
+        # otherwise fan out when several collections are configured
+        local_index_path = local_index_path or os.getenv('LOCAL_INDEX_PATH')
+        self.retriever = load_local_index(local_index_path)
+        if not self.retriever and len(self.collections) > 1:
+            self.retriever = FederatedRetriever.from_chroma(self.client, self.collections)
+        # Answers are only reused for the same model over the same retrieval setup
+        self.answer_cache = SemanticAnswerCache.from_env(namespace=retrieval_namespace(
+            f"chroma:{db_path}", self.model, self.collections, local_index_path
+        ))
+    
+    def get_query_embedding(self, query: str) -> List[float]:
+        """Generate embedding for the query (cached per normalized query)"""
+        embedding = self.embedding_cache.get_or_compute(query, lambda text: self.embedding_function([text])[0])
+        return embedding.tolist()
     
     def retrieve_context(self, query: str, n_results: int = 3) -> List[Dict]:
         """Retrieve relevant context from the vector database (FAST)"""
+        return self.search_by_embedding(self.get_query_embedding(query), n_results, query_text=query)
+    
+    def search_by_embedding(self, query_embedding: List[float], n_results: int = 3,
+                            query_text: str = None) -> List[Dict]:
+        """Query ChromaDB (or the local/federated retriever) with a precomputed query embedding"""
+        if self.retriever:
+            return self.retriever.search(query_embedding, n_results, query_text=query_text)
+        
         results = self.collection.query(
-            query_texts=[query],
+            query_embeddings=[query_embedding],
             n_results=n_results  # Reduced from 4 to 3 for speed
         )
         
@@ -59,8 +97,8 @@ class BiologyLearningRAG:
         
         return formatted_context.strip()
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Generate response using Groq API (FAST)"""
+    def build_messages(self, query: str, context: str) -> List[Dict[str, str]]:
+        """Build the Groq chat messages for a topic"""
         # Enhanced prompt for introduction + learning pathways
         system_prompt = "You are a biology expert and educational guide. Using the provided textbook context, write comprehensive and educational content for biology students."
         
@@ -91,25 +129,35 @@ C) [Option]
 D) [Option]
 Correct Answer: [Letter] - [Brief explanation why this is correct]"""
 
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _groq_request(self, query: str, context: str, stream: bool = False):
+        """POST a chat completion request to Groq"""
+        return http_transport.post(
+            self.groq_url,
+            headers={
+                "Authorization": f"Bearer {self.groq_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "messages": self.build_messages(query, context),
+                "temperature": 0.3,
+                "max_tokens": 1000,
+                "top_p": 0.9,
+                "stream": stream
+            },
+            timeout=30,
+            stream=stream
+        )
+    
+    def generate_response(self, query: str, context: str) -> str:
+        """Generate response using Groq API (FAST)"""
         try:
-            response = requests.post(
-                self.groq_url,
-                headers={
-                    "Authorization": f"Bearer {self.groq_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 1000,
-                    "top_p": 0.9
-                },
-                timeout=30
-            )
+            response = self._groq_request(query, context)
             
             if response.status_code == 200:
                 result = response.json()
@@ -122,19 +170,49 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
         except Exception as e:
             return f"Error: {e}"
     
-    def ask_fast(self, query: str) -> Dict:
-        """Main method to ask a question and get a FAST RAG response"""
-        start_time = __import__('time').time()
-        
-        # Retrieve relevant context (fewer chunks)
-        context_chunks = self.retrieve_context(query, 3)
-        
+    def generate_response_stream(self, query: str, context: str) -> Iterator[str]:
+        """Stream the Groq response as it is generated (Server-Sent Events)"""
+        try:
+            with self._groq_request(query, context, stream=True) as response:
+                if response.status_code != 200:
+                    yield f"Error: Groq API returned status {response.status_code}: {response.text}"
+                    return
+                
+                yield from iter_openai_sse(response)
+                
+        except requests.exceptions.Timeout:
+            yield "Error: Request timed out."
+        except Exception as e:
+            yield f"Error: {e}"
+    
+    def format_sources(self, context_chunks: List[Dict]) -> List[str]:
+        """One-line source descriptions shown under the answer"""
+        sources = []
+        for i, chunk in enumerate(context_chunks, 1):
+            source_info = f"{i}. Relevance: {chunk['relevance_score']:.3f} | {chunk['text'][:100]}..."
+            sources.append(source_info)
+        return sources
+    
+    def _cached_result(self, query: str, cached: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        """Result dict for an answer served from the answer cache"""
+        return {
+            'query': query,
+            'answer': cached['answer'],
+            'sources': cached['sources'],
+            'response_time': (__import__('time').time() - start_time) * 1000,
+            'cache': 'hit'
+        }
+    
+    def _answer(self, query: str, query_embedding: List[float], context_chunks: List[Dict],
+                start_time: float) -> Dict[str, Any]:
+        """Generate (and cache) the answer for already-retrieved context"""
         if not context_chunks:
             return {
                 'query': query,
                 'answer': 'No relevant context found.',
                 'sources': [],
-                'response_time': (__import__('time').time() - start_time) * 1000
+                'response_time': (__import__('time').time() - start_time) * 1000,
+                'cache': 'miss'
             }
         
         # Format context for the LLM
@@ -143,11 +221,11 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
         # Generate response
         answer = self.generate_response(query, formatted_context)
         
-        # Prepare sources information (simplified)
-        sources = []
-        for i, chunk in enumerate(context_chunks, 1):
-            source_info = f"{i}. Relevance: {chunk['relevance_score']:.3f} | {chunk['text'][:100]}..."
-            sources.append(source_info)
+        # Prepare sources information
+        sources = self.format_sources(context_chunks)
+        
+        if self.answer_cache and not answer.startswith('Error'):
+            self.answer_cache.store(query, query_embedding, answer, sources)
         
         response_time = (__import__('time').time() - start_time) * 1000
         
@@ -155,12 +233,97 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
             'query': query,
             'answer': answer,
             'sources': sources,
-            'response_time': response_time
+            'response_time': response_time,
+            'cache': 'miss'
+        }
+    
+    def ask_fast(self, query: str) -> Dict:
+        """Main method to ask a question and get a FAST RAG response"""
+        start_time = __import__('time').time()
+        
+        # Serve near-identical questions from the answer cache
+        query_embedding = self.get_query_embedding(query)
+        cached = self.answer_cache.lookup(query_embedding) if self.answer_cache else None
+        if cached:
+            return self._cached_result(query, cached, start_time)
+        
+        # Retrieve relevant context
+        context_chunks = self.retrieve_context(query, 3)
+        
+        return self._answer(query, query_embedding, context_chunks, start_time)
+    
+    def get_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries in one batch (cached queries are not re-encoded)"""
+        vectors = self.embedding_cache.get_or_compute_many(queries, self.embedding_function)
+        return [vector.tolist() for vector in vectors]
+    
+    def ask_many(self, queries: List[str], concurrency: int = 4, n_results: int = 3) -> List[Dict[str, Any]]:
+        """Answer many topics: one embedding batch, then pipelined retrieval and generation"""
+        query_embeddings = self.get_query_embeddings(queries)
+        
+        def retrieve(i):
+            start_time = __import__('time').time()
+            cached = self.answer_cache.lookup(query_embeddings[i]) if self.answer_cache else None
+            if cached:
+                return start_time, cached, None
+            return start_time, None, self.search_by_embedding(query_embeddings[i], n_results, query_text=queries[i])
+        
+        def generate(i, retrieved):
+            start_time, cached, context_chunks = retrieved
+            if cached:
+                return self._cached_result(queries[i], cached, start_time)
+            return self._answer(queries[i], query_embeddings[i], context_chunks, start_time)
+        
+        return ask_many_pipelined(queries, retrieve, generate, concurrency)
+    
+    def ask_stream(self, query: str) -> Iterator[Dict[str, Any]]:
+        """Stream an answer: sources first, then answer deltas, then timing"""
+        start_time = __import__('time').time()
+        
+        query_embedding = self.get_query_embedding(query)
+        cached = self.answer_cache.lookup(query_embedding) if self.answer_cache else None
+        if cached:
+            yield {'type': 'sources', 'query': query, 'sources': cached['sources']}
+            yield {'type': 'delta', 'text': cached['answer']}
+            yield {'type': 'done', 'response_time': (__import__('time').time() - start_time) * 1000, 'cache': 'hit'}
+            return
+        
+        context_chunks = self.retrieve_context(query, 3)
+        sources = self.format_sources(context_chunks)
+        yield {'type': 'sources', 'query': query, 'sources': sources}
+        
+        if not context_chunks:
+            yield {'type': 'delta', 'text': 'No relevant context found.'}
+            yield {'type': 'done', 'response_time': (__import__('time').time() - start_time) * 1000, 'cache': 'miss'}
+            return
+        
+        formatted_context = self.format_context(context_chunks)
+        
+        parts = []
+        first_token_time = None
+        for text in self.generate_response_stream(query, formatted_context):
+            if first_token_time is None:
+                first_token_time = (__import__('time').time() - start_time) * 1000
+            parts.append(text)
+            yield {'type': 'delta', 'text': text}
+        
+        answer = ''.join(parts)
+        if self.answer_cache and answer and not answer.startswith('Error'):
+            self.answer_cache.store(query, query_embedding, answer, sources)
+        
+        yield {
+            'type': 'done',
+            'response_time': (__import__('time').time() - start_time) * 1000,
+            'first_token_time': first_token_time,
+            'cache': 'miss'
         }
 
 
 def main():
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        # Batch mode: topics from a file, JSONL results
+        batch_main(sys.argv[1:], BiologyLearningRAG)
+    elif len(sys.argv) > 1:
         # Command line mode
         query = ' '.join(sys.argv[1:])
         rag = BiologyLearningRAG()
@@ -178,7 +341,7 @@ def main():
         for source in result['sources']:
             print(f"  {source}")
         
-        print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s)")
+        print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s) | cache: {result['cache']}")
         
     elif not sys.stdin.isatty():
         # Input from pipe/stdin
@@ -199,11 +362,12 @@ def main():
             for source in result['sources']:
                 print(f"  {source}")
             
-            print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s)")
+            print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s) | cache: {result['cache']}")
     else:
         print("Biology RAG System - GROQ POWERED")
         print("Usage: python biology_rag_fast.py 'your question here'")
         print("   or: echo 'your question' | python biology_rag_fast.py")
+        print("   or: python biology_rag_fast.py --batch topics.txt [--concurrency 4] [--output results.jsonl]")
 
 
 if __name__ == "__main__":
@@ -9,21 +9,37 @@ import json
 import requests
 from pinecone import Pinecone
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import time
 
+import http_transport
+from embedding_cache import EmbeddingCache
+from answer_cache import SemanticAnswerCache, retrieval_namespace
+from llm_stream import iter_openai_sse
+from rag_batch import ask_many_pipelined, batch_main
+from local_vector_index import load_local_index
+from federated_retrieval import FederatedRetriever, parse_names, pinecone_shard
+from doc_store import join_matches, open_doc_stores
+
 class BiologyRAGPinecone:
     def __init__(self, 
                  pinecone_api_key=None,
                  groq_api_key=None,
                  index_name="biology-vectors",
-                 model="llama3-70b-8192"):
+                 model="llama3-70b-8192",
+                 embedding_model=None,
+                 local_index_path=None,
+                 namespaces=None,
+                 doc_store_path=None):
         """Initialize the cloud-based RAG system"""
         
         # API keys
         self.pinecone_api_key = pinecone_api_key or os.getenv('PINECONE_API_KEY')
         self.groq_api_key = groq_api_key or os.getenv('GROQ_API_KEY')
         self.index_name = index_name
+        # One namespace is queried directly; several are searched in parallel
+        self.namespaces = namespaces or parse_names(os.getenv('PINECONE_NAMESPACES'))
+        self.namespace = self.namespaces[0] if len(self.namespaces) == 1 else ""
         self.model = model
         self.groq_url = "https://api.groq.com/openai/v1/chat/completions"
         
@@ -38,15 +54,44 @@ class BiologyRAGPinecone:
         self.pc = Pinecone(api_key=self.pinecone_api_key)
         self.index = self.pc.Index(self.index_name)
         
-        # Initialize embedding model (same as used in ChromaDB)
-        print("🤖 Loading embedding model...")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Initialize embedding model (same as used in ChromaDB), unless a
+        # preloaded one is shared with us (e.g. by a pre-fork server)
+        if embedding_model is None:
+            print("🤖 Loading embedding model...")
+            embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = embedding_model
+        self.embedding_cache = EmbeddingCache.from_env()
+        
+        # Chunk text kept locally (see doc_store.py), so Pinecone only returns ids and scores
+        self.doc_store_root = doc_store_path or os.getenv('PINECONE_DOC_STORE')
+        self.doc_stores = {}
+        if self.doc_store_root:
+            self.doc_stores = open_doc_stores(self.doc_store_root, self.index_name, self.namespaces or [self.namespace])
+            for namespace, store in self.doc_stores.items():
+                print(f"📚 Joining '{namespace or 'default'}' matches to text from {store.path} ({len(store)} records)")
+        
+        # Optional in-process snapshot of the index (see local_vector_index.py)
+        local_index_path = local_index_path or os.getenv('LOCAL_INDEX_PATH')
+        self.retriever = load_local_index(local_index_path)
+        if self.retriever:
+            print(f"📦 Searching local index at {self.retriever.path}")
+        elif len(self.namespaces) > 1:
+            self.retriever = FederatedRetriever({
+                namespace: pinecone_shard(self.index, namespace, self.format_matches, self.needs_metadata(namespace))
+                for namespace in self.namespaces
+            })
+            print(f"🔀 Searching namespaces: {', '.join(self.namespaces)}")
+        
+        # Answers are only reused for the same model over the same retrieval setup
+        self.answer_cache = SemanticAnswerCache.from_env(namespace=retrieval_namespace(
+            f"pinecone:{self.index_name}", self.model, self.namespaces or [self.namespace], local_index_path
+        ))
         
         print("✅ Cloud RAG system initialized!")
     
     def get_query_embedding(self, query: str) -> List[float]:
-        """Generate embedding for the query"""
-        embedding = self.embedding_model.encode(query)
+        """Generate embedding for the query (cached per normalized query)"""
+        embedding = self.embedding_cache.get_or_compute(query, self.embedding_model.encode)
         return embedding.tolist()
     
     def retrieve_context(self, query: str, n_results: int = 3) -> List[Dict]:
@@ -55,24 +100,49 @@ class BiologyRAGPinecone:
         # Generate query embedding
         query_embedding = self.get_query_embedding(query)
         
-        # Query Pinecone
+        return self.search_by_embedding(query_embedding, n_results, query_text=query)
+    
+    def search_by_embedding(self, query_embedding: List[float], n_results: int = 3,
+                            query_text: str = None) -> List[Dict]:
+        """Query Pinecone (or the local/federated retriever) with a precomputed query embedding"""
+        if self.retriever:
+            return self.retriever.search(query_embedding, n_results, query_text=query_text)
+        
         results = self.index.query(
             vector=query_embedding,
             top_k=n_results,
-            include_metadata=True
+            include_metadata=self.needs_metadata(self.namespace),
+            namespace=self.namespace
         )
         
-        # Format results to match ChromaDB structure
+        return self.format_matches(results['matches'], self.namespace)
+    
+    def needs_metadata(self, namespace: str) -> bool:
+        """Whether queries on a namespace must return metadata (no local doc store for it)"""
+        return namespace not in self.doc_stores
+    
+    def fetch_metadata(self, ids: List[str], namespace: str) -> Dict[str, Dict]:
+        """Metadata for ids the doc store does not have, straight from the index"""
+        vectors = self.index.fetch(ids=ids, namespace=namespace).vectors
+        return {id_: dict(vector.metadata or {}) for id_, vector in vectors.items()}
+    
+    def format_matches(self, matches, namespace: str = None) -> List[Dict]:
+        """Format Pinecone matches to match ChromaDB structure (text from the doc store when there is one)"""
+        namespace = self.namespace if namespace is None else namespace
+        joined = join_matches(matches, self.doc_stores.get(namespace),
+                              lambda ids: self.fetch_metadata(ids, namespace))
+        
         context_chunks = []
-        for match in results['matches']:
+        for match, record in joined:
+            text, metadata = record['text'], record['metadata']
             chunk = {
-                'text': match['metadata']['text'],
+                'text': text,
                 'metadata': {
-                    'chapter': match['metadata'].get('chapter', 'unknown'),
-                    'section': match['metadata'].get('section', 'unknown'),
-                    'content_type': match['metadata'].get('content_type', 'content'),
-                    'word_count': match['metadata'].get('word_count', 0),
-                    'char_count': match['metadata'].get('char_count', 0)
+                    'chapter': metadata.get('chapter', 'unknown'),
+                    'section': metadata.get('section', 'unknown'),
+                    'content_type': metadata.get('content_type', 'content'),
+                    'word_count': metadata.get('word_count', 0),
+                    'char_count': metadata.get('char_count', 0)
                 },
                 'relevance_score': match['score']
             }
@@ -91,8 +161,8 @@ class BiologyRAGPinecone:
         
         return formatted_context.strip()
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Generate response using Groq API"""
+    def build_messages(self, query: str, context: str) -> List[Dict[str, str]]:
+        """Build the Groq chat messages for a topic"""
         system_prompt = "You are a biology expert and educational guide. Using the provided textbook context, write comprehensive and educational content for biology students."
         
         user_prompt = f"""Using the following biology textbook context, provide a comprehensive response about: {query}
@@ -122,25 +192,35 @@ C) [Option]
 D) [Option]
 Correct Answer: [Letter] - [Brief explanation why this is correct]"""
 
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _groq_request(self, query: str, context: str, stream: bool = False):
+        """POST a chat completion request to Groq"""
+        return http_transport.post(
+            self.groq_url,
+            headers={
+                "Authorization": f"Bearer {self.groq_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "messages": self.build_messages(query, context),
+                "temperature": 0.3,
+                "max_tokens": 1000,
+                "top_p": 0.9,
+                "stream": stream
+            },
+            timeout=30,
+            stream=stream
+        )
+    
+    def generate_response(self, query: str, context: str) -> str:
+        """Generate response using Groq API"""
         try:
-            response = requests.post(
-                self.groq_url,
-                headers={
-                    "Authorization": f"Bearer {self.groq_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 1000,
-                    "top_p": 0.9
-                },
-                timeout=30
-            )
+            response = self._groq_request(query, context)
             
             if response.status_code == 200:
                 result = response.json()
@@ -153,19 +233,50 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
         except Exception as e:
             return f"Error: {e}"
     
-    def ask_cloud(self, query: str) -> Dict[str, Any]:
-        """Main method to ask a question using cloud vector database"""
-        start_time = time.time()
-        
-        # Retrieve relevant context from Pinecone
-        context_chunks = self.retrieve_context(query, 3)
-        
+    def generate_response_stream(self, query: str, context: str) -> Iterator[str]:
+        """Stream the Groq response as it is generated (Server-Sent Events)"""
+        try:
+            with self._groq_request(query, context, stream=True) as response:
+                if response.status_code != 200:
+                    yield f"Error: Groq API returned status {response.status_code}: {response.text}"
+                    return
+                
+                yield from iter_openai_sse(response)
+                
+        except requests.exceptions.Timeout:
+            yield "Error: Request timed out."
+        except Exception as e:
+            yield f"Error: {e}"
+    
+    def format_sources(self, context_chunks: List[Dict]) -> List[str]:
+        """One-line source descriptions shown under the answer"""
+        sources = []
+        for i, chunk in enumerate(context_chunks, 1):
+            source_info = f"{i}. Score: {chunk['relevance_score']:.3f} | {chunk['text'][:100]}..."
+            sources.append(source_info)
+        return sources
+    
+    def _cached_result(self, query: str, cached: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        """Result dict for an answer served from the answer cache"""
+        return {
+            'query': query,
+            'answer': cached['answer'],
+            'sources': cached['sources'],
+            'response_time': (time.time() - start_time) * 1000,
+            'database': 'pinecone-cloud',
+            'cache': 'hit'
+        }
+    
+    def _answer(self, query: str, query_embedding: List[float], context_chunks: List[Dict],
+                start_time: float) -> Dict[str, Any]:
+        """Generate (and cache) the answer for already-retrieved context"""
         if not context_chunks:
             return {
                 'query': query,
                 'answer': 'No relevant context found.',
                 'sources': [],
-                'response_time': (time.time() - start_time) * 1000
+                'response_time': (time.time() - start_time) * 1000,
+                'cache': 'miss'
             }
         
         # Format context for the LLM
@@ -175,10 +286,10 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
         answer = self.generate_response(query, formatted_context)
         
         # Prepare sources information
-        sources = []
-        for i, chunk in enumerate(context_chunks, 1):
-            source_info = f"{i}. Score: {chunk['relevance_score']:.3f} | {chunk['text'][:100]}..."
-            sources.append(source_info)
+        sources = self.format_sources(context_chunks)
+        
+        if self.answer_cache and not answer.startswith('Error'):
+            self.answer_cache.store(query, query_embedding, answer, sources)
         
         response_time = (time.time() - start_time) * 1000
         
@@ -187,9 +298,90 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
             'answer': answer,
             'sources': sources,
             'response_time': response_time,
-            'database': 'pinecone-cloud'
+            'database': 'pinecone-cloud',
+            'cache': 'miss'
         }
     
+    def ask_cloud(self, query: str) -> Dict[str, Any]:
+        """Main method to ask a question using cloud vector database"""
+        start_time = time.time()
+        
+        # Serve near-identical questions from the answer cache
+        query_embedding = self.get_query_embedding(query)
+        cached = self.answer_cache.lookup(query_embedding) if self.answer_cache else None
+        if cached:
+            return self._cached_result(query, cached, start_time)
+        
+        # Retrieve relevant context
+        context_chunks = self.retrieve_context(query, 3)
+        
+        return self._answer(query, query_embedding, context_chunks, start_time)
+    
+    def get_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries in one batch (cached queries are not re-encoded)"""
+        vectors = self.embedding_cache.get_or_compute_many(queries, lambda texts: self.embedding_model.encode(texts, batch_size=64))
+        return [vector.tolist() for vector in vectors]
+    
+    def ask_many(self, queries: List[str], concurrency: int = 4, n_results: int = 3) -> List[Dict[str, Any]]:
+        """Answer many topics: one embedding batch, then pipelined retrieval and generation"""
+        query_embeddings = self.get_query_embeddings(queries)
+        
+        def retrieve(i):
+            start_time = time.time()
+            cached = self.answer_cache.lookup(query_embeddings[i]) if self.answer_cache else None
+            if cached:
+                return start_time, cached, None
+            return start_time, None, self.search_by_embedding(query_embeddings[i], n_results, query_text=queries[i])
+        
+        def generate(i, retrieved):
+            start_time, cached, context_chunks = retrieved
+            if cached:
+                return self._cached_result(queries[i], cached, start_time)
+            return self._answer(queries[i], query_embeddings[i], context_chunks, start_time)
+        
+        return ask_many_pipelined(queries, retrieve, generate, concurrency)
+    
+    def ask_stream(self, query: str) -> Iterator[Dict[str, Any]]:
+        """Stream an answer: sources first, then answer deltas, then timing"""
+        start_time = time.time()
+        
+        query_embedding = self.get_query_embedding(query)
+        cached = self.answer_cache.lookup(query_embedding) if self.answer_cache else None
+        if cached:
+            yield {'type': 'sources', 'query': query, 'sources': cached['sources']}
+            yield {'type': 'delta', 'text': cached['answer']}
+            yield {'type': 'done', 'response_time': (time.time() - start_time) * 1000, 'cache': 'hit', 'database': 'pinecone-cloud'}
+            return
+        
+        context_chunks = self.retrieve_context(query, 3)
+        sources = self.format_sources(context_chunks)
+        yield {'type': 'sources', 'query': query, 'sources': sources}
+        
+        if not context_chunks:
+            yield {'type': 'delta', 'text': 'No relevant context found.'}
+            yield {'type': 'done', 'response_time': (time.time() - start_time) * 1000, 'cache': 'miss', 'database': 'pinecone-cloud'}
+            return
+        
+        formatted_context = self.format_context(context_chunks)
+        
+        parts = []
+        first_token_time = None
+        for text in self.generate_response_stream(query, formatted_context):
+            if first_token_time is None:
+                first_token_time = (time.time() - start_time) * 1000
+            parts.append(text)
+            yield {'type': 'delta', 'text': text}
+        
+        answer = ''.join(parts)
+        if self.answer_cache and answer and not answer.startswith('Error'):
+            self.answer_cache.store(query, query_embedding, answer, sources)
+        
+        yield {
+            'type': 'done',
+            'response_time': (time.time() - start_time) * 1000,
+            'first_token_time': first_token_time,
+            'cache': 'miss', 'database': 'pinecone-cloud'
+        }
     def health_check(self) -> Dict[str, Any]:
         """Check system health"""
         try:
@@ -201,7 +393,8 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
             test_results = self.index.query(
                 vector=test_embedding,
                 top_k=1,
-                include_metadata=True
+                include_metadata=self.needs_metadata(self.namespace),
+                namespace=self.namespace
             )
             
             return {
@@ -209,6 +402,11 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
                 'pinecone_connected': True,
                 'total_vectors': stats.get('total_vector_count', 0),
                 'embedding_model': 'all-MiniLM-L6-v2',
+                'embedding_cache': self.embedding_cache.stats(),
+                'answer_cache': self.answer_cache.stats() if self.answer_cache else None,
+                'local_index': {'path': self.retriever.path, 'vectors': len(self.retriever)} if hasattr(self.retriever, 'path') else None,
+                'namespaces': self.namespaces,
+                'doc_stores': {namespace: len(store) for namespace, store in self.doc_stores.items()},
                 'index_name': self.index_name
             }
             
@@ -220,7 +418,31 @@ Correct Answer: [Letter] - [Brief explanation why this is correct]"""
             }
 
 
+def print_streamed_answer(rag: BiologyRAGPinecone, query: str):
+    """Print the answer as it streams in, in the same layout as the blocking CLI"""
+    sources = []
+    print(f"\\n🤖 Answer:")
+    for event in rag.ask_stream(query):
+        if event['type'] == 'sources':
+            sources = event['sources']
+        elif event['type'] == 'delta':
+            print(event['text'], end='', flush=True)
+        elif event['type'] == 'done':
+            print()
+            print(f"\\n📚 Sources:")
+            for source in sources:
+                print(f"  {source}")
+            print(f"\\n⏱️  Response time: {event['response_time']:.0f}ms ({event['response_time']/1000:.1f}s) | cache: {event['cache']}")
+            if event.get('first_token_time') is not None:
+                print(f"⚡ First token: {event['first_token_time']:.0f}ms")
+            print(f"🌐 Database: {event['database']}")
+
+
 def main():
+    # Stream tokens as they arrive instead of waiting for the full answer
+    stream = '--stream' in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--stream']
+    
     # Check for required API keys
     if not os.getenv('PINECONE_API_KEY'):
         print("❌ Error: PINECONE_API_KEY environment variable not set")
@@ -228,9 +450,13 @@ def main():
         print("   export PINECONE_API_KEY='your-api-key-here'")
         return
     
-    if len(sys.argv) > 1:
+    if args and args[0] == '--batch':
+        # Batch mode: topics from a file, JSONL results
+        batch_main(args, BiologyRAGPinecone)
+        
+    elif args:
         # Command line mode
-        query = ' '.join(sys.argv[1:])
+        query = ' '.join(args)
         
         try:
             rag = BiologyRAGPinecone()
@@ -239,6 +465,10 @@ def main():
             print(f"❓ Topic: {query}")
             print("━" * 50)
             
+            if stream:
+                print_streamed_answer(rag, query)
+                return
+            
             result = rag.ask_cloud(query)
             
             print(f"\\n🤖 Answer:")
@@ -248,7 +478,7 @@ def main():
             for source in result['sources']:
                 print(f"  {source}")
             
-            print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s)")
+            print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s) | cache: {result['cache']}")
             print(f"🌐 Database: {result['database']}")
             
         except Exception as e:
@@ -274,7 +504,7 @@ def main():
                 for source in result['sources']:
                     print(f"  {source}")
                 
-                print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s)")
+                print(f"\\n⏱️  Response time: {result['response_time']:.0f}ms ({result['response_time']/1000:.1f}s) | cache: {result['cache']}")
                 print(f"🌐 Database: {result['database']}")
                 
             except Exception as e:
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Biology RAG System - ASYNC PINECONE VERSION
+asyncio-native ask_cloud: the embedding runs in a thread pool while Pinecone
+and Groq are called over one shared aiohttp session, so a single event loop
+can serve hundreds of concurrent topics
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from biology_rag_pinecone import BiologyRAGPinecone
+from federated_retrieval import FederatedRetriever
+
+
+class AsyncBiologyRAGPinecone(BiologyRAGPinecone):
+    def __init__(self, *args, embedding_threads: int = 2,
+                 max_connections: int = 100, request_timeout: float = 30.0, **kwargs):
+        """Initialize the async RAG system (clients are shared by all requests)"""
+        super().__init__(*args, **kwargs)
+
+        # Query the index's data plane directly so no SDK call blocks the loop
+        self.index_host = self.pc.describe_index(self.index_name).host
+        self.executor = ThreadPoolExecutor(max_workers=embedding_threads)
+        self.max_connections = max_connections
+        self.request_timeout = request_timeout
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """One pooled session per event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self._session
+
+    async def aclose(self):
+        """Close the HTTP session and the embedding thread pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _run_blocking(self, func, *args):
+        """Run CPU-bound or blocking work (embedding, SQLite) in the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def get_query_embedding_async(self, query: str) -> List[float]:
+        """Embedding for the query; cache hits skip the thread pool entirely"""
+        embedding = self.embedding_cache.get(query)
+        if embedding is None:
+            text = self.embedding_cache.normalize(query)
+            embedding = self.embedding_cache.put(query, await self._run_blocking(self.embedding_model.encode, text))
+        return embedding.tolist()
+
+    async def query_namespace_async(self, query_embedding: List[float], top_k: int,
+                                    namespace: str = "") -> List[Dict]:
+        """Query one namespace through Pinecone's REST data plane"""
+        session = await self._get_session()
+        async with session.post(
+            f"https://{self.index_host}/query",
+            headers={
+                "Api-Key": self.pinecone_api_key,
+                "Content-Type": "application/json",
+                "X-Pinecone-API-Version": "2025-01"
+            },
+            json={
+                "vector": query_embedding,
+                "topK": top_k,
+                "includeMetadata": self.needs_metadata(namespace),
+                "namespace": namespace
+            }
+        ) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Pinecone query returned status {response.status}: {await response.text()}")
+            results = await response.json()
+
+        # Doc store misses fall back to a (blocking) fetch, so join off the loop
+        return await self._run_blocking(self.format_matches, results.get('matches', []), namespace)
+
+    async def retrieve_context_async(self, query_embedding: List[float], n_results: int = 3,
+                                     query_text: Optional[str] = None) -> List[Dict]:
+        """Closest chunks from Pinecone (all namespaces concurrently) or the local index"""
+        if isinstance(self.retriever, FederatedRetriever):
+            depth = self.retriever.depth(n_results)
+            shard_results = await asyncio.gather(
+                *(self.query_namespace_async(query_embedding, depth, namespace) for namespace in self.namespaces),
+                return_exceptions=True
+            )
+            results = {}
+            for namespace, chunks in zip(self.namespaces, shard_results):
+                if isinstance(chunks, Exception):
+                    print(f"⚠️  Search failed for '{namespace}': {chunks}")
+                    chunks = []
+                results[namespace] = chunks
+            return self.retriever.merge(results, n_results)
+
+        if self.retriever:
+            return await self._run_blocking(self.retriever.search, query_embedding, n_results, query_text)
+
+        return await self.query_namespace_async(query_embedding, n_results, self.namespace)
+
+    async def generate_response_async(self, query: str, context: str) -> str:
+        """Generate response using Groq API without blocking the event loop"""
+        session = await self._get_session()
+        try:
+            async with session.post(
+                self.groq_url,
+                headers={
+                    "Authorization": f"Bearer {self.groq_api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.model,
+                    "messages": self.build_messages(query, context),
+                    "temperature": 0.3,
+                    "max_tokens": 1000,
+                    "top_p": 0.9
+                }
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return result['choices'][0]['message']['content']
+                else:
+                    return f"Error: Groq API returned status {response.status}: {await response.text()}"
+
+        except asyncio.TimeoutError:
+            return "Error: Request timed out."
+        except aiohttp.ClientError as e:
+            return f"Error: {e}"
+
+    async def ask_cloud_async(self, query: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Async ask_cloud; cancelling the task (e.g. client disconnect) aborts all I/O"""
+        if timeout is not None:
+            return await asyncio.wait_for(self.ask_cloud_async(query), timeout=timeout)
+
+        start_time = time.time()
+
+        query_embedding = await self.get_query_embedding_async(query)
+
+        # Start retrieval right away and check the answer cache while it is in flight
+        retrieval = asyncio.ensure_future(self.retrieve_context_async(query_embedding, 3, query))
+        try:
+            cached = None
+            if self.answer_cache:
+                cached = await self._run_blocking(self.answer_cache.lookup, query_embedding)
+
+            if cached:
+                retrieval.cancel()
+                return {
+                    'query': query,
+                    'answer': cached['answer'],
+                    'sources': cached['sources'],
+                    'response_time': (time.time() - start_time) * 1000,
+                    'database': 'pinecone-cloud',
+                    'cache': 'hit'
+                }
+
+            context_chunks = await retrieval
+        finally:
+            if not retrieval.done():
+                retrieval.cancel()
+
+        if not context_chunks:
+            return {
+                'query': query,
+                'answer': 'No relevant context found.',
+                'sources': [],
+                'response_time': (time.time() - start_time) * 1000,
+                'cache': 'miss'
+            }
+
+        formatted_context = self.format_context(context_chunks)
+        answer = await self.generate_response_async(query, formatted_context)
+        sources = self.format_sources(context_chunks)
+
+        if self.answer_cache and not answer.startswith('Error'):
+            await self._run_blocking(self.answer_cache.store, query, query_embedding, answer, sources)
+
+        return {
+            'query': query,
+            'answer': answer,
+            'sources': sources,
+            'response_time': (time.time() - start_time) * 1000,
+            'database': 'pinecone-cloud',
+            'cache': 'miss'
+        }
+
+
+async def _ask_all(queries: List[str]):
+    async with AsyncBiologyRAGPinecone() as rag:
+        return await asyncio.gather(*(rag.ask_cloud_async(query) for query in queries), return_exceptions=True)
+
+
+def main():
+    if not os.getenv('PINECONE_API_KEY'):
+        print("❌ Error: PINECONE_API_KEY environment variable not set")
+        return
+
+    if len(sys.argv) < 2:
+        print("Usage: python3 biology_rag_pinecone_async.py 'topic one' ['topic two' ...]")
+        return
+
+    results = asyncio.run(_ask_all(sys.argv[1:]))
+    for query, result in zip(sys.argv[1:], results):
+        if isinstance(result, Exception):
+            print(json.dumps({'query': query, 'error': str(result)}, ensure_ascii=False))
+        else:
+            print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+BM25 Index - compact inverted index for keyword retrieval
+Terms like "ATP synthase" or "Krebs cycle" are matched exactly, then fused
+with dense MiniLM results by reciprocal rank fusion (HybridRetriever)
+
+Index layout (one directory):
+  manifest.json         doc/term counts, avgdl, k1, b
+  vocab.json            term -> term id
+  doc_ids.json          chunk id of each row
+  doc_lengths.npy       int32 [docs] tokens per document
+  term_offsets.npy      int64 [terms + 1] start of each term's postings
+  postings_rows.npy     int32 document rows, grouped by term
+  postings_tf.npy       uint16 term frequencies
+  postings_weight.npy   float32 precomputed BM25 weight (IDF included) per posting
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from had has have how i if in into is it its
+of on or so such than that the their them then there these they this to was were what when
+where which while who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Builder:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """Accumulate documents in memory until write()"""
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = []
+        self.doc_lengths = []
+        self.postings = {}  # term -> ([rows], [tfs])
+        self._known_ids = set()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, doc_id: str, text: str) -> bool:
+        """Index one document; ids already in the index are skipped"""
+        if doc_id in self._known_ids:
+            return False
+
+        row = len(self.doc_ids)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            rows, tfs = self.postings.setdefault(term, ([], []))
+            rows.append(row)
+            tfs.append(tf)
+
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(tokens))
+        self._known_ids.add(doc_id)
+        return True
+
+    def write(self, path: str) -> Dict:
+        """Write postings arrays with precomputed IDF-weighted BM25 scores"""
+        os.makedirs(path, exist_ok=True)
+
+        n_docs = len(self.doc_ids)
+        doc_lengths = np.asarray(self.doc_lengths, dtype=np.int32)
+        avgdl = float(doc_lengths.mean()) if n_docs else 0.0
+        terms = sorted(self.postings)
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self.postings[term][0]) for term in terms])
+        rows = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        for term_id, term in enumerate(terms):
+            term_rows, term_tfs = self.postings[term]
+            rows[offsets[term_id]:offsets[term_id + 1]] = term_rows
+            tfs[offsets[term_id]:offsets[term_id + 1]] = np.minimum(term_tfs, 65535)
+
+        df = np.diff(offsets)
+        idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        tf = tfs.astype(np.float32)
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[rows] / (avgdl or 1.0))
+        weights = np.repeat(idf, df) * tf * (self.k1 + 1) / (tf + norm)
+
+        np.save(os.path.join(path, 'doc_lengths.npy'), doc_lengths)
+        np.save(os.path.join(path, 'term_offsets.npy'), offsets)
+        np.save(os.path.join(path, 'postings_rows.npy'), rows)
+        np.save(os.path.join(path, 'postings_tf.npy'), tfs)
+        np.save(os.path.join(path, 'postings_weight.npy'), weights.astype(np.float32))
+        with open(os.path.join(path, 'vocab.json'), 'w') as f:
+            json.dump({term: term_id for term_id, term in enumerate(terms)}, f)
+        with open(os.path.join(path, 'doc_ids.json'), 'w') as f:
+            json.dump(self.doc_ids, f)
+
+        manifest = {
+            'kind': 'bm25',
+            'docs': n_docs,
+            'terms': len(terms),
+            'postings': int(offsets[-1]),
+            'avgdl': avgdl,
+            'k1': self.k1,
+            'b': self.b,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return manifest
+
+
+class BM25Index:
+    def __init__(self, path: str):
+        """Load an index; postings stay memory-mapped, the vocabulary is a dict"""
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(path, 'vocab.json')) as f:
+            self.vocab = json.load(f)
+
+        self.offsets = np.load(os.path.join(path, 'term_offsets.npy'))
+        self.rows = np.load(os.path.join(path, 'postings_rows.npy'), mmap_mode='r')
+        self.weights = np.load(os.path.join(path, 'postings_weight.npy'), mmap_mode='r')
+        self._doc_ids = None
+
+    @property
+    def doc_ids(self) -> List[str]:
+        """Chunk ids by row (loaded on first use)"""
+        if self._doc_ids is None:
+            with open(os.path.join(self.path, 'doc_ids.json')) as f:
+                self._doc_ids = json.load(f)
+        return self._doc_ids
+
+    def __len__(self) -> int:
+        return self.manifest['docs']
+
+    def top_k(self, query_text: str, k: int):
+        """Rows and BM25 scores of the k best keyword matches, best first"""
+        term_ids = [self.vocab[term] for term in set(tokenize(query_text)) if term in self.vocab]
+        if not term_ids or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        if len(term_ids) == 1:
+            start, end = self.offsets[term_ids[0]], self.offsets[term_ids[0] + 1]
+            rows, scores = np.asarray(self.rows[start:end]), np.asarray(self.weights[start:end])
+        else:
+            spans = [(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+            all_rows = np.concatenate([self.rows[start:end] for start, end in spans])
+            all_weights = np.concatenate([self.weights[start:end] for start, end in spans])
+            if len(all_rows) * 8 > len(self):
+                # Common terms: a dense accumulator is cheaper than sorting the postings
+                dense = np.bincount(all_rows, weights=all_weights, minlength=len(self))
+                rows = np.flatnonzero(dense)
+                scores = dense[rows].astype(np.float32)
+            else:
+                rows, inverse = np.unique(all_rows, return_inverse=True)
+                scores = np.bincount(inverse, weights=all_weights).astype(np.float32)
+
+        k = min(k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        order = candidates[np.argsort(-scores[candidates])]
+        return rows[order].astype(np.int64), scores[order]
+
+    def search(self, query_text: str, k: int = 10) -> List[Dict]:
+        """Best keyword matches as {'id', 'row', 'score'} dicts"""
+        rows, scores = self.top_k(query_text, k)
+        return [{'id': self.doc_ids[row], 'row': int(row), 'score': float(score)}
+                for row, score in zip(rows, scores)]
+
+
+class HybridRetriever:
+    def __init__(self, dense, lexical: BM25Index, candidates: int = 20, rrf_k: int = 60):
+        """Fuse a local vector index with a BM25 index built over the same rows"""
+        self.dense = dense
+        self.lexical = lexical
+        self.path = dense.path
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.vectors = np.load(os.path.join(dense.snapshot_path, 'embeddings.npy'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.dense)
+
+    def search(self, query_embedding, n_results: int = 3, query_text: Optional[str] = None) -> List[Dict]:
+        """Reciprocal rank fusion of dense and keyword rankings"""
+        if not query_text:
+            return self.dense.search(query_embedding, n_results)
+
+        depth = max(self.candidates, n_results)
+        dense_rows, _ = self.dense.top_k(query_embedding, depth)
+        lexical_rows, _ = self.lexical.top_k(query_text, depth)
+
+        fused = {}
+        for ranking in (dense_rows, lexical_rows):
+            for rank, row in enumerate(ranking.tolist()):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        rows = sorted(fused, key=fused.get, reverse=True)[:n_results]
+
+        # Report cosine similarity so scores stay comparable with dense-only retrieval
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = np.asarray(self.vectors[rows]) @ query if rows else []
+
+        context_chunks = self.dense.chunks_for(rows, scores)
+        for chunk, row in zip(context_chunks, rows):
+            chunk['rrf_score'] = fused[row]
+        return context_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a BM25 keyword index")
+    parser.add_argument('path', help="Index directory (e.g. local_index/bm25)")
+    parser.add_argument('query')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        index = BM25Index(args.path)
+        start_time = time.perf_counter()
+        results = index.search(args.query, args.k)
+        elapsed = (time.perf_counter() - start_time) * 1e6
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print(f"🔎 {len(results)} matches in {elapsed:.0f} µs over {len(index)} documents")
+    for result in results:
+        print(f"  {result['score']:.3f}  {result['id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,40 @@ import os
 import sys
 import re
 import time
+import argparse
 import chromadb
 import PyPDF2
-from typing import List, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
 from sentence_transformers import SentenceTransformer
 
+from ingest_pipeline import batched, run_pipeline
+from ingest_manifest import IngestManifest, content_chunk_id
+from embedding_encoder import BucketedEncoder
+from local_vector_index import iter_collection_pages
+
+
+# Ids written before chunks were keyed by content hash
+LEGACY_CHUNK_ID = re.compile(r'^physics_(chunk|page)_\d+$')
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """Extract pages [start, end) in a worker process; each worker opens the PDF itself"""
+    page_texts = []
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for index in range(start, end):
+            try:
+                page_texts.append((index + 1, pdf_reader.pages[index].extract_text(), None))
+            except Exception as e:
+                page_texts.append((index + 1, None, str(e)))
+    return page_texts
+
+
 class PhysicsPDFProcessor:
-    def __init__(self, db_path=".", collection_name="physics_textbook"):
+    def __init__(self, db_path=".", collection_name="physics_textbook",
+                 encode_batch_size=128, encode_processes=0):
         """Initialize the PDF processor"""
         self.db_path = db_path
         self.collection_name = collection_name
@@ -34,52 +61,108 @@ class PhysicsPDFProcessor:
                 metadata={"description": "College Physics textbook content"}
             )
         
+        # Which content hashes are already stored (see ingest_manifest.py)
+        self.manifest = IngestManifest(os.path.join(db_path, f"{collection_name}_ingest.sqlite3"))
+        
         # Initialize embedding model
         print("🧠 Loading embedding model...")
         self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Length-bucketed encoding, optionally over a CPU process pool (see embedding_encoder.py)
+        self.encoder = BucketedEncoder(self.embedding_model, batch_size=encode_batch_size,
+                                       processes=encode_processes)
         print("✅ Setup complete!")
     
-    def extract_text_from_pdf(self, pdf_path: str) -> List[Dict]:
-        """Extract text from PDF with page information"""
+    def extract_text_from_pdf(self, pdf_path: str, workers: int = 1) -> List[Dict]:
+        """Extract text from PDF with page information (workers > 1 splits pages across processes)"""
         print(f"📖 Extracting text from: {pdf_path}")
         
-        chunks = []
+        start_time = time.time()
+        pages_seen = []
+        
+        def counted(page_texts):
+            for page in page_texts:
+                pages_seen.append(page[0])
+                yield page
         
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                print(f"📄 Processing {total_pages} pages...")
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    if page_num % 50 == 0:
-                        print(f"  📃 Processed {page_num}/{total_pages} pages...")
-                    
-                    try:
-                        text = page.extract_text()
-                        
-                        if text.strip():
-                            # Clean the text
-                            cleaned_text = self.clean_text(text)
-                            
-                            if len(cleaned_text.split()) > 10:  # Only keep substantial content
-                                chunks.append({
-                                    'text': cleaned_text,
-                                    'page': page_num,
-                                    'source': 'College_Physics_2e',
-                                    'chunk_id': f"physics_page_{page_num}"
-                                })
-                    
-                    except Exception as e:
-                        print(f"⚠️  Error processing page {page_num}: {e}")
-                        continue
-                
-                print(f"✅ Extracted {len(chunks)} text chunks from {total_pages} pages")
-                return chunks
-                
+            chunks = list(self.iter_page_chunks(counted(self.iter_page_texts(pdf_path, workers))))
         except Exception as e:
             print(f"❌ Error reading PDF: {e}")
             return []
+        
+        duration = time.time() - start_time
+        total_pages = len(pages_seen)
+        print(f"✅ Extracted {len(chunks)} text chunks from {total_pages} pages "
+              f"in {duration:.1f}s ({total_pages / duration if duration else 0:.1f} pages/sec)")
+        return chunks
+    
+    def iter_page_texts(self, pdf_path: str, workers: int = 1) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+        """(page_num, text, error) for every page in page order"""
+        if workers > 1:
+            return self._iter_pages_parallel(pdf_path, workers)
+        return self._iter_pages_serial(pdf_path)
+    
+    def _iter_pages_serial(self, pdf_path: str) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+        """Extract pages one at a time in this process"""
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            total_pages = len(pdf_reader.pages)
+            print(f"📄 Processing {total_pages} pages...")
+            
+            for page_num, page in enumerate(pdf_reader.pages, 1):
+                if page_num % 50 == 0:
+                    print(f"  📃 Processed {page_num}/{total_pages} pages...")
+                
+                try:
+                    text = page.extract_text()
+                except Exception as e:
+                    yield page_num, None, str(e)
+                    continue
+                yield page_num, text, None
+    
+    def _iter_pages_parallel(self, pdf_path: str, workers: int) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+        """Extract page ranges on a process pool, yielding them back in page order"""
+        with open(pdf_path, 'rb') as file:
+            total_pages = len(PyPDF2.PdfReader(file).pages)
+        
+        # Several ranges per worker so a slow (image-heavy) range doesn't leave cores idle
+        range_size = max(1, -(-total_pages // (workers * 4)))
+        ranges = [(start, min(start + range_size, total_pages)) for start in range(0, total_pages, range_size)]
+        print(f"📄 Processing {total_pages} pages in {len(ranges)} ranges across {workers} processes...")
+        
+        # Only a window of ranges is in flight, so finished pages never pile up in memory
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            next_range = 0
+            processed = 0
+            while pending or next_range < len(ranges):
+                while next_range < len(ranges) and len(pending) < 2 * workers:
+                    pending.append(pool.submit(extract_page_range, pdf_path, *ranges[next_range]))
+                    next_range += 1
+                
+                page_texts = pending.popleft().result()
+                processed += len(page_texts)
+                print(f"  📃 Processed {processed}/{total_pages} pages...")
+                yield from page_texts
+    
+    def iter_page_chunks(self, page_texts: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> Iterator[Dict]:
+        """Cleaned page chunks, skipping unreadable and near-empty pages"""
+        for page_num, text, error in page_texts:
+            if error:
+                print(f"⚠️  Error processing page {page_num}: {error}")
+                continue
+            
+            if text and text.strip():
+                # Clean the text
+                cleaned_text = self.clean_text(text)
+                
+                if len(cleaned_text.split()) > 10:  # Only keep substantial content
+                    yield {
+                        'text': cleaned_text,
+                        'page': page_num,
+                        'source': 'College_Physics_2e',
+                        'chunk_id': f"physics_page_{page_num}"
+                    }
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
@@ -102,9 +185,13 @@ class PhysicsPDFProcessor:
         """Create semantic chunks of appropriate size"""
         print(f"🔪 Creating semantic chunks (target size: {chunk_size} words)...")
         
-        semantic_chunks = []
-        chunk_id = 1
+        semantic_chunks = list(self.iter_semantic_chunks(chunks, chunk_size))
         
+        print(f"✅ Created {len(semantic_chunks)} semantic chunks")
+        return semantic_chunks
+    
+    def iter_semantic_chunks(self, chunks: Iterable[Dict], chunk_size: int = 500) -> Iterator[Dict]:
+        """Split page chunks into semantic chunks as pages arrive (ids are content hashes)"""
         for page_chunk in chunks:
             text = page_chunk['text']
             words = text.split()
@@ -126,14 +213,13 @@ class PhysicsPDFProcessor:
                     
                     # If adding this sentence would exceed chunk size, save current chunk
                     if current_words + sentence_words > chunk_size and current_chunk:
-                        semantic_chunks.append({
+                        yield {
                             'text': current_chunk.strip(),
                             'page': page_chunk['page'],
                             'source': page_chunk['source'],
-                            'chunk_id': f"physics_chunk_{chunk_id}",
+                            'chunk_id': content_chunk_id(current_chunk),
                             'words': current_words
-                        })
-                        chunk_id += 1
+                        }
                         current_chunk = sentence + ". "
                         current_words = sentence_words
                     else:
@@ -142,30 +228,60 @@ class PhysicsPDFProcessor:
                 
                 # Add the remaining chunk
                 if current_chunk.strip():
-                    semantic_chunks.append({
+                    yield {
                         'text': current_chunk.strip(),
                         'page': page_chunk['page'],
                         'source': page_chunk['source'],
-                        'chunk_id': f"physics_chunk_{chunk_id}",
+                        'chunk_id': content_chunk_id(current_chunk),
                         'words': current_words
-                    })
-                    chunk_id += 1
+                    }
             else:
                 # Keep smaller chunks as-is
-                semantic_chunks.append({
+                yield {
                     'text': text,
                     'page': page_chunk['page'],
                     'source': page_chunk['source'],
-                    'chunk_id': f"physics_chunk_{chunk_id}",
+                    'chunk_id': content_chunk_id(text),
                     'words': len(words)
-                })
-                chunk_id += 1
+                }
+    
+    def _batch_records(self, batch: List[Dict]):
+        """ids, documents and metadatas for a batch of chunks"""
+        ids = [chunk['chunk_id'] for chunk in batch]
+        texts = [chunk['text'] for chunk in batch]
+        metadatas = [{
+            'page': chunk['page'],
+            'source': chunk['source'],
+            'words': chunk['words'],
+            'type': 'physics_textbook'
+        } for chunk in batch]
+        return ids, texts, metadatas
+    
+    def remove_legacy_chunks(self, document_ids: Set[str], page_size: int = 1000) -> int:
+        """Delete chunks stored under positional ids (physics_chunk_N) before content-hash ids
         
-        print(f"✅ Created {len(semantic_chunks)} semantic chunks")
-        return semantic_chunks
+        Only legacy chunks whose text this document now stores under its content
+        id are removed, so other books' legacy chunks in the collection are kept
+        """
+        legacy_ids = []
+        kept = 0
+        for page in iter_collection_pages(self.collection, page_size, include=('documents',)):
+            for chunk_id, text in zip(page['ids'], page['documents']):
+                if not LEGACY_CHUNK_ID.match(chunk_id):
+                    continue
+                if content_chunk_id(text or '') in document_ids:
+                    legacy_ids.append(chunk_id)
+                else:
+                    kept += 1
+        
+        for start in range(0, len(legacy_ids), page_size):
+            self.collection.delete(ids=legacy_ids[start:start + page_size])
+        print(f"🧹 Removed {len(legacy_ids)} legacy positional-id chunks duplicated by this document "
+              f"({kept} other legacy chunks kept)")
+        return len(legacy_ids)
     
-    def add_to_database(self, chunks: List[Dict], batch_size: int = 100):
-        """Add chunks to ChromaDB"""
+    def add_to_database(self, chunks: List[Dict], batch_size: int = 100, document: str = "manual"):
+        """Add chunks to ChromaDB, recording stored and failed batches in the manifest"""
         print(f"💾 Adding {len(chunks)} chunks to database...")
         
         total_chunks = len(chunks)
@@ -176,56 +292,202 @@ class PhysicsPDFProcessor:
             batch = chunks[i:i + batch_size]
             
             # Prepare batch data
-            ids = [chunk['chunk_id'] for chunk in batch]
-            texts = [chunk['text'] for chunk in batch]
-            metadatas = [{
-                'page': chunk['page'],
-                'source': chunk['source'],
-                'words': chunk['words'],
-                'type': 'physics_textbook'
-            } for chunk in batch]
+            ids, texts, metadatas = self._batch_records(batch)
             
             try:
                 # Generate embeddings
                 print(f"  🧠 Generating embeddings for batch {i//batch_size + 1}/{(total_chunks-1)//batch_size + 1}...")
-                embeddings = self.embedding_model.encode(texts).tolist()
+                embeddings = self.encoder.encode(texts).tolist()
                 
-                # Add to database
-                self.collection.add(
+                # Upsert so one id that is already stored does not fail the whole batch
+                self.collection.upsert(
                     ids=ids,
                     documents=texts,
                     metadatas=metadatas,
                     embeddings=embeddings
                 )
                 
+                self.manifest.record(document, ids, [chunk['page'] for chunk in batch])
+                
                 processed += len(batch)
                 print(f"  ✅ Processed {processed}/{total_chunks} chunks")
                 
             except Exception as e:
                 print(f"  ❌ Error processing batch {i//batch_size + 1}: {e}")
+                self.manifest.record_failure(document, ids, str(e))
                 continue
         
         print(f"🎉 Successfully added {processed} chunks to the database!")
         print(f"📊 Total documents in collection: {self.collection.count()}")
     
-    def process_pdf(self, pdf_path: str):
+    def ingest_pdf(self, pdf_path: str, workers: int = 1, batch_size: int = 100, chunk_size: int = 500,
+                   resume: bool = False, prune: bool = False, remove_legacy_ids: bool = False) -> int:
+        """Streaming ingest: extraction, chunking, embedding and writes run concurrently
+        
+        Stages are connected by bounded queues, so memory stays flat regardless of
+        book size; per-stage throughput is reported at the end. With resume, chunks
+        whose content hash is already in the manifest are not embedded again; prune
+        then deletes this document's chunks that no longer appear in the PDF, and
+        remove_legacy_ids deletes its copies stored under pre-content-hash ids
+        """
+        document = os.path.basename(pdf_path)
+        print(f"🌊 Streaming {pdf_path} through extract → chunk → embed → write...")
+        
+        already_ingested = self.manifest.ingested_ids() if resume else set()
+        document_ids = self.manifest.ingested_ids(document) if resume else set()
+        adopted = []
+        previous_failures = self.manifest.failed_batches(document)
+        if previous_failures:
+            print(f"🔁 Retrying {sum(len(batch['chunk_ids']) for batch in previous_failures)} chunks "
+                  f"from {len(previous_failures)} previously failed batches")
+        # A failure is only forgotten once every one of its chunks is stored again
+        unresolved = {batch['id']: set(batch['chunk_ids']) for batch in previous_failures}
+        
+        def resolve_failures(stored_ids):
+            resolved = []
+            for failure_id, chunk_ids in unresolved.items():
+                chunk_ids.difference_update(stored_ids)
+                if not chunk_ids:
+                    resolved.append(failure_id)
+            for failure_id in resolved:
+                del unresolved[failure_id]
+            if resolved:
+                self.manifest.clear_failures(resolved)
+        
+        seen = set()
+        failed_pages = []
+        counts = {'skipped': 0, 'written': 0, 'failed': 0}
+        
+        def extract(page_texts):
+            def tracked(page_texts):
+                for page_num, text, error in page_texts:
+                    if error:
+                        failed_pages.append(page_num)
+                    yield page_num, text, error
+            return self.iter_page_chunks(tracked(page_texts))
+        
+        def chunk(pages):
+            return self.iter_semantic_chunks(pages, chunk_size)
+        
+        def select(chunks):
+            # Identical text (e.g. repeated boxes) is stored once; known hashes are skipped on resume
+            for semantic_chunk in chunks:
+                chunk_id = semantic_chunk['chunk_id']
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                if chunk_id in already_ingested:
+                    # Stored for another document: this one still has to reference it
+                    if chunk_id not in document_ids:
+                        adopted.append((chunk_id, semantic_chunk['page']))
+                    counts['skipped'] += 1
+                    continue
+                yield semantic_chunk
+        
+        def embed(chunks):
+            # Encode a window of several batches at once so length bucketing has
+            # material to sort, then hand write batches on in arrival order
+            window_size = max(batch_size, 8 * self.encoder.batch_size)
+            for window in batched(chunks, window_size):
+                try:
+                    window_embeddings = self.encoder.encode([chunk['text'] for chunk in window]).tolist()
+                except Exception as e:
+                    print(f"  ❌ Error embedding {len(window)} chunks starting at {window[0]['chunk_id']}: {e}")
+                    for start in range(0, len(window), batch_size):
+                        ids = [chunk['chunk_id'] for chunk in window[start:start + batch_size]]
+                        self.manifest.record_failure(document, ids, str(e))
+                        counts['failed'] += len(ids)
+                    continue
+                for start in range(0, len(window), batch_size):
+                    ids, texts, metadatas = self._batch_records(window[start:start + batch_size])
+                    yield ids, texts, metadatas, window_embeddings[start:start + batch_size]
+        
+        def write(batches):
+            for ids, texts, metadatas, embeddings in batches:
+                try:
+                    self.collection.upsert(
+                        ids=ids,
+                        documents=texts,
+                        metadatas=metadatas,
+                        embeddings=embeddings
+                    )
+                except Exception as e:
+                    print(f"  ❌ Error writing batch starting at {ids[0]}: {e}")
+                    self.manifest.record_failure(document, ids, str(e))
+                    counts['failed'] += len(ids)
+                    continue
+                
+                self.manifest.record(document, ids, [metadata['page'] for metadata in metadatas])
+                resolve_failures(ids)
+                counts['written'] += len(ids)
+                yield len(ids)
+        
+        # The extract stage pulls pages (parsed in this thread or on the process pool)
+        stats = run_pipeline(self.iter_page_texts(pdf_path, workers), [
+            ('extract', extract, 32),                 # buffered pages
+            ('chunk', chunk, 4 * batch_size),         # buffered chunks
+            ('select', select, 4 * batch_size),       # buffered new chunks
+            ('embed', embed, 16),                     # buffered embedded batches
+            ('write', write, 0)
+        ])
+        
+        if adopted:
+            self.manifest.record(document, [chunk_id for chunk_id, _ in adopted], [page for _, page in adopted])
+        if unresolved:
+            # Chunks stored for this document, or no longer in a fully read PDF, need no retry
+            stored_ids = self.manifest.ingested_ids(document)
+            if not failed_pages:
+                stored_ids |= set().union(*unresolved.values()) - seen
+            resolve_failures(stored_ids)
+        
+        if failed_pages:
+            print(f"⚠️  {len(failed_pages)} pages could not be read; their chunks are kept"
+                  f"{' and prune is skipped' if prune else ''}")
+        elif prune:
+            # Only safe when every chunk of the PDF was seen in this run
+            stale = self.manifest.ingested_ids(document) - seen
+            if stale:
+                # Text another document still contains stays in the collection
+                unreferenced = self.manifest.remove(document, stale)
+                print(f"🧹 Removing {len(unreferenced)} chunks no longer in {document} "
+                      f"({len(stale) - len(unreferenced)} kept for other documents)")
+                if unreferenced:
+                    self.collection.delete(ids=sorted(unreferenced))
+        
+        if remove_legacy_ids:
+            if counts['failed']:
+                print("⚠️  Keeping legacy positional-id chunks until every batch has been stored")
+            else:
+                self.remove_legacy_chunks(self.manifest.ingested_ids(document))
+        
+        print("📈 Stage throughput:")
+        for stage in stats:
+            print(f"  {stage.summary()}")
+        print(f"🎉 Added {counts['written']} chunks ({counts['skipped']} unchanged skipped, "
+              f"{counts['failed']} failed and recorded for retry)")
+        return counts['written'] + counts['skipped']
+    
+    def process_pdf(self, pdf_path: str, workers: int = 1, resume: bool = False, prune: bool = False,
+                    remove_legacy_ids: bool = False):
         """Main method to process the entire PDF"""
         start_time = time.time()
         
         print(f"🚀 Starting PDF processing: {pdf_path}")
         print("=" * 60)
         
-        # Step 1: Extract text from PDF
-        raw_chunks = self.extract_text_from_pdf(pdf_path)
-        if not raw_chunks:
-            print("❌ No text extracted from PDF. Exiting.")
+        # Extract, chunk, embed and store as one streaming pipeline
+        try:
+            added = self.ingest_pdf(pdf_path, workers, resume=resume, prune=prune,
+                                    remove_legacy_ids=remove_legacy_ids)
+        except Exception as e:
+            print(f"❌ Error processing PDF: {e}")
             return
+        finally:
+            self.encoder.close()
         
-        # Step 2: Create semantic chunks
-        semantic_chunks = self.create_semantic_chunks(raw_chunks)
-        
-        # Step 3: Add to database
-        self.add_to_database(semantic_chunks)
+        if not added:
+            print("❌ No text extracted from PDF. Exiting.")
+            return
         
         # Summary
         end_time = time.time()
@@ -239,12 +501,27 @@ class PhysicsPDFProcessor:
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 convert_physics_pdf.py <path_to_pdf>")
-        print("Example: python3 convert_physics_pdf.py /Users/mihirdhankani/Downloads/College_Physics_2e-WEB_7Zesafu.pdf")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Convert a physics textbook PDF into ChromaDB embeddings",
+        epilog="Example: python3 convert_physics_pdf.py /Users/mihirdhankani/Downloads/College_Physics_2e-WEB_7Zesafu.pdf --workers 8"
+    )
+    parser.add_argument('pdf_path', help="Path to the PDF")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes used for page extraction (default: 1, serial)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Only embed chunks whose content hash is not in the ingest manifest")
+    parser.add_argument('--prune', action='store_true',
+                        help="Delete chunks of this PDF that no longer exist (e.g. after a new edition)")
+    parser.add_argument('--remove-legacy-ids', action='store_true',
+                        help="After a complete run, delete this PDF's chunks stored under pre-content-hash ids "
+                             "(physics_chunk_N); needed once per collection built by older versions")
+    parser.add_argument('--encode-batch-size', type=int, default=128,
+                        help="Chunks per embedding batch (chunks are bucketed by length first)")
+    parser.add_argument('--encode-processes', type=int, default=0,
+                        help="CPU processes for embedding (default: 0, encode in this process)")
+    args = parser.parse_args()
     
-    pdf_path = sys.argv[1]
+    pdf_path = args.pdf_path
     
     # Check if PDF exists
     if not os.path.exists(pdf_path):
@@ -252,8 +529,10 @@ def main():
         sys.exit(1)
     
     # Create processor and process PDF
-    processor = PhysicsPDFProcessor()
-    processor.process_pdf(pdf_path)
+    processor = PhysicsPDFProcessor(encode_batch_size=args.encode_batch_size,
+                                    encode_processes=args.encode_processes)
+    processor.process_pdf(pdf_path, workers=args.workers, resume=args.resume, prune=args.prune,
+                          remove_legacy_ids=args.remove_legacy_ids)
 
 
 if __name__ == "__main__":
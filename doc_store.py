@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Doc Store - chunk text and metadata on local disk, keyed by vector id
+Pinecone then only has to return ids and scores (include_metadata=False);
+matches are joined to their text with one memory-mapped read each
+
+Stores live under a root directory, one per Pinecone index and namespace
+(<root>/<index>/<namespace or _default>), so migrating another collection
+never overwrites the text of the first
+
+Store layout (one directory):
+  manifest.json       count, compression, source collection
+  docs.blob           concatenated {"id", "text", "metadata"} JSON records
+  keys.npy            uint64 [count], sorted 64-bit hashes of the ids
+  offsets.npy         int64 [count, 2], (start, end) of each record in docs.blob
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import hashlib
+import argparse
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from local_vector_index import iter_collection_pages
+
+
+def id_key(id_: str) -> int:
+    """64-bit key for an id (collisions are resolved by the id stored in each record)"""
+    return int.from_bytes(hashlib.blake2b(id_.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def store_path(root: str, index_name: str, namespace: str = "") -> str:
+    """Directory of the store for one index/namespace under a doc store root"""
+    return os.path.join(root, index_name, namespace or '_default')
+
+
+class DocStoreWriter:
+    def __init__(self, path: str, compress: bool = False):
+        """Start a new store at path (an existing store there is replaced on close)"""
+        self.path = path
+        self.compress = compress
+        os.makedirs(path, exist_ok=True)
+        self._blob = open(os.path.join(path, 'docs.blob.tmp'), 'wb')
+        self._keys = []
+        self._offsets = []
+        self._position = 0
+
+    def add(self, id_: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        record = json.dumps({'id': id_, 'text': text, 'metadata': metadata or {}},
+                            ensure_ascii=False).encode('utf-8')
+        if self.compress:
+            record = zlib.compress(record, 6)
+        self._blob.write(record)
+        self._keys.append(id_key(id_))
+        self._offsets.append((self._position, self._position + len(record)))
+        self._position += len(record)
+
+    def close(self, **manifest_fields) -> Dict[str, Any]:
+        """Write the sorted key index and manifest, then swap the new blob into place"""
+        self._blob.close()
+        keys = np.asarray(self._keys, dtype=np.uint64)
+        order = np.argsort(keys, kind='stable')
+        np.save(os.path.join(self.path, 'keys.npy'), keys[order])
+        np.save(os.path.join(self.path, 'offsets.npy'),
+                np.asarray(self._offsets, dtype=np.int64).reshape(-1, 2)[order])
+        os.replace(os.path.join(self.path, 'docs.blob.tmp'), os.path.join(self.path, 'docs.blob'))
+
+        manifest = {
+            'count': len(keys),
+            'compression': 'zlib' if self.compress else None,
+            'bytes': self._position,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            **manifest_fields
+        }
+        with open(os.path.join(self.path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+class DocStore:
+    def __init__(self, path: str):
+        """Memory-map a store written by DocStoreWriter"""
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+        self.keys = np.load(os.path.join(path, 'keys.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode='r')
+        self.compressed = self.manifest.get('compression') == 'zlib'
+        self._file = open(os.path.join(path, 'docs.blob'), 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.manifest['bytes'] else b''
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, id_: str) -> Optional[Dict[str, Any]]:
+        """The {"id", "text", "metadata"} record for a vector id, or None"""
+        key = np.uint64(id_key(id_))
+        position = int(np.searchsorted(self.keys, key))
+        while position < len(self.keys) and self.keys[position] == key:
+            start, end = self.offsets[position]
+            record = self._mmap[int(start):int(end)]
+            if self.compressed:
+                record = zlib.decompress(record)
+            record = json.loads(record)
+            if record['id'] == id_:
+                return record
+            position += 1
+        return None
+
+    def get_many(self, ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        return [self.get(id_) for id_ in ids]
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+
+def open_doc_stores(root: str, index_name: str, namespaces: Iterable[str]) -> Dict[str, DocStore]:
+    """The stores that exist under root for these namespaces of an index"""
+    stores = {}
+    for namespace in namespaces:
+        path = store_path(root, index_name, namespace)
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            stores[namespace] = DocStore(path)
+    return stores
+
+
+def match_metadata(match) -> Dict[str, Any]:
+    """A Pinecone match's metadata ({} when the query did not include it)"""
+    try:
+        return dict(match['metadata'] or {})
+    except (KeyError, TypeError):
+        return {}
+
+
+def join_matches(matches, store: Optional[DocStore],
+                 fetch_metadata: Callable[[List[str]], Dict[str, Dict[str, Any]]]) -> List[Tuple[Any, Dict[str, Any]]]:
+    """Pair each match with its {"text", "metadata"} record
+
+    Text comes from the match's own metadata, then the doc store; ids found in
+    neither are fetched from the index with fetch_metadata(ids) -> {id: metadata}
+    """
+    records = {}
+    missing = []
+    for match in matches:
+        metadata = match_metadata(match)
+        record = {'text': metadata['text'], 'metadata': metadata} if 'text' in metadata else None
+        if record is None and store is not None:
+            record = store.get(match['id'])
+        if record is None:
+            missing.append(match['id'])
+        else:
+            records[match['id']] = record
+
+    if missing:
+        for id_, metadata in fetch_metadata(missing).items():
+            if 'text' in metadata:
+                records[id_] = {'text': metadata['text'], 'metadata': metadata}
+        for id_ in missing:
+            if id_ not in records:
+                print(f"⚠️  No text found for {id_} in the doc store or the index")
+
+    return [(match, records[match['id']]) for match in matches if match['id'] in records]
+
+
+def export_doc_store(collection, out_dir: str, compress: bool = False,
+                     page_size: int = 1000, **manifest_fields) -> Dict[str, Any]:
+    """Write every document of a ChromaDB collection to a doc store (embeddings are not read)"""
+    writer = DocStoreWriter(out_dir, compress)
+    for page in iter_collection_pages(collection, page_size, include=('documents', 'metadatas')):
+        for id_, document, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+            writer.add(id_, document or '', metadata)
+
+    manifest = writer.close(collection=collection.name, **manifest_fields)
+    print(f"📚 Doc store written to {out_dir}: {manifest['count']} records, "
+          f"{manifest['bytes'] / 1e6:.1f} MB{' (zlib)' if compress else ''}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local chunk text store keyed by vector id")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Write a store from a ChromaDB collection")
+    export_parser.add_argument('--chroma-path', default="/Users/mihirdhankani/biologyVectorDatabase")
+    export_parser.add_argument('--collection', default="biology_textbook")
+    export_parser.add_argument('--out', default="doc_store", help="Doc store root")
+    export_parser.add_argument('--index', default="biology-vectors", help="Pinecone index the ids live in")
+    export_parser.add_argument('--namespace', default="")
+    export_parser.add_argument('--compress', action='store_true', help="zlib-compress each record")
+
+    get_parser = subparsers.add_parser('get', help="Print the records for some ids")
+    get_parser.add_argument('path')
+    get_parser.add_argument('ids', nargs='+')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            import chromadb
+            client = chromadb.PersistentClient(path=args.chroma_path)
+            export_doc_store(client.get_collection(args.collection),
+                             store_path(args.out, args.index, args.namespace), args.compress,
+                             index=args.index, namespace=args.namespace)
+        elif args.command == 'get':
+            store = DocStore(args.path)
+            for id_, record in zip(args.ids, store.get_many(args.ids)):
+                print(json.dumps(record, ensure_ascii=False) if record else f"❌ {id_} not found")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Query Embedding Cache - bounded in-memory LRU with an optional SQLite tier
+Hot topics ("photosynthesis", "DNA", "mitosis") are encoded once, not per request
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    def __init__(self, max_size: int = 1024, persist_path: Optional[str] = None,
+                 namespace: str = "all-MiniLM-L6-v2"):
+        """Create the cache; persist_path enables the on-disk tier"""
+        self.max_size = max_size
+        self.namespace = namespace
+        self.persist_path = persist_path
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " namespace TEXT NOT NULL,"
+                " query TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (namespace, query))"
+            )
+            self._db.commit()
+            self._load_recent()
+
+    @classmethod
+    def from_env(cls, namespace: str = "all-MiniLM-L6-v2") -> "EmbeddingCache":
+        """Build a cache configured by EMBEDDING_CACHE_SIZE / EMBEDDING_CACHE_PATH"""
+        return cls(
+            max_size=int(os.getenv('EMBEDDING_CACHE_SIZE', '1024')),
+            persist_path=os.getenv('EMBEDDING_CACHE_PATH') or None,
+            namespace=namespace
+        )
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Cache key for a query: case- and whitespace-insensitive"""
+        return ' '.join(query.lower().split())
+
+    def _load_recent(self):
+        """Warm the memory tier with the most recently stored vectors"""
+        rows = self._db.execute(
+            "SELECT query, vector FROM query_embeddings WHERE namespace = ? ORDER BY rowid DESC LIMIT ?",
+            (self.namespace, self.max_size)
+        ).fetchall()
+        for query, blob in reversed(rows):
+            self._entries[query] = np.frombuffer(blob, dtype=np.float32)
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a query, or None"""
+        key = self.normalize(query)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM query_embeddings WHERE namespace = ? AND query = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._store(key, vector)
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector) -> np.ndarray:
+        """Store a vector (as float32) for a query and return it"""
+        key = self.normalize(query)
+        vector = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            self._store(key, vector)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (namespace, query, vector) VALUES (?, ?, ?)",
+                    (self.namespace, key, vector.tobytes())
+                )
+                self._db.commit()
+
+        return vector
+
+    def _store(self, key: str, vector: np.ndarray):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, query: str, encode: Callable[[str], Any]) -> np.ndarray:
+        """Return the cached vector, encoding (outside the lock) on a miss"""
+        vector = self.get(query)
+        if vector is None:
+            vector = self.put(query, encode(self.normalize(query)))
+        return vector
+
+    def get_or_compute_many(self, queries: List[str], encode_many: Callable[[List[str]], Any]) -> List[np.ndarray]:
+        """Vectors for many queries; all misses are encoded in a single batch call"""
+        vectors = [self.get(query) for query in queries]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            encoded = encode_many([self.normalize(queries[i]) for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = self.put(queries[i], vector)
+
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for health checks"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'persistent': self._db is not None
+        }
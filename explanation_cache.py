@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Word Explanation Cache - persistent SQLite cache for tooltip explanations
+Keyed by (word.lower(), context) with a TTL and least-recently-used eviction;
+WAL mode lets every spawned word_explanation.py process share one file
+"""
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'word_explanation_cache.sqlite3')
+
+
+class ExplanationCache:
+    def __init__(self, path: str = DEFAULT_PATH, ttl_seconds: float = 30 * 86400,
+                 max_entries: int = 50000):
+        """Open (or create) the cache database"""
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS explanations ("
+            " word TEXT NOT NULL,"
+            " context TEXT NOT NULL,"
+            " explanation TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_hit REAL NOT NULL,"
+            " PRIMARY KEY (word, context))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS explanations_last_hit ON explanations (last_hit)")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["ExplanationCache"]:
+        """Build a cache from WORD_CACHE_* variables (None when disabled)"""
+        if os.getenv('WORD_CACHE_ENABLED', '1').lower() in ('0', 'false', 'no'):
+            return None
+        return cls(
+            path=os.getenv('WORD_CACHE_PATH') or DEFAULT_PATH,
+            ttl_seconds=float(os.getenv('WORD_CACHE_TTL', str(30 * 86400))),
+            max_entries=int(os.getenv('WORD_CACHE_SIZE', '50000'))
+        )
+
+    @staticmethod
+    def key(word: str, context: str):
+        return word.strip().lower(), context.strip()
+
+    def get(self, word: str, context: str) -> Optional[str]:
+        """Cached explanation if present and fresh, else None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT explanation, created_at FROM explanations WHERE word = ? AND context = ?",
+                self.key(word, context)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE explanations SET last_hit = ? WHERE word = ? AND context = ?",
+                (now,) + self.key(word, context)
+            )
+            self._db.commit()
+            self.hits += 1
+        return row[0]
+
+    def put(self, word: str, context: str, explanation: str):
+        """Cache an explanation, then drop expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO explanations (word, context, explanation, created_at, last_hit)"
+                " VALUES (?, ?, ?, ?, ?)",
+                self.key(word, context) + (explanation, now, now)
+            )
+            self._db.execute("DELETE FROM explanations WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._db.execute(
+                "DELETE FROM explanations WHERE rowid IN ("
+                " SELECT rowid FROM explanations ORDER BY last_hit DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for health checks"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'path': self.path
+        }
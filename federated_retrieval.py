@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Federated Retrieval - search several collections (or Pinecone namespaces) at once
+Shards are queried in parallel, so latency is the slowest shard rather than the
+sum; every shard is embedded with the same model, so hits are merged on their
+raw cosine scores and an off-topic shard's best hit cannot outrank real matches
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+# A shard takes (query_embedding, n_results) and returns retrieve_context chunks
+Shard = Callable[[List[float], int], List[Dict]]
+
+
+def parse_names(value: Optional[str]) -> List[str]:
+    """Comma-separated collection/namespace names from an env var"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def chroma_shard(collection) -> Shard:
+    """Shard backed by a ChromaDB collection"""
+    def search(query_embedding, n_results):
+        results = collection.query(query_embeddings=[query_embedding], n_results=n_results)
+        return [
+            {'text': doc, 'metadata': metadata, 'relevance_score': 1 - distance}
+            for doc, metadata, distance in zip(
+                results['documents'][0], results['metadatas'][0], results['distances'][0]
+            )
+        ]
+    return search
+
+
+def pinecone_shard(index, namespace: str, format_matches: Callable, include_metadata: bool = True) -> Shard:
+    """Shard backed by one namespace of a Pinecone index"""
+    def search(query_embedding, n_results):
+        results = index.query(
+            vector=query_embedding,
+            top_k=n_results,
+            include_metadata=include_metadata,
+            namespace=namespace
+        )
+        return format_matches(results['matches'], namespace)
+    return search
+
+
+class FederatedRetriever:
+    def __init__(self, shards: Dict[str, Shard], candidates: int = 10):
+        """shards maps a collection/namespace name to its search function"""
+        self.shards = shards
+        self.candidates = candidates
+        self.executor = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix='federated')
+
+    @classmethod
+    def from_chroma(cls, client, names: List[str], **kwargs) -> "FederatedRetriever":
+        """One shard per named ChromaDB collection"""
+        return cls({name: chroma_shard(client.get_collection(name)) for name in names}, **kwargs)
+
+    def depth(self, n_results: int) -> int:
+        """Candidates fetched per shard (a shard may hold the whole global top-k)"""
+        return max(self.candidates, n_results)
+
+    def merge(self, results: Dict[str, List[Dict]], n_results: int) -> List[Dict]:
+        """Tag each chunk with its source and take the global top-k by raw cosine score"""
+        merged = []
+        for name, chunks in results.items():
+            for chunk in chunks or []:
+                merged.append({
+                    **chunk,
+                    'metadata': {**(chunk.get('metadata') or {}), 'collection': name},
+                    'raw_score': chunk['relevance_score']
+                })
+
+        merged.sort(key=lambda chunk: chunk['relevance_score'], reverse=True)
+        return merged[:n_results]
+
+    def search(self, query_embedding, n_results: int = 3, query_text: Optional[str] = None) -> List[Dict]:
+        """Query every shard concurrently and return one merged top-k"""
+        depth = self.depth(n_results)
+        futures = {
+            name: self.executor.submit(shard, query_embedding, depth)
+            for name, shard in self.shards.items()
+        }
+
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                # One unavailable shard should not take down retrieval
+                print(f"⚠️  Search failed for '{name}': {e}")
+                results[name] = []
+
+        return self.merge(results, n_results)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Glossary - precomputed explanations for the textbook's key terms
+The build job ranks candidate terms from a ChromaDB collection by TF-IDF
+(boosted when they appear in chapter/section titles), explains them with
+batched, bounded-concurrency Groq calls and writes an indexed doc store;
+word_explanation.py then answers those tooltips with a local lookup
+
+Glossary layout: a doc_store.py directory keyed by the lowercased term,
+whose manifest also records the context the explanations were written for
+"""
+import os
+import re
+import sys
+import math
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bm25_index import tokenize
+from doc_store import DocStore, DocStoreWriter
+from local_vector_index import iter_collection_pages
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'glossary')
+
+# Frequent in textbook prose but never worth a tooltip
+GLOSSARY_STOPWORDS = frozenset("""
+about above after also although among another because before being below between both called
+chapter could different during each example examples figure first following found further however
+important include includes including known large later many more most much must often other over
+same section several should show shown since small some specific table than through together
+under until used uses using very well within without
+""".split())
+
+# Short or alphanumeric terms that are still key vocabulary: acronyms (DNA, ATP),
+# mixed case (pH, mRNA) and formulas (CO2, H2O); roman numerals are not
+TECHNICAL_TERM = re.compile(r"\b(?:[A-Z]{2,}[A-Za-z0-9]*|[a-z]+[A-Z][A-Za-z0-9]*|[A-Z][A-Za-z]*[0-9][A-Za-z0-9]*)\b")
+ROMAN_NUMERAL = re.compile(r"^[ivxl]+$")
+
+
+def candidate_terms(text: str) -> List[str]:
+    """Tokens of text that could be glossary terms"""
+    technical = {
+        term.lower() for term in TECHNICAL_TERM.findall(text)
+        if not ROMAN_NUMERAL.match(term.lower())
+    }
+    return [
+        token for token in tokenize(text)
+        if token not in GLOSSARY_STOPWORDS
+        and ((len(token) >= 4 and token.isalpha()) or token in technical)
+    ]
+
+
+def rank_terms(collection, max_terms: int = 2000, min_df: int = 2, max_df: float = 0.15,
+               title_boost: float = 1.0, page_size: int = 1000) -> List[Tuple[str, float]]:
+    """Candidate glossary terms with their scores, best first"""
+    df = Counter()
+    tf = Counter()
+    title_terms = set()
+    documents = 0
+
+    for page in iter_collection_pages(collection, page_size, include=('documents', 'metadatas')):
+        for document, metadata in zip(page['documents'], page['metadatas']):
+            tokens = candidate_terms(document or '')
+            tf.update(tokens)
+            df.update(set(tokens))
+            documents += 1
+
+            metadata = metadata or {}
+            for field in ('chapter', 'section'):
+                title_terms.update(tokenize(str(metadata.get(field) or '')))
+
+    ranked = []
+    for term, document_frequency in df.items():
+        in_title = term in title_terms
+        if document_frequency / max(documents, 1) > max_df:
+            continue
+        if document_frequency < min_df and not in_title:
+            continue
+        score = (1 + math.log(tf[term])) * math.log(documents / document_frequency)
+        if in_title:
+            score *= 1 + title_boost
+        ranked.append((term, score))
+
+    ranked.sort(key=lambda item: -item[1])
+    return ranked[:max_terms]
+
+
+def explain_terms(terms: List[str], context: str, batch_size: int = 8,
+                  concurrency: int = 4) -> Dict[str, str]:
+    """Explanations for terms, batched per Groq call; terms that fail are left out"""
+    from word_explanation import get_explanation_cache, request_explanation, request_explanations
+
+    groq_api_key = os.getenv('GROQ_API_KEY')
+    if not groq_api_key or groq_api_key == 'your_groq_api_key_here':
+        raise ValueError("GROQ_API_KEY is required to build a glossary")
+
+    # The word cache doubles as a checkpoint: a rerun only asks for what is missing
+    cache = get_explanation_cache()
+    explanations = {}
+    if cache:
+        for term in terms:
+            cached = cache.get(term, context)
+            if cached is not None:
+                explanations[term] = cached
+    missing = [term for term in terms if term not in explanations]
+    print(f"🧠 {len(explanations)} terms already explained, {len(missing)} to generate")
+
+    def explain_batch(batch: List[str]) -> Dict[str, str]:
+        parsed = request_explanations(batch, context, groq_api_key) or {}
+        found = {}
+        for term in batch:
+            explanation = parsed.get(term) or request_explanation(term, context, groq_api_key)
+            if explanation is None:
+                continue
+            if cache:
+                cache.put(term, context, explanation)
+            found[term] = explanation
+        return found
+
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, found in enumerate(executor.map(explain_batch, batches), 1):
+            explanations.update(found)
+            if i % 10 == 0 or i == len(batches):
+                print(f"  ✅ {i}/{len(batches)} batches, {len(explanations)} terms explained")
+
+    return explanations
+
+
+def build_glossary(chroma_path: str, collection_name: str, out_dir: str, context: str = "biology",
+                   max_terms: int = 2000, batch_size: int = 8, concurrency: int = 4,
+                   dry_run: bool = False) -> Dict:
+    """Rank a collection's terms, explain them and write the glossary"""
+    import chromadb
+
+    print(f"📖 Ranking terms in '{collection_name}'...")
+    client = chromadb.PersistentClient(path=chroma_path)
+    collection = client.get_collection(collection_name)
+    ranked = rank_terms(collection, max_terms)
+    print(f"🔤 {len(ranked)} candidate terms, e.g. {', '.join(term for term, _ in ranked[:10])}")
+    if dry_run:
+        return {'terms': len(ranked)}
+
+    start_time = time.time()
+    explanations = explain_terms([term for term, _ in ranked], context, batch_size, concurrency)
+
+    writer = DocStoreWriter(out_dir, compress=True)
+    for term, score in ranked:
+        if term in explanations:
+            writer.add(term, explanations[term], {'score': round(score, 3)})
+    manifest = writer.close(kind='glossary', context=context, collection=collection_name)
+
+    print(f"🎉 Glossary written to {out_dir}: {manifest['count']}/{len(ranked)} terms, "
+          f"{manifest['bytes'] / 1e3:.0f} KB in {time.time() - start_time:.0f}s")
+    return manifest
+
+
+class Glossary:
+    def __init__(self, path: str = DEFAULT_PATH):
+        """Open a glossary written by build_glossary"""
+        self.path = path
+        self.store = DocStore(path)
+        self.context = self.store.manifest.get('context', 'general')
+
+    @classmethod
+    def from_env(cls) -> Optional["Glossary"]:
+        """The glossary at WORD_GLOSSARY_PATH (default ./glossary), or None if there is none"""
+        path = os.getenv('WORD_GLOSSARY_PATH') or DEFAULT_PATH
+        if not os.path.exists(os.path.join(path, 'manifest.json')):
+            return None
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def lookup(self, word: str, context: str) -> Optional[str]:
+        """Precomputed explanation for a word in this glossary's context, or None"""
+        if context.strip().lower() != self.context.lower():
+            return None
+        record = self.store.get(word.strip().lower())
+        return record['text'] if record else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute explanations for a textbook's key terms")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Rank, explain and index the key terms")
+    build_parser.add_argument('--chroma-path', default="/Users/mihirdhankani/biologyVectorDatabase")
+    build_parser.add_argument('--collection', default="biology_textbook")
+    build_parser.add_argument('--out', default=DEFAULT_PATH)
+    build_parser.add_argument('--context', default="biology")
+    build_parser.add_argument('--terms', type=int, default=2000, help="Maximum number of terms")
+    build_parser.add_argument('--batch-size', type=int, default=8, help="Terms per Groq call")
+    build_parser.add_argument('--concurrency', type=int, default=4, help="Groq calls in flight")
+    build_parser.add_argument('--dry-run', action='store_true', help="Only rank and list the terms")
+
+    lookup_parser = subparsers.add_parser('lookup', help="Print a term's explanation")
+    lookup_parser.add_argument('word')
+    lookup_parser.add_argument('--path', default=DEFAULT_PATH)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            build_glossary(args.chroma_path, args.collection, args.out, args.context,
+                           args.terms, args.batch_size, args.concurrency, args.dry_run)
+        elif args.command == 'lookup':
+            glossary = Glossary(args.path)
+            explanation = glossary.lookup(args.word, glossary.context)
+            print(explanation or f"❌ '{args.word}' is not in the glossary")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport - one pooled requests.Session for Groq and Ollama calls
+Keep-alive connections avoid a TCP+TLS handshake per request; 429/5xx and
+connection errors are retried with jittered exponential backoff
+"""
+import os
+import time
+import random
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The shared session for this process (recreated after fork)"""
+    global _session, _session_pid
+
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            pool_size = int(os.getenv('HTTP_POOL_SIZE', '20'))
+            adapter = HTTPAdapter(
+                pool_connections=int(os.getenv('HTTP_POOL_HOSTS', '10')),
+                pool_maxsize=pool_size,
+                max_retries=0  # retries are handled in request() so they can honor Retry-After
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+            _session_pid = os.getpid()
+
+    return _session
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff for the given (0-based) attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header, if the server sent one"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return min(float(value), 30.0)
+    except ValueError:
+        return None
+
+
+def request(method: str, url: str, max_retries: Optional[int] = None, **kwargs) -> requests.Response:
+    """Send a request over the pooled session, retrying 429/5xx and connection errors"""
+    if max_retries is None:
+        max_retries = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.ConnectionError:
+            # Includes connect timeouts; read timeouts are not retried
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            delay = _retry_after(response)
+            response.close()
+            time.sleep(delay if delay is not None else backoff_delay(attempt))
+            continue
+
+        return response
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
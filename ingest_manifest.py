@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Ingest Manifest - SQLite record of which chunks are already in a collection
+Chunk ids are content hashes, so a re-run (or a new textbook edition) only
+embeds chunks whose text is new; failed batches are kept for the next run
+
+Rows are keyed by (document, id): two documents can contain the same text,
+and a chunk only leaves the collection once no document references it
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Set
+
+
+def content_chunk_id(text: str, prefix: str = "physics") -> str:
+    """Stable id for a chunk: whitespace-normalized SHA-256 of its text"""
+    digest = hashlib.sha256(' '.join(text.split()).encode('utf-8')).hexdigest()
+    return f"{prefix}_{digest[:24]}"
+
+
+class IngestManifest:
+    def __init__(self, path: str):
+        """Open (or create) the manifest database"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " document TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " page INTEGER,"
+            " ingested_at REAL NOT NULL,"
+            " PRIMARY KEY (document, id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_id ON chunks (id)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS failed_batches ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " document TEXT NOT NULL,"
+            " chunk_ids TEXT NOT NULL,"
+            " error TEXT NOT NULL,"
+            " failed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def ingested_ids(self, document: str = None) -> Set[str]:
+        """Ids already in the collection (optionally only those from one document)"""
+        with self._lock:
+            if document is None:
+                rows = self._db.execute("SELECT DISTINCT id FROM chunks").fetchall()
+            else:
+                rows = self._db.execute("SELECT id FROM chunks WHERE document = ?", (document,)).fetchall()
+        return {row[0] for row in rows}
+
+    def record(self, document: str, chunk_ids: List[str], pages: List[int]):
+        """Mark chunks as stored and clear any earlier failure for them"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (document, id, page, ingested_at) VALUES (?, ?, ?, ?)",
+                [(document, chunk_id, page, now) for chunk_id, page in zip(chunk_ids, pages)]
+            )
+            self._db.commit()
+
+    def record_failure(self, document: str, chunk_ids: List[str], error: str):
+        """Keep a failed batch so it can be inspected and retried"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO failed_batches (document, chunk_ids, error, failed_at) VALUES (?, ?, ?, ?)",
+                (document, json.dumps(chunk_ids), error, time.time())
+            )
+            self._db.commit()
+
+    def clear_failures(self, failure_ids: Iterable[int]):
+        """Forget failed batches once all of their chunks have been stored"""
+        with self._lock:
+            self._db.executemany("DELETE FROM failed_batches WHERE id = ?", [(failure_id,) for failure_id in failure_ids])
+            self._db.commit()
+
+    def failed_batches(self, document: str = None) -> List[Dict]:
+        """Recorded failures, oldest first"""
+        query = "SELECT id, document, chunk_ids, error, failed_at FROM failed_batches"
+        params = ()
+        if document is not None:
+            query += " WHERE document = ?"
+            params = (document,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id", params).fetchall()
+        return [
+            {'id': failure_id, 'document': doc, 'chunk_ids': json.loads(ids), 'error': error, 'failed_at': failed_at}
+            for failure_id, doc, ids, error, failed_at in rows
+        ]
+
+    def remove(self, document: str, chunk_ids: Iterable[str]) -> Set[str]:
+        """Drop a document's references to chunks (e.g. text that disappeared in a new edition)
+
+        Returns the ids no other document still references, i.e. those that
+        can be deleted from the collection
+        """
+        chunk_ids = set(chunk_ids)
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM chunks WHERE document = ? AND id = ?",
+                [(document, chunk_id) for chunk_id in chunk_ids]
+            )
+            self._db.commit()
+            referenced = {
+                row[0] for chunk_id in chunk_ids
+                for row in self._db.execute("SELECT id FROM chunks WHERE id = ? LIMIT 1", (chunk_id,))
+            }
+        return chunk_ids - referenced
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            chunks = self._db.execute("SELECT COUNT(DISTINCT id) FROM chunks").fetchone()[0]
+            failed = self._db.execute("SELECT COUNT(*) FROM failed_batches").fetchone()[0]
+        return {'chunks': chunks, 'failed_batches': failed}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Ingest Pipeline - run generator stages concurrently over bounded queues
+Each stage is a function that takes an iterator and yields results; stages run
+in their own threads so PDF parsing, embedding and database writes overlap,
+and the bounded queues keep memory flat however large the book is
+"""
+import time
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+
+_DONE = object()
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterator into lists of at most size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StageStats:
+    def __init__(self, name: str):
+        """Throughput counters for one stage"""
+        self.name = name
+        self.items = 0
+        self.started = None
+        self.finished = None
+        self.wait_in = 0.0   # seconds blocked waiting for upstream
+        self.wait_out = 0.0  # seconds blocked on a full downstream queue
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def busy(self) -> float:
+        return max(self.elapsed - self.wait_in - self.wait_out, 0.0)
+
+    def summary(self) -> str:
+        rate = self.items / self.busy if self.busy else 0.0
+        return (f"{self.name:<8} {self.items:>7} items  busy {self.busy:6.1f}s ({rate:8.1f}/s)  "
+                f"starved {self.wait_in:6.1f}s  blocked {self.wait_out:6.1f}s")
+
+
+def _put(q: queue.Queue, item: Any, stats: StageStats, stop: threading.Event):
+    """Put with backpressure, giving up if the pipeline is stopping"""
+    start = time.time()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            break
+        except queue.Full:
+            continue
+    stats.wait_out += time.time() - start
+
+
+def _drain(q: queue.Queue, stats: StageStats, stop: threading.Event) -> Iterator:
+    """Iterate over a queue until the upstream stage finishes"""
+    while True:
+        start = time.time()
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if stop.is_set():
+                    return
+        stats.wait_in += time.time() - start
+        if item is _DONE:
+            return
+        yield item
+
+
+def run_pipeline(source: Iterable, stages: List[Tuple[str, Callable[[Iterator], Iterator], int]],
+                 report_every: float = 10.0) -> List[StageStats]:
+    """Run (name, fn, output_queue_size) stages concurrently; the last stage's output is discarded
+
+    The first exception raised by any stage stops the pipeline and is re-raised
+    """
+    stop = threading.Event()
+    errors = []
+    stats = [StageStats(name) for name, _, _ in stages]
+    queues = [queue.Queue(maxsize=max(1, size)) for _, _, size in stages[:-1]]
+
+    def run_stage(index: int):
+        name, fn, _ = stages[index]
+        stage_stats = stats[index]
+        stage_stats.started = time.time()
+        upstream = iter(source) if index == 0 else _drain(queues[index - 1], stage_stats, stop)
+
+        try:
+            for item in fn(upstream):
+                stage_stats.items += 1
+                if index < len(queues):
+                    _put(queues[index], item, stage_stats, stop)
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            errors.append((name, e))
+            stop.set()
+        finally:
+            stage_stats.finished = time.time()
+            if index < len(queues):
+                _put(queues[index], _DONE, stage_stats, stop)
+
+    threads = [
+        threading.Thread(target=run_stage, args=(index,), name=f"ingest-{name}", daemon=True)
+        for index, (name, _, _) in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+
+    last_report = time.time()
+    while any(thread.is_alive() for thread in threads):
+        threads[-1].join(timeout=0.5)
+        if report_every and time.time() - last_report >= report_every:
+            print("  📈 " + " | ".join(f"{s.name}: {s.items}" for s in stats))
+            last_report = time.time()
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        name, error = errors[0]
+        raise RuntimeError(f"Ingest stage '{name}' failed: {error}") from error
+
+    return stats
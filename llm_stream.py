@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+LLM Streaming Helpers - parse token streams from Groq and Ollama
+Groq's OpenAI-compatible endpoint streams Server-Sent Events;
+Ollama's /api/generate streams newline-delimited JSON
+"""
+import json
+from typing import Iterator
+
+
+def iter_openai_sse(response) -> Iterator[str]:
+    """Yield content deltas from an OpenAI-style SSE chat completion stream"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            break
+
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+
+        for choice in event.get('choices', []):
+            text = (choice.get('delta') or {}).get('content')
+            if text:
+                yield text
+
+
+def iter_ollama_ndjson(response) -> Iterator[str]:
+    """Yield response fragments from an Ollama /api/generate NDJSON stream"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            continue
+
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+
+        if event.get('error'):
+            raise RuntimeError(event['error'])
+
+        text = event.get('response')
+        if text:
+            yield text
+
+        if event.get('done'):
+            break
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local Vector Index - in-process exact search over a ChromaDB snapshot
+(ann_index.py builds an approximate IVF index on top of the same snapshot,
+quantized_index.py an int8 / float16 one)
+The biology collection is ~5,700 x 384 float32 vectors (~9 MB), so one
+normalized matrix-vector product answers a query with no network hop
+
+Snapshot layout (one directory):
+  manifest.json       kind, count, dim, source collection
+  embeddings.npy      float32 [count, dim], L2-normalized, memory-mapped at load
+  docs.jsonl          one {"id", "text", "metadata"} record per row
+  docs.offsets.npy    int64 [count + 1] byte offsets into docs.jsonl
+  bm25/               keyword index over the same rows (see bm25_index.py)
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import argparse
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from bm25_index import BM25Builder, BM25Index, HybridRetriever
+
+
+def iter_collection_pages(collection, page_size: int = 1000,
+                          include=('embeddings', 'documents', 'metadatas')) -> Iterator[Dict[str, Any]]:
+    """Page through a ChromaDB collection with limit/offset instead of one giant get()"""
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=list(include))
+        if not page['ids']:
+            break
+        yield page
+        offset += len(page['ids'])
+        if len(page['ids']) < page_size:
+            break
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows are left as zeros)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_chroma_snapshot(chroma_path: str, collection_name: str, out_dir: str,
+                           page_size: int = 1000) -> Dict[str, Any]:
+    """Write a collection's vectors and documents to a local snapshot directory"""
+    import chromadb
+
+    print(f"📤 Exporting '{collection_name}' from {chroma_path} to {out_dir}...")
+    client = chromadb.PersistentClient(path=chroma_path)
+    collection = client.get_collection(collection_name)
+    count = collection.count()
+    os.makedirs(out_dir, exist_ok=True)
+
+    matrix = None
+    offsets = [0]
+    row = 0
+    lexical = BM25Builder()
+
+    with open(os.path.join(out_dir, 'docs.jsonl'), 'wb') as docs_file:
+        for page in iter_collection_pages(collection, page_size):
+            vectors = np.asarray(page['embeddings'], dtype=np.float32)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    os.path.join(out_dir, 'embeddings.npy'), mode='w+',
+                    dtype=np.float32, shape=(count, vectors.shape[1])
+                )
+
+            matrix[row:row + len(vectors)] = normalize_rows(vectors)
+            row += len(vectors)
+
+            for id_, document, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                line = json.dumps({'id': id_, 'text': document, 'metadata': metadata or {}},
+                                  ensure_ascii=False).encode('utf-8') + b"\n"
+                docs_file.write(line)
+                offsets.append(offsets[-1] + len(line))
+                lexical.add(id_, document or '')
+
+            print(f"  ✅ Exported {row}/{count} vectors")
+
+    if matrix is None:
+        raise ValueError(f"Collection '{collection_name}' is empty")
+    matrix.flush()
+    del matrix
+
+    np.save(os.path.join(out_dir, 'docs.offsets.npy'), np.asarray(offsets, dtype=np.int64))
+    lexical_manifest = lexical.write(os.path.join(out_dir, 'bm25'))
+    print(f"  🔤 Keyword index: {lexical_manifest['terms']} terms, {lexical_manifest['postings']} postings")
+
+    manifest = {
+        'kind': 'exact',
+        'count': row,
+        'dim': int(np.load(os.path.join(out_dir, 'embeddings.npy'), mmap_mode='r').shape[1]),
+        'collection': collection_name,
+        'source': chroma_path,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"🎉 Snapshot written: {row} vectors x {manifest['dim']} dims")
+    return manifest
+
+
+class SnapshotDocs:
+    def __init__(self, path: str):
+        """Memory-map docs.jsonl and its offset table"""
+        self.offsets = np.load(os.path.join(path, 'docs.offsets.npy'), mmap_mode='r')
+        self._file = open(os.path.join(path, 'docs.jsonl'), 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, row: int) -> Dict[str, Any]:
+        """The {"id", "text", "metadata"} record for one row"""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._mmap[start:end])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self.get(row)
+
+
+class LocalVectorIndex:
+    def __init__(self, path: str):
+        """Load a snapshot; the embedding matrix stays memory-mapped"""
+        self.path = path
+        self.snapshot_path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+        self.matrix = np.load(os.path.join(path, 'embeddings.npy'), mmap_mode='r')
+        self.docs = SnapshotDocs(path)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def top_k(self, query_embedding, k: int):
+        """Row indices and cosine scores of the k best matches, best first"""
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self.matrix @ query
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        order = candidates[np.argsort(-scores[candidates])]
+        return order, scores[order]
+
+    def chunks_for(self, rows, scores) -> List[Dict]:
+        """Format rows like the other retrieve_context backends"""
+        context_chunks = []
+        for row, score in zip(rows, scores):
+            doc = self.docs.get(int(row))
+            context_chunks.append({
+                'id': doc['id'],
+                'text': doc['text'],
+                'metadata': doc['metadata'],
+                'relevance_score': float(score)
+            })
+        return context_chunks
+
+    def search(self, query_embedding, n_results: int = 3, query_text: Optional[str] = None) -> List[Dict]:
+        """retrieve_context-compatible search (query_text is unused by dense search)"""
+        rows, scores = self.top_k(query_embedding, n_results)
+        return self.chunks_for(rows, scores)
+
+
+def load_local_index(path: Optional[str], hybrid: Optional[bool] = None):
+    """Open the index stored at path (None when no local index is configured)
+
+    When the snapshot has a bm25/ keyword index, results are fused with it
+    unless hybrid is False (default: LOCAL_INDEX_HYBRID, on)
+    """
+    if not path:
+        return None
+
+    with open(os.path.join(path, 'manifest.json')) as f:
+        kind = json.load(f).get('kind', 'exact')
+
+    if kind == 'exact':
+        index = LocalVectorIndex(path)
+    elif kind == 'ivf':
+        from ann_index import IVFIndex
+        index = IVFIndex(path)
+    elif kind == 'quantized':
+        from quantized_index import QuantizedIndex
+        index = QuantizedIndex(path)
+    else:
+        raise ValueError(f"Unknown local index kind '{kind}' in {path}")
+
+    if hybrid is None:
+        hybrid = os.getenv('LOCAL_INDEX_HYBRID', '1') != '0'
+    lexical_path = os.path.join(index.snapshot_path, 'bm25')
+    if hybrid and os.path.exists(os.path.join(lexical_path, 'manifest.json')):
+        return HybridRetriever(index, BM25Index(lexical_path))
+    return index
+
+
+def benchmark(path: str, queries: int = 200, k: int = 3):
+    """Time searches using stored vectors as queries"""
+    index = load_local_index(path, hybrid=False)
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(index), size=queries)
+
+    start_time = time.perf_counter()
+    for row in rows:
+        index.search(np.asarray(index.matrix[row]), k)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"⚡ {queries} searches over {len(index)} vectors: {elapsed / queries * 1000:.3f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local in-process vector index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Snapshot a ChromaDB collection")
+    export_parser.add_argument('--chroma-path', default="/Users/mihirdhankani/biologyVectorDatabase")
+    export_parser.add_argument('--collection', default="biology_textbook")
+    export_parser.add_argument('--out', default="local_index")
+    export_parser.add_argument('--page-size', type=int, default=1000)
+
+    bench_parser = subparsers.add_parser('bench', help="Measure search latency")
+    bench_parser.add_argument('path')
+    bench_parser.add_argument('--queries', type=int, default=200)
+    bench_parser.add_argument('-k', type=int, default=3)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            export_chroma_snapshot(args.chroma_path, args.collection, args.out, args.page_size)
+        elif args.command == 'bench':
+            benchmark(args.path, args.queries, args.k)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,22 +5,49 @@ Export vectors from ChromaDB and upload to Pinecone
 """
 import os
 import json
+import argparse
 import time
 import chromadb
 from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 import numpy as np
 from tqdm import tqdm
 
+from pinecone_uploader import PineconeUploader
+from local_vector_index import iter_collection_pages
+from migration_journal import MigrationJournal, id_checksum
+from doc_store import DocStore, export_doc_store, store_path
+
+# Pauses between re-fetches before an id counts as missing (Pinecone reads lag upserts)
+VERIFY_RETRY_DELAYS = (1, 2)
+
 class VectorMigration:
     def __init__(self, 
                  chroma_path="/Users/mihirdhankani/biologyVectorDatabase",
                  pinecone_api_key=None,
-                 pinecone_index_name="biology-vectors"):
+                 pinecone_index_name="biology-vectors",
+                 collection_name="biology_textbook",
+                 namespace="",
+                 max_in_flight=8,
+                 page_size=1000,
+                 journal_path="migration_journal.sqlite3",
+                 doc_store_path=None,
+                 compress_docs=False):
         """Initialize migration tools"""
         self.chroma_path = chroma_path
+        self.collection_name = collection_name
+        self.namespace = namespace
+        self.max_in_flight = max_in_flight
+        self.page_size = page_size
+        self.compress_docs = compress_docs
         self.pinecone_api_key = pinecone_api_key or os.getenv('PINECONE_API_KEY')
         self.index_name = pinecone_index_name
+        # With a local doc store, chunk text stays out of Pinecone metadata; doc_store_path
+        # is the root, and each index/namespace gets its own store underneath it
+        self.doc_store_path = store_path(doc_store_path, pinecone_index_name, namespace) if doc_store_path else None
+        self.journal = MigrationJournal(
+            journal_path, f"{chroma_path}:{collection_name}->{pinecone_index_name}/{namespace}"
+        )
         
         if not self.pinecone_api_key:
             raise ValueError("Pinecone API key required. Set PINECONE_API_KEY environment variable or pass it directly.")
@@ -28,29 +55,74 @@ class VectorMigration:
         # Initialize ChromaDB
         print("🔗 Connecting to ChromaDB...")
         self.chroma_client = chromadb.PersistentClient(path=self.chroma_path)
-        self.chroma_collection = self.chroma_client.get_collection("biology_textbook")
+        self.chroma_collection = self.chroma_client.get_collection(self.collection_name)
         
         # Initialize Pinecone
         print("🔗 Connecting to Pinecone...")
         self.pc = Pinecone(api_key=self.pinecone_api_key)
         
-    def export_vectors_from_chroma(self) -> Dict[str, Any]:
-        """Export all vectors and metadata from ChromaDB"""
-        print("📤 Exporting vectors from ChromaDB...")
+    def to_pinecone_vectors(self, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convert one page of ChromaDB results into Pinecone upsert records"""
+        embeddings = np.asarray(page['embeddings'], dtype=np.float32)
+        vectors = []
         
-        # Get all data from ChromaDB
-        results = self.chroma_collection.get(
-            include=['embeddings', 'documents', 'metadatas']
-        )
-        
-        print(f"✅ Found {len(results['ids'])} vectors to migrate")
+        for id_, embedding, document, metadata in zip(page['ids'], embeddings, page['documents'], page['metadatas']):
+            metadata = metadata or {}
+            # Prepare metadata for Pinecone (must be JSON serializable)
+            pinecone_metadata = {
+                'chapter': str(metadata.get('chapter', 'unknown')),
+                'section': str(metadata.get('section', 'unknown')),
+                'content_type': str(metadata.get('content_type', 'content')),
+                'word_count': int(metadata.get('word_count', 0)),
+                'char_count': int(metadata.get('char_count', 0))
+            }
+            if not self.doc_store_path:
+                pinecone_metadata['text'] = document
+            
+            vectors.append({
+                'id': id_,
+                'values': embedding.tolist(),
+                'metadata': pinecone_metadata
+            })
         
-        return {
-            'ids': results['ids'],
-            'embeddings': results['embeddings'],
-            'documents': results['documents'],
-            'metadatas': results['metadatas']
-        }
+        return vectors
+    
+    def iter_upsert_batches(self, batch_size: int = 100,
+                            completed: Dict[Tuple[int, int], str] = None) -> Iterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """Page through ChromaDB and yield (start, end, batch) upsert batches; only one page is held at a time
+
+        Batches whose offset range and id checksum match a completed journal entry
+        are skipped; when resuming, pages are read id-only first so finished ranges
+        never load their embeddings
+        """
+        include = () if completed else ('embeddings', 'documents', 'metadatas')
+        offset = 0
+        for page in iter_collection_pages(self.chroma_collection, self.page_size, include=include):
+            ids = page['ids']
+            todo = []
+            for i in range(0, len(ids), batch_size):
+                batch_ids = ids[i:i + batch_size]
+                start, end = offset + i, offset + i + len(batch_ids)
+                if completed and completed.get((start, end)) == id_checksum(batch_ids):
+                    continue
+                todo.append((start, end, batch_ids))
+            offset += len(ids)
+            
+            if not todo:
+                continue
+            if completed:
+                vectors = self.fetch_vectors([id_ for _, _, batch_ids in todo for id_ in batch_ids])
+            else:
+                vectors = self.to_pinecone_vectors(page)
+            by_id = {vector['id']: vector for vector in vectors}
+            
+            for start, end, batch_ids in todo:
+                yield start, end, [by_id[id_] for id_ in batch_ids if id_ in by_id]
+    
+    def fetch_vectors(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Upsert records for specific ids (used to re-send vectors that failed verification)"""
+        page = self.chroma_collection.get(ids=ids, include=['embeddings', 'documents', 'metadatas'])
+        return self.to_pinecone_vectors(page)
     
     def create_pinecone_index(self, dimension=384):
         """Create Pinecone index if it doesn't exist"""
@@ -83,64 +155,130 @@ class VectorMigration:
         print("✅ Index created and ready!")
         return self.pc.Index(self.index_name)
     
-    def upload_to_pinecone(self, data: Dict[str, Any], batch_size=100):
-        """Upload vectors to Pinecone in batches"""
+    def upload_to_pinecone(self, batch_size=100, resume=False):
+        """Stream vectors from ChromaDB to Pinecone in batches, journaling each completed batch"""
         print("📤 Uploading vectors to Pinecone...")
         
         index = self.create_pinecone_index()
         
-        # Prepare data for Pinecone
-        vectors_to_upload = []
+        if not resume:
+            self.journal.reset()
+        completed = self.journal.completed()
+        if completed:
+            print(f"⏩ Resuming: {len(completed)} batches already in the journal ({self.journal.path})")
         
-        for i, (id_, embedding, document, metadata) in enumerate(zip(
-            data['ids'], 
-            data['embeddings'], 
-            data['documents'], 
-            data['metadatas']
-        )):
-            # Prepare metadata for Pinecone (must be JSON serializable)
-            pinecone_metadata = {
-                'text': document,
-                'chapter': str(metadata.get('chapter', 'unknown')),
-                'section': str(metadata.get('section', 'unknown')),
-                'content_type': str(metadata.get('content_type', 'content')),
-                'word_count': int(metadata.get('word_count', 0)),
-                'char_count': int(metadata.get('char_count', 0))
-            }
-            
-            vectors_to_upload.append({
-                'id': id_,
-                'values': embedding,
-                'metadata': pinecone_metadata
-            })
+        # Upload in batches, several in flight, backing off when Pinecone returns 429
+        total_vectors = self.chroma_collection.count()
+        print(f"🔄 Uploading {total_vectors} vectors in batches of {batch_size} "
+              f"(pages of {self.page_size}, {self.max_in_flight} concurrent upserts)")
+        
+        uploader = PineconeUploader(index, self.namespace, max_in_flight=self.max_in_flight)
+        uploaded_ids = []
+        ranges = {}
         
-        # Upload in batches
-        total_vectors = len(vectors_to_upload)
-        print(f"🔄 Uploading {total_vectors} vectors in batches of {batch_size}")
+        def batches():
+            position = 0
+            for start, end, batch in self.iter_upsert_batches(batch_size, completed):
+                # Vectors skipped from the journal still count towards the progress bar
+                progress.update(start - position)
+                position = end
+                if not batch:
+                    continue
+                uploaded_ids.extend(vector['id'] for vector in batch)
+                ranges[batch[0]['id']] = (start, end, [vector['id'] for vector in batch])
+                yield batch
+            progress.update(total_vectors - position)
         
-        for i in tqdm(range(0, total_vectors, batch_size), desc="Uploading"):
-            batch = vectors_to_upload[i:i+batch_size]
-            index.upsert(vectors=batch)
-            time.sleep(0.1)  # Rate limiting
+        def record(batch):
+            start, end, batch_ids = ranges.pop(batch[0]['id'])
+            if end - start == len(batch):
+                self.journal.record(start, end, id_checksum(batch_ids))
         
-        print("✅ All vectors uploaded to Pinecone!")
+        try:
+            with tqdm(total=total_vectors, desc="Uploading") as progress:
+                stats = uploader.upload(batches(), on_batch=progress.update, on_uploaded=record)
+            skipped = total_vectors - len(uploaded_ids)
+            print(f"✅ Uploaded {stats['vectors']}/{len(uploaded_ids)} vectors in {stats['seconds']:.1f}s "
+                  f"({stats['retries']} retries, {stats['throttled']} rate-limited, {skipped} already done)")
+            
+            # Batches left in ranges failed to upload; journal them if verification re-sends them
+            missing = self.verify_upload(uploader, uploaded_ids, list(ranges.values()))
+        finally:
+            uploader.close()
         
-        # Verify upload
         stats = index.describe_index_stats()
         print(f"📊 Pinecone index stats: {stats['total_vector_count']} vectors")
         
-        return index
+        return index, skipped + len(uploaded_ids) - len(missing)
+    
+    def dry_run(self, batch_size=100, resume=True) -> Dict[str, int]:
+        """Report what a (resumed) migration would still transfer, without touching Pinecone"""
+        completed = self.journal.completed() if resume else {}
+        remaining = {'batches': 0, 'vectors': 0}
+        done = {'batches': 0, 'vectors': 0}
+        
+        offset = 0
+        for page in iter_collection_pages(self.chroma_collection, self.page_size, include=()):
+            ids = page['ids']
+            for i in range(0, len(ids), batch_size):
+                batch_ids = ids[i:i + batch_size]
+                start, end = offset + i, offset + i + len(batch_ids)
+                bucket = done if completed.get((start, end)) == id_checksum(batch_ids) else remaining
+                bucket['batches'] += 1
+                bucket['vectors'] += len(batch_ids)
+            offset += len(ids)
+        
+        print(f"🧾 Journal: {self.journal.path} ({self.journal.run_key})")
+        print(f"✅ Done:      {done['batches']} batches, {done['vectors']} vectors")
+        print(f"📦 Remaining: {remaining['batches']} batches, {remaining['vectors']} vectors")
+        return remaining
+    
+    def verify_upload(self, uploader: PineconeUploader, ids: List[str],
+                      unjournaled: List[Tuple[int, int, List[str]]] = ()) -> List[str]:
+        """Fetch every id back; re-upload anything missing once, then report per-ID counts
+
+        Batches in unjournaled (start, end, ids) are journaled once all their ids are found
+        """
+        print(f"🔎 Verifying {len(ids)} ids...")
+        missing = self.find_missing(uploader, ids)
+        
+        if missing:
+            print(f"🔁 {len(missing)} ids missing, uploading them again...")
+            uploader.upload(self.fetch_vectors(missing[i:i + 100]) for i in range(0, len(missing), 100))
+            missing = self.find_missing(uploader, missing)
+        
+        still_missing = set(missing)
+        for start, end, batch_ids in unjournaled:
+            if end - start == len(batch_ids) and still_missing.isdisjoint(batch_ids):
+                self.journal.record(start, end, id_checksum(batch_ids))
+        
+        print(f"📋 Verified {len(ids) - len(missing)}/{len(ids)} ids in Pinecone")
+        if missing:
+            print(f"⚠️  Still missing {len(missing)} ids, e.g. {missing[:5]}")
+        return missing
     
-    def migrate(self):
+    def find_missing(self, uploader: PineconeUploader, ids: List[str]) -> List[str]:
+        """Ids the index cannot return, asking again after a pause since fetch is eventually consistent"""
+        missing = uploader.verify(ids)
+        for delay in VERIFY_RETRY_DELAYS:
+            if not missing:
+                break
+            time.sleep(delay)
+            missing = uploader.verify(missing)
+        return missing
+    
+    def migrate(self, resume=False):
         """Complete migration process"""
         print("🚀 Starting vector database migration...")
         print("=" * 50)
         
-        # Step 1: Export from ChromaDB
-        data = self.export_vectors_from_chroma()
+        # Step 1: Chunk text goes to the local doc store instead of Pinecone metadata
+        if self.doc_store_path:
+            export_doc_store(self.chroma_collection, self.doc_store_path, self.compress_docs, self.page_size,
+                             index=self.index_name, namespace=self.namespace)
         
-        # Step 2: Upload to Pinecone
-        index = self.upload_to_pinecone(data)
+        # Step 2: Stream pages from ChromaDB straight into Pinecone upserts
+        index, vectors_migrated = self.upload_to_pinecone(resume=resume)
         
         # Step 3: Test query
         print("\n🧪 Testing Pinecone query...")
@@ -160,22 +298,49 @@ class VectorMigration:
             pinecone_results = index.query(
                 vector=test_embedding,
                 top_k=3,
-                include_metadata=True
+                include_metadata=not self.doc_store_path,
+                namespace=self.namespace
             )
             
             print(f"✅ Test query successful! Found {len(pinecone_results['matches'])} results")
-            print(f"📋 Sample result: {pinecone_results['matches'][0]['metadata']['text'][:100]}...")
+            top_match = pinecone_results['matches'][0]
+            if self.doc_store_path:
+                store = DocStore(self.doc_store_path)
+                try:
+                    record = store.get(top_match['id'])
+                finally:
+                    store.close()
+                sample_text = record['text'] if record else None
+            else:
+                sample_text = top_match['metadata'].get('text')
+            if sample_text is None:
+                print(f"⚠️  No text found for top match {top_match['id']}")
+            else:
+                print(f"📋 Sample result: {sample_text[:100]}...")
         
         print("\n🎉 Migration completed successfully!")
-        print(f"📊 Migrated {len(data['ids'])} vectors to Pinecone index '{self.index_name}'")
+        print(f"📊 Migrated {vectors_migrated} vectors to Pinecone index '{self.index_name}'")
         
         return {
             'success': True,
-            'vectors_migrated': len(data['ids']),
+            'vectors_migrated': vectors_migrated,
             'index_name': self.index_name
         }
 
 def main():
+    parser = argparse.ArgumentParser(description="Migrate a ChromaDB collection to Pinecone")
+    parser.add_argument('--collection', default="biology_textbook", help="ChromaDB collection to export")
+    parser.add_argument('--namespace', default="", help="Pinecone namespace to upload into (e.g. physics)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Maximum upserts in flight")
+    parser.add_argument('--page-size', type=int, default=1000, help="Vectors read from ChromaDB per page")
+    parser.add_argument('--journal', default="migration_journal.sqlite3", help="Checkpoint journal file")
+    parser.add_argument('--resume', action='store_true', help="Skip batches the journal marks as uploaded")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what remains to transfer")
+    parser.add_argument('--doc-store', help="Root of the local doc stores; chunk text goes to <root>/<index>/<namespace> "
+                                                  "instead of Pinecone metadata")
+    parser.add_argument('--compress-docs', action='store_true', help="zlib-compress each doc store record")
+    args = parser.parse_args()
+    
     print("🧬 Biology Vector Database Migration to Pinecone")
     print("=" * 60)
     
@@ -190,10 +355,17 @@ def main():
     
     try:
         # Initialize migration
-        migration = VectorMigration()
+        migration = VectorMigration(collection_name=args.collection, namespace=args.namespace,
+                                    max_in_flight=args.concurrency, page_size=args.page_size,
+                                    journal_path=args.journal, doc_store_path=args.doc_store,
+                                    compress_docs=args.compress_docs)
+        
+        if args.dry_run:
+            migration.dry_run()
+            return
         
         # Run migration
-        result = migration.migrate()
+        result = migration.migrate(resume=args.resume)
         
         if result['success']:
             print(f"\n✅ SUCCESS: {result['vectors_migrated']} vectors migrated to '{result['index_name']}'")
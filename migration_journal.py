@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Migration Journal - SQLite checkpoint of which ChromaDB batches reached Pinecone
+Each completed batch is stored as its offset range in the collection plus a
+checksum of its ids, so a resumed migration only skips a range when the same
+vectors are still there; everything else is upserted again (upserts by id are
+idempotent, so re-sending is always safe)
+"""
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Tuple
+
+
+def id_checksum(ids: List[str]) -> str:
+    """Order-sensitive fingerprint of a batch's ids"""
+    return hashlib.sha256('\n'.join(ids).encode('utf-8')).hexdigest()[:32]
+
+
+class MigrationJournal:
+    def __init__(self, path: str, run_key: str):
+        """Open (or create) the journal; run_key identifies collection -> index/namespace"""
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " run_key TEXT NOT NULL,"
+            " start INTEGER NOT NULL,"
+            " end INTEGER NOT NULL,"
+            " checksum TEXT NOT NULL,"
+            " completed_at REAL NOT NULL,"
+            " PRIMARY KEY (run_key, start, end))"
+        )
+        self._db.commit()
+
+    def completed(self) -> Dict[Tuple[int, int], str]:
+        """(start, end) -> id checksum for every batch already uploaded"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT start, end, checksum FROM batches WHERE run_key = ?", (self.run_key,)
+            ).fetchall()
+        return {(start, end): checksum for start, end, checksum in rows}
+
+    def record(self, start: int, end: int, checksum: str):
+        """Mark the batch covering collection offsets [start, end) as uploaded"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO batches (run_key, start, end, checksum, completed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.run_key, start, end, checksum, time.time())
+            )
+            self._db.commit()
+
+    def reset(self):
+        """Forget this run's progress (a fresh, non-resumed migration)"""
+        with self._lock:
+            self._db.execute("DELETE FROM batches WHERE run_key = ?", (self.run_key,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            batches, vectors = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(end - start), 0) FROM batches WHERE run_key = ?", (self.run_key,)
+            ).fetchone()
+        return {'batches': batches, 'vectors': vectors}
+
+    def close(self):
+        self._db.close()
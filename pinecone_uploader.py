@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Pinecone Uploader - concurrent, retrying upserts with adaptive rate limiting
+Several batches are in flight at once; a 429 halves the allowed concurrency
+and successful batches grow it back (AIMD), so throughput tracks what the
+index accepts instead of a fixed sleep between batches
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
+
+from http_transport import backoff_delay
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for a Pinecone 429 (the SDK exposes the HTTP status as .status)"""
+    status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+    return status == 429 or '429' in str(error)[:200]
+
+
+class AdaptiveConcurrency:
+    def __init__(self, max_limit: int, increase_after: int = 4):
+        """Allow up to max_limit holders; 429s halve the limit, successes add one back"""
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.increase_after = increase_after
+        self.in_flight = 0
+        self._successes = 0
+        self._pause_until = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                pause = self._pause_until - time.time()
+                if pause <= 0 and self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                self._condition.wait(timeout=max(pause, 0.05))
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def on_throttled(self, pause: float):
+        """Multiplicative decrease plus a short global pause"""
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+            self._pause_until = max(self._pause_until, time.time() + pause)
+
+
+class PineconeUploader:
+    def __init__(self, index, namespace: str = "", max_in_flight: int = 8, max_retries: int = 5):
+        """Upload to one index/namespace with at most max_in_flight concurrent upserts"""
+        self.index = index
+        self.namespace = namespace
+        self.max_retries = max_retries
+        self.concurrency = AdaptiveConcurrency(max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='upsert')
+        self._lock = threading.Lock()
+        self.stats = {'batches': 0, 'vectors': 0, 'retries': 0, 'throttled': 0, 'failed_ids': []}
+
+    def _upsert(self, batch: List[Dict[str, Any]]) -> bool:
+        """Upsert one batch, retrying with backoff; failures are recorded, not raised"""
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.index.upsert(vectors=batch, namespace=self.namespace)
+                    self.concurrency.on_success()
+                    with self._lock:
+                        self.stats['batches'] += 1
+                        self.stats['vectors'] += len(batch)
+                    return True
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        print(f"  ❌ Batch starting at {batch[0]['id']} failed after {attempt + 1} attempts: {e}")
+                        with self._lock:
+                            self.stats['failed_ids'].extend(vector['id'] for vector in batch)
+                        return False
+
+                    delay = backoff_delay(attempt)
+                    with self._lock:
+                        self.stats['retries'] += 1
+                        if is_rate_limited(e):
+                            self.stats['throttled'] += 1
+                    if is_rate_limited(e):
+                        self.concurrency.on_throttled(delay)
+                    time.sleep(delay)
+        finally:
+            self.concurrency.release()
+
+    def upload(self, batches: Iterable[List[Dict[str, Any]]], on_batch=None, on_uploaded=None) -> Dict[str, Any]:
+        """Upsert every batch (batches are pulled lazily, so a generator keeps memory flat)
+
+        on_batch(size) runs when a batch finishes either way; on_uploaded(batch) only on success
+        """
+        start_time = time.time()
+        futures = []
+
+        for batch in batches:
+            if not batch:
+                continue
+            self.concurrency.acquire()
+            future = self.executor.submit(self._upsert, batch)
+            if on_batch:
+                future.add_done_callback(lambda _, size=len(batch): on_batch(size))
+            if on_uploaded:
+                future.add_done_callback(lambda f, batch=batch: f.result() and on_uploaded(batch))
+            futures.append(future)
+            # Drop references to finished batches as we go
+            futures = [f for f in futures if not f.done()]
+
+        for future in futures:
+            future.result()
+
+        self.stats['seconds'] = time.time() - start_time
+        return self.stats
+
+    def verify(self, ids: List[str], batch_size: int = 100) -> List[str]:
+        """Ids that cannot be fetched back from the index"""
+        def missing_in(chunk: List[str]) -> List[str]:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    found = self.index.fetch(ids=chunk, namespace=self.namespace).vectors
+                    return [id_ for id_ in chunk if id_ not in found]
+                except Exception:
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(backoff_delay(attempt))
+
+        chunks = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        missing = []
+        for chunk_missing in self.executor.map(missing_in, chunks):
+            missing.extend(chunk_missing)
+        return missing
+
+    def close(self):
+        self.executor.shutdown(wait=True)
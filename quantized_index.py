@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Quantized Index - int8 / float16 scan over a local vector snapshot
+The scan reads 1-byte (int8, per-vector scale) or 2-byte (float16) codes
+instead of float32, a 4x / 2x smaller matrix; the best candidates can then be
+re-scored against the float32 snapshot, which only touches those rows
+
+Index layout (one directory, built from a local_vector_index.py snapshot):
+  manifest.json       kind "quantized", dtype, rerank, relative path of the snapshot
+  codes.npy           int8 or float16 [count, dim], one row per snapshot row
+  scales.npy          float32 [count], int8 only: code * scale ~= vector
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from local_vector_index import LocalVectorIndex, SnapshotDocs
+
+
+def quantize_int8(vectors: np.ndarray):
+    """Symmetric per-vector int8 codes and their float32 scales"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def build_quantized_index(snapshot_path: str, out_dir: str, dtype: str = 'int8',
+                          rerank: int = 4) -> Dict[str, Any]:
+    """Quantize a snapshot's vectors and write the codes next to it"""
+    if dtype not in ('int8', 'float16'):
+        raise ValueError(f"Unsupported dtype '{dtype}' (use int8 or float16)")
+
+    matrix = np.load(os.path.join(snapshot_path, 'embeddings.npy'), mmap_mode='r')
+    count, dim = matrix.shape
+    os.makedirs(out_dir, exist_ok=True)
+
+    codes = np.lib.format.open_memmap(
+        os.path.join(out_dir, 'codes.npy'), mode='w+', dtype=np.dtype(dtype), shape=matrix.shape
+    )
+    scales = np.ones(count, dtype=np.float32)
+    for start in range(0, count, 8192):
+        block = np.asarray(matrix[start:start + 8192])
+        if dtype == 'int8':
+            codes[start:start + len(block)], scales[start:start + len(block)] = quantize_int8(block)
+        else:
+            codes[start:start + len(block)] = block.astype(np.float16)
+    codes.flush()
+    del codes
+    if dtype == 'int8':
+        np.save(os.path.join(out_dir, 'scales.npy'), scales)
+
+    manifest = {
+        'kind': 'quantized',
+        'dtype': dtype,
+        'count': int(count),
+        'dim': int(dim),
+        'rerank': int(rerank),
+        'snapshot': os.path.relpath(os.path.abspath(snapshot_path), os.path.abspath(out_dir)),
+        'bytes': int(count * dim * np.dtype(dtype).itemsize + (count * 4 if dtype == 'int8' else 0)),
+        'float32_bytes': int(count * dim * 4),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"🎉 {dtype} index written: {count} vectors, "
+          f"{manifest['bytes'] / 1e6:.1f} MB vs {manifest['float32_bytes'] / 1e6:.1f} MB float32")
+    return manifest
+
+
+class QuantizedIndex(LocalVectorIndex):
+    def __init__(self, path: str, rerank: Optional[int] = None, block_size: int = 1024):
+        """Load quantized codes; rerank x k candidates are re-scored in float32 (LOCAL_INDEX_RERANK, 0 = off)"""
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+        self.codes = np.load(os.path.join(path, 'codes.npy'), mmap_mode='r')
+        self.scales = None
+        if self.manifest['dtype'] == 'int8':
+            self.scales = np.load(os.path.join(path, 'scales.npy'))
+        self.snapshot_path = os.path.join(path, self.manifest['snapshot'])
+        # Float vectors are only read for re-ranking, so the mmap stays mostly cold
+        self.matrix = np.load(os.path.join(self.snapshot_path, 'embeddings.npy'), mmap_mode='r')
+        self.docs = SnapshotDocs(self.snapshot_path)
+        self.block_size = block_size
+
+        if rerank is None:
+            rerank = int(os.getenv('LOCAL_INDEX_RERANK', self.manifest.get('rerank', 4)))
+        self.rerank = rerank
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def scan(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine score of every row, decoding the codes block by block"""
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        # Small blocks decode into a cache-resident buffer instead of a full float32 copy
+        buffer = np.empty((self.block_size, self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_size):
+            codes = self.codes[start:start + self.block_size]
+            block = buffer[:len(codes)]
+            np.copyto(block, codes, casting='unsafe')
+            np.dot(block, query, out=scores[start:start + len(codes)])
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def top_k(self, query_embedding, k: int, rerank: Optional[int] = None):
+        """Row indices and scores of the k best matches, best first"""
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        rerank = self.rerank if rerank is None else rerank
+        scores = self.scan(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        depth = min(max(k * rerank, k), len(scores))
+        candidates = np.argpartition(-scores, depth - 1)[:depth]
+        if rerank:
+            # Exact float32 scores for the shortlist; sorted rows keep the reads sequential
+            candidates = np.sort(candidates)
+            candidate_scores = np.asarray(self.matrix[candidates]) @ query
+        else:
+            candidate_scores = scores[candidates]
+
+        best = np.argsort(-candidate_scores)[:k]
+        return candidates[best], candidate_scores[best]
+
+
+def measure_recall(snapshot_path: str, index_path: str, k: int = 10, queries: int = 200,
+                   reranks: Optional[List[int]] = None) -> List[Dict[str, float]]:
+    """recall@k and latency of the quantized index against exact float32 search"""
+    exact = LocalVectorIndex(snapshot_path)
+    quantized = QuantizedIndex(index_path)
+    reranks = reranks if reranks is not None else [0, 2, 4, 8]
+
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(exact), size=min(queries, len(exact)), replace=False)
+    query_vectors = [np.asarray(exact.matrix[row]) for row in query_rows]
+
+    start_time = time.perf_counter()
+    truth = [set(exact.top_k(vector, k)[0].tolist()) for vector in query_vectors]
+    exact_ms = (time.perf_counter() - start_time) / len(query_vectors) * 1000
+    print(f"📏 float32 search: {exact_ms:.3f} ms/query over {len(exact)} vectors "
+          f"({quantized.manifest['float32_bytes'] / 1e6:.1f} MB)")
+    print(f"🗜️  {quantized.manifest['dtype']} codes: {quantized.manifest['bytes'] / 1e6:.1f} MB")
+
+    report = []
+    for rerank in reranks:
+        start_time = time.perf_counter()
+        found = [set(quantized.top_k(vector, k, rerank)[0].tolist()) for vector in query_vectors]
+        quantized_ms = (time.perf_counter() - start_time) / len(query_vectors) * 1000
+
+        recall = float(np.mean([len(f & t) / len(t) for f, t in zip(found, truth)]))
+        report.append({'rerank': rerank, 'recall': recall, 'ms_per_query': quantized_ms})
+        print(f"  rerank={rerank:<3} recall@{k}={recall:.3f}  {quantized_ms:.3f} ms/query")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int8 / float16 quantized vector index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Quantize a snapshot")
+    build_parser.add_argument('snapshot', help="Directory written by local_vector_index.py export")
+    build_parser.add_argument('--out', default="local_index_int8")
+    build_parser.add_argument('--dtype', choices=['int8', 'float16'], default='int8')
+    build_parser.add_argument('--rerank', type=int, default=4,
+                              help="Candidates re-scored in float32, as a multiple of k (0 = off)")
+
+    recall_parser = subparsers.add_parser('recall', help="Measure recall@k against float32 search")
+    recall_parser.add_argument('snapshot')
+    recall_parser.add_argument('index')
+    recall_parser.add_argument('-k', type=int, default=10)
+    recall_parser.add_argument('--queries', type=int, default=200)
+    recall_parser.add_argument('--rerank', type=int, nargs='+')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            build_quantized_index(args.snapshot, args.out, args.dtype, args.rerank)
+        elif args.command == 'recall':
+            measure_recall(args.snapshot, args.index, args.k, args.queries, args.rerank)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Batch Question Helpers - pipelined ask_many for the RAG classes
+Queries are embedded in one batch by the caller; retrieval and generation
+then run with bounded parallelism so one item generates while others retrieve
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+
+# How each backend's generate() reports a failure in place of an answer
+ERROR_PREFIXES = (
+    'Error generating response:',  # Ollama (biology_rag.py)
+    'Error:',                      # Groq (biology_rag_fast.py, biology_rag_pinecone*.py)
+)
+
+
+def error_answer(result: Dict[str, Any]):
+    """The message of a generate() result whose answer is a backend failure, else None"""
+    answer = result.get('answer')
+    if isinstance(answer, str):
+        for prefix in ERROR_PREFIXES:
+            if answer.startswith(prefix):
+                return answer[len(prefix):].strip()
+    return None
+
+
+def ask_many_pipelined(queries: List[str],
+                       retrieve: Callable[[int], Any],
+                       generate: Callable[[int, Any], Dict[str, Any]],
+                       concurrency: int = 4) -> List[Dict[str, Any]]:
+    """Run retrieve(i) then generate(i, context) for every query; results keep input order"""
+    concurrency = max(1, concurrency)
+    retrieval_slots = threading.Semaphore(concurrency)
+    generation_slots = threading.Semaphore(concurrency)
+
+    def run(i: int) -> Dict[str, Any]:
+        start_time = time.time()
+        item = {'index': i, 'query': queries[i], 'error': None}
+
+        try:
+            with retrieval_slots:
+                context = retrieve(i)
+            retrieved_time = time.time()
+            item['retrieval_ms'] = (retrieved_time - start_time) * 1000
+
+            with generation_slots:
+                item.update(generate(i, context))
+            item['generation_ms'] = (time.time() - retrieved_time) * 1000
+            # Generation reports Groq failures as the answer text
+            item['error'] = error_answer(item)
+        except Exception as e:
+            item['error'] = str(e)
+
+        item['total_ms'] = (time.time() - start_time) * 1000
+        return item
+
+    # Twice the slots so the retrieval stage can run ahead of generation
+    with ThreadPoolExecutor(max_workers=2 * concurrency) as pool:
+        return list(pool.map(run, range(len(queries))))
+
+
+def read_topics(path: str) -> List[str]:
+    """One topic per line; blank lines and '#' comments are skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def batch_main(argv: List[str], make_rag: Callable[[], Any]):
+    """CLI for --batch mode: read topics from a file and write JSONL results"""
+    parser = argparse.ArgumentParser(description="Answer many topics in one batch")
+    parser.add_argument('--batch', required=True, help="File with one topic per line")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel retrieval/generation calls")
+    parser.add_argument('--output', help="Write JSONL results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    topics = read_topics(args.batch)
+    print(f"📋 Loaded {len(topics)} topics from {args.batch}", file=sys.stderr)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    # The RAG classes print progress messages; keep them out of the JSONL
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        rag = make_rag()
+        start_time = time.time()
+        results = rag.ask_many(topics, concurrency=args.concurrency)
+        duration = time.time() - start_time
+    finally:
+        sys.stdout = stdout
+
+    try:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    failed = sum(1 for result in results if result['error'])
+    print(f"✅ Answered {len(results) - failed}/{len(results)} topics in {duration:.1f}s "
+          f"({len(results) / duration if duration else 0:.2f} topics/s)", file=sys.stderr)
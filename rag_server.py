@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Biology RAG HTTP Service - pre-fork asyncio JSON API
+Loads the embedding model once, forks N workers that share it copy-on-write,
+and serves ask_cloud / ask_fast / ask / word explanation over HTTP
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Tuple
+
+from rag_worker import RAGWorker, BACKEND_METHODS
+
+
+# Forked children must not reuse the tokenizer thread pool of the parent
+os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+# URL path -> worker op
+ROUTES = {
+    '/api/ask_cloud': 'ask_cloud',
+    '/api/biology/learn': 'ask_cloud',
+    '/api/ask_fast': 'ask_fast',
+    '/api/ask': 'ask',
+    '/api/word-explanation': 'word_explanation',
+    '/api/biology/word-explanation': 'word_explanation',
+    '/api/word-explanations': 'word_explanations',
+    '/api/biology/word-explanations': 'word_explanations',
+}
+
+STATUS_TEXT = {
+    200: 'OK',
+    204: 'No Content',
+    400: 'Bad Request',
+    404: 'Not Found',
+    408: 'Request Timeout',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RAGServerWorker:
+    def __init__(self, worker: RAGWorker, concurrency: int = 8,
+                 request_timeout: float = 60.0, drain_timeout: float = 30.0):
+        """One forked worker: an event loop plus a bounded pool for blocking RAG calls"""
+        self.worker = worker
+        self.concurrency = concurrency
+        self.request_timeout = request_timeout
+        self.drain_timeout = drain_timeout
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.semaphore = None
+        self.in_flight = 0
+        self.connections = set()
+        self.draining = False
+
+    async def serve(self, sock: socket.socket):
+        """Accept connections on the shared listening socket until told to drain"""
+        loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        stop = asyncio.Event()
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = await asyncio.start_server(self.handle_connection, sock=sock)
+        print(f"🚀 Worker {os.getpid()} ready (concurrency {self.concurrency})", file=sys.stderr)
+
+        await stop.wait()
+
+        # Graceful drain: stop accepting, let in-flight requests finish
+        print(f"🛑 Worker {os.getpid()} draining {self.in_flight} in-flight request(s)...", file=sys.stderr)
+        self.draining = True
+        server.close()
+        await server.wait_closed()
+
+        deadline = time.time() + self.drain_timeout
+        while self.in_flight and time.time() < deadline:
+            await asyncio.sleep(0.1)
+
+        for task in list(self.connections):
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection (with keep-alive)"""
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while not self.draining:
+                try:
+                    method, path, headers, body = await read_request(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                except HTTPError as e:
+                    await write_response(writer, e.status, {'success': False, 'error': str(e)}, keep_alive=False)
+                    break
+
+                if method is None:
+                    break
+
+                if method == 'POST' and path.split('?', 1)[0] == '/api/ask_stream':
+                    await self.stream(writer, body)
+                    break
+
+                status, payload = await self.route(method, path, body, reader)
+                keep_alive = headers.get('connection', '').lower() != 'close' and not self.draining
+                await write_response(writer, status, payload, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes,
+                    reader: asyncio.StreamReader = None) -> Tuple[int, Any]:
+        """Map an HTTP request to a worker op"""
+        path = path.split('?', 1)[0]
+
+        if method == 'OPTIONS':
+            return 204, None
+
+        if method == 'GET' and path in ('/health', '/api/health'):
+            return 200, {
+                'status': 'OK',
+                'service': 'Biology Learning RAG API (Python)',
+                'pid': os.getpid(),
+                'in_flight': self.in_flight,
+                'backends': sorted(self.worker._backends)
+            }
+
+        op = ROUTES.get(path)
+        if method != 'POST' or op is None:
+            return 404, {'error': 'Not found'}
+
+        try:
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError:
+            return 400, {'success': False, 'error': 'Invalid JSON'}
+
+        request['op'] = op
+        if op == 'ask_cloud' and self.worker.use_async:
+            return await self.run_async(request, reader)
+        return await self.run(request)
+
+    async def run(self, request: Dict[str, Any]) -> Tuple[int, Any]:
+        """Run one blocking worker call under the per-worker concurrency limit"""
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                reply = await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, self.worker.handle, request),
+                    timeout=self.request_timeout
+                )
+        except asyncio.TimeoutError:
+            return 408, {'success': False, 'error': 'Request timeout'}
+        finally:
+            self.in_flight -= 1
+
+        if reply['ok']:
+            return 200, {'success': True, **reply['result'], 'elapsed_ms': reply['elapsed_ms']}
+
+        status = 400 if reply['error'].endswith('is required') else 500
+        return status, {'success': False, 'error': reply['error'], 'elapsed_ms': reply['elapsed_ms']}
+
+    async def run_async(self, request: Dict[str, Any], reader: asyncio.StreamReader) -> Tuple[int, Any]:
+        """Run ask_cloud_async on the event loop; cancel it if the client disconnects"""
+        query = (request.get('query') or request.get('topic') or '').strip()
+        if not query:
+            return 400, {'success': False, 'error': 'Query is required'}
+
+        start_time = time.time()
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                rag = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.worker.get_backend, 'pinecone'
+                )
+                task = asyncio.ensure_future(rag.ask_cloud_async(query, timeout=self.request_timeout))
+                watcher = asyncio.ensure_future(wait_for_disconnect(reader))
+                try:
+                    await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    watcher.cancel()
+                    if not task.done():
+                        task.cancel()
+                result = task.result() if not task.cancelled() else None
+        except asyncio.TimeoutError:
+            return 408, {'success': False, 'error': 'Request timeout'}
+        except Exception as e:
+            return 500, {'success': False, 'error': str(e), 'elapsed_ms': (time.time() - start_time) * 1000}
+        finally:
+            self.in_flight -= 1
+
+        if result is None:
+            raise ConnectionResetError("Client disconnected")
+        return 200, {'success': True, **result, 'elapsed_ms': (time.time() - start_time) * 1000}
+
+    async def stream(self, writer: asyncio.StreamWriter, body: bytes):
+        """Relay ask_stream events to the client as Server-Sent Events"""
+        try:
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError:
+            await write_response(writer, 400, {'success': False, 'error': 'Invalid JSON'}, keep_alive=False)
+            return
+
+        request['op'] = 'ask_stream'
+        loop = asyncio.get_running_loop()
+        replies = self.worker.iter_replies(request)
+        finished = object()
+
+        head = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream",
+            "Cache-Control: no-cache",
+            "Access-Control-Allow-Origin: *",
+            "Connection: close",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1'))
+
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                while True:
+                    # Pull the next event from the blocking generator without blocking the loop
+                    reply = await loop.run_in_executor(self.executor, next, replies, finished)
+                    if reply is finished:
+                        break
+                    payload = reply['event'] if reply['ok'] else {'type': 'error', 'error': reply['error']}
+                    writer.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+                    await writer.drain()
+        finally:
+            self.in_flight -= 1
+            # Closing the generator closes the upstream LLM stream when the client goes away
+            await loop.run_in_executor(self.executor, replies.close)
+
+
+async def wait_for_disconnect(reader: asyncio.StreamReader, interval: float = 0.1):
+    """Return once the client has closed its side of the connection"""
+    if reader is None:
+        await asyncio.Event().wait()
+    while not reader.at_eof():
+        await asyncio.sleep(interval)
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """Read one HTTP request; returns (None, ...) on a cleanly closed connection"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None, None, {}, b''
+
+    try:
+        method, path, _version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, 'Malformed request line')
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, 'Request body too large')
+    body = await reader.readexactly(length) if length else b''
+
+    return method.upper(), path, headers, body
+
+
+async def write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool = True):
+    """Write a JSON response with the same CORS headers as the Node server"""
+    body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    head = [
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Access-Control-Allow-Origin: *",
+        "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+        "Access-Control-Allow-Headers: Content-Type, Authorization",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+
+
+def has_aiohttp() -> bool:
+    """ask_cloud runs natively on the event loop when aiohttp is installed"""
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_shared_embedding_model():
+    """Load the embedding model in the parent so forked workers share its weights"""
+    from sentence_transformers import SentenceTransformer
+    print("🤖 Loading shared embedding model...", file=sys.stderr)
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+def run_worker(sock: socket.socket, worker: RAGWorker, args):
+    """Child process entry point"""
+    # Replies go over HTTP; keep the RAG classes' progress prints off stdout
+    sys.stdout = sys.stderr
+    try:
+        worker.warmup(args.preload)
+    except Exception as e:
+        print(f"❌ Worker {os.getpid()} failed to initialize: {e}", file=sys.stderr)
+        os._exit(1)
+
+    server_worker = RAGServerWorker(
+        worker,
+        concurrency=args.concurrency,
+        request_timeout=args.timeout,
+        drain_timeout=args.drain_timeout
+    )
+    asyncio.run(server_worker.serve(sock))
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork asyncio HTTP service for the Biology RAG pipeline")
+    parser.add_argument('--host', default=os.getenv('RAG_SERVER_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('RAG_SERVER_PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('RAG_SERVER_WORKERS', os.cpu_count() or 1)),
+                        help="Number of forked worker processes")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('RAG_SERVER_CONCURRENCY', '8')),
+                        help="Maximum concurrent requests per worker")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument('--drain-timeout', type=float, default=30.0,
+                        help="Seconds to wait for in-flight requests on shutdown")
+    parser.add_argument('--preload', default=os.getenv('RAG_WORKER_PRELOAD', 'pinecone'),
+                        help="Comma-separated backends each worker loads at startup: pinecone,fast,ollama")
+    parser.add_argument('--db-path', help="ChromaDB path for the 'fast' and 'ollama' backends")
+    args = parser.parse_args()
+
+    args.preload = [name.strip() for name in args.preload.split(',') if name.strip()]
+    for name in args.preload:
+        if name not in BACKEND_METHODS:
+            print(f"❌ Unknown backend '{name}' (choose from {', '.join(BACKEND_METHODS)})")
+            sys.exit(1)
+
+    # Load the model before forking so its weights are shared copy-on-write
+    embedding_model = load_shared_embedding_model() if 'pinecone' in args.preload else None
+    worker = RAGWorker(db_path=args.db_path, embedding_model=embedding_model, use_async=has_aiohttp())
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.setblocking(False)
+
+    print(f"🧬 Biology RAG service on http://{args.host}:{args.port} with {args.workers} worker(s)")
+
+    children = {}
+    shutting_down = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, worker, args)
+        children[pid] = time.time()
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(args.workers):
+        spawn()
+
+    # Supervise: restart crashed workers until shutdown, then reap them all
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        started = children.pop(pid, None)
+        if started is None or shutting_down:
+            continue
+
+        print(f"⚠️  Worker {pid} exited with status {status}, restarting", file=sys.stderr)
+        if time.time() - started < 1:
+            # Avoid a tight crash loop when initialization keeps failing
+            time.sleep(1)
+        spawn()
+
+    sock.close()
+    print("👋 Biology RAG service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Biology RAG Worker - long-lived process for the Node API
+Loads the embedding model and database clients once, then answers
+newline-delimited JSON requests on stdin/stdout or a Unix socket
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import socketserver
+from typing import Dict, Any, Iterator
+
+from word_explanation import get_word_explanation, get_word_explanations
+
+
+# Backend name -> method that answers a question on it
+BACKEND_METHODS = {
+    'pinecone': 'ask_cloud',
+    'fast': 'ask_fast',
+    'ollama': 'ask',
+}
+
+# Request op -> backend that serves it
+OP_BACKENDS = {
+    'ask_cloud': 'pinecone',
+    'ask_fast': 'fast',
+    'ask': 'ollama',
+}
+
+
+class RAGWorker:
+    def __init__(self, db_path=None, embedding_model=None, use_async=False):
+        """Initialize the worker (backends are loaded on first use or by warmup)"""
+        self.db_path = db_path or os.getenv('CHROMA_DB_PATH')
+        self.embedding_model = embedding_model
+        self.use_async = use_async
+        self._backends = {}
+        self._lock = threading.Lock()
+
+    def _create_backend(self, name: str):
+        """Construct one RAG backend"""
+        if name == 'pinecone' and self.use_async:
+            from biology_rag_pinecone_async import AsyncBiologyRAGPinecone
+            return AsyncBiologyRAGPinecone(embedding_model=self.embedding_model)
+        if name == 'pinecone':
+            from biology_rag_pinecone import BiologyRAGPinecone
+            return BiologyRAGPinecone(embedding_model=self.embedding_model)
+        if name == 'fast':
+            from biology_rag_fast import BiologyLearningRAG
+            return BiologyLearningRAG(db_path=self.db_path) if self.db_path else BiologyLearningRAG()
+        if name == 'ollama':
+            from biology_rag import BiologyRAG
+            return BiologyRAG(db_path=self.db_path) if self.db_path else BiologyRAG()
+        raise ValueError(f"Unknown backend: {name}")
+
+    def get_backend(self, name: str):
+        """Return a loaded backend, creating it once per process"""
+        backend = self._backends.get(name)
+        if backend is not None:
+            return backend
+
+        with self._lock:
+            if name not in self._backends:
+                try:
+                    self._backends[name] = self._create_backend(name)
+                except SystemExit as e:
+                    # BiologyRAG exits the process when Ollama is unreachable
+                    raise RuntimeError(f"Backend '{name}' failed to start (exit code {e.code})")
+            return self._backends[name]
+
+    def warmup(self, names):
+        """Load the given backends up front so the first request is fast"""
+        for name in names:
+            print(f"🔥 Warming up '{name}' backend...", file=sys.stderr)
+            self.get_backend(name)
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one request and return a JSON-serializable reply"""
+        start_time = time.time()
+        request_id = request.get('id')
+        op = request.get('op', 'ask_cloud')
+
+        try:
+            result = self._dispatch(op, request)
+            reply = {'id': request_id, 'ok': True, 'result': result}
+        except Exception as e:
+            reply = {'id': request_id, 'ok': False, 'error': str(e)}
+
+        reply['elapsed_ms'] = (time.time() - start_time) * 1000
+        return reply
+
+    def iter_stream(self, request: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield one reply per ask_stream event (sources, answer deltas, done)"""
+        start_time = time.time()
+        request_id = request.get('id')
+
+        try:
+            backend = request.get('backend', 'pinecone')
+            if backend not in BACKEND_METHODS:
+                raise ValueError(f"Unknown backend: {backend}")
+            query = (request.get('query') or request.get('topic') or '').strip()
+            if not query:
+                raise ValueError("Query is required")
+
+            rag = self.get_backend(backend)
+            for event in rag.ask_stream(query):
+                yield {'id': request_id, 'ok': True, 'event': event}
+        except Exception as e:
+            yield {'id': request_id, 'ok': False, 'error': str(e),
+                   'elapsed_ms': (time.time() - start_time) * 1000}
+
+    def iter_replies(self, request: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Replies for one request: several for ask_stream, otherwise exactly one"""
+        if request.get('op') == 'ask_stream':
+            yield from self.iter_stream(request)
+        else:
+            yield self.handle(request)
+
+    def _dispatch(self, op: str, request: Dict[str, Any]) -> Any:
+        """Route a request to the matching backend method"""
+        if op == 'ping':
+            return {'pid': os.getpid(), 'backends': sorted(self._backends)}
+
+        if op == 'health':
+            rag = self.get_backend('pinecone')
+            return rag.health_check()
+
+        if op == 'word_explanation':
+            word = (request.get('word') or '').strip()
+            if not word:
+                raise ValueError("Word is required")
+            context = request.get('context') or 'general'
+            return {
+                'word': word,
+                'context': context,
+                'explanation': get_word_explanation(word, context)
+            }
+
+        if op == 'word_explanations':
+            words = [word for word in (request.get('words') or []) if isinstance(word, str) and word.strip()]
+            if not words:
+                raise ValueError("At least one word is required")
+            context = request.get('context') or 'general'
+            return {
+                'context': context,
+                'explanations': get_word_explanations(words, context)
+            }
+
+        if op in OP_BACKENDS:
+            query = (request.get('query') or request.get('topic') or '').strip()
+            if not query:
+                raise ValueError("Query is required")
+            rag = self.get_backend(OP_BACKENDS[op])
+            return getattr(rag, op)(query)
+
+        raise ValueError(f"Unknown op: {op}")
+
+    def handle_line(self, line: str) -> Iterator[str]:
+        """Parse one NDJSON request line and yield the encoded reply lines"""
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError as e:
+            replies = [{'id': None, 'ok': False, 'error': f"Invalid request: {e}"}]
+        else:
+            replies = self.iter_replies(request)
+
+        for reply in replies:
+            yield json.dumps(reply, ensure_ascii=False)
+
+    def serve_stdio(self):
+        """Serve requests from stdin, writing one JSON reply per line to stdout"""
+        out = sys.stdout
+        # The RAG classes print progress messages; keep stdout for replies only
+        sys.stdout = sys.stderr
+
+        out.write(json.dumps({'event': 'ready', 'pid': os.getpid()}) + "\n")
+        out.flush()
+
+        for line in sys.stdin:
+            for reply in self.handle_line(line):
+                out.write(reply + "\n")
+                out.flush()
+
+    def serve_unix_socket(self, socket_path: str):
+        """Serve requests on a Unix socket, one connection per client"""
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    for reply in worker.handle_line(raw_line.decode('utf-8')):
+                        self.wfile.write((reply + "\n").encode('utf-8'))
+                        self.wfile.flush()
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        sys.stdout = sys.stderr
+        server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        server.daemon_threads = True
+        print(f"🔌 RAG worker {os.getpid()} listening on {socket_path}", file=sys.stderr)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived Biology RAG worker (NDJSON protocol)")
+    parser.add_argument('--socket', help="Listen on this Unix socket path instead of stdin/stdout")
+    parser.add_argument('--preload', default=os.getenv('RAG_WORKER_PRELOAD', ''),
+                        help="Comma-separated backends to load at startup: pinecone,fast,ollama")
+    parser.add_argument('--db-path', help="ChromaDB path for the 'fast' and 'ollama' backends")
+    args = parser.parse_args()
+
+    worker = RAGWorker(db_path=args.db_path)
+
+    preload = [name.strip() for name in args.preload.split(',') if name.strip()]
+    for name in preload:
+        if name not in BACKEND_METHODS:
+            print(f"❌ Unknown backend '{name}' (choose from {', '.join(BACKEND_METHODS)})", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        worker.warmup(preload)
+    except Exception as e:
+        print(f"❌ Failed to initialize: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.socket:
+        worker.serve_unix_socket(args.socket)
+    else:
+        worker.serve_stdio()
+
+
+if __name__ == "__main__":
+    main()
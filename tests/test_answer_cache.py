@@ -0,0 +1,82 @@
+import numpy as np
+
+from answer_cache import SemanticAnswerCache, retrieval_namespace
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_hits_only_above_the_threshold():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("what is ATP", unit(1, 0, 0), "energy currency", ["bio_1"])
+
+    hit = cache.lookup(unit(1, 0.2, 0))
+    assert hit['answer'] == "energy currency"
+    assert hit['sources'] == ["bio_1"]
+    assert hit['similarity'] > 0.9
+
+    assert cache.lookup(unit(1, 1, 0)) is None  # cosine ~0.71
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entries_are_not_returned():
+    cache = SemanticAnswerCache(ttl_seconds=0)
+    cache.store("what is ATP", unit(1, 0, 0), "energy currency", [])
+
+    assert cache.lookup(unit(1, 0, 0)) is None
+
+
+def test_least_recently_used_entries_are_evicted_in_memory_and_on_disk(tmp_path):
+    path = str(tmp_path / 'answers.sqlite3')
+    cache = SemanticAnswerCache(path, max_entries=2)
+    cache.store("a", unit(1, 0, 0), "A", [])
+    cache.store("b", unit(0, 1, 0), "B", [])
+    assert cache.lookup(unit(1, 0, 0))['answer'] == "A"
+
+    cache.store("c", unit(0, 0, 1), "C", [])
+
+    assert cache.stats()['entries'] == 2
+    assert cache.lookup(unit(0, 1, 0)) is None
+    assert cache.lookup(unit(0, 0, 1))['answer'] == "C"
+
+    reopened = SemanticAnswerCache(path, max_entries=2)
+    assert reopened.stats()['entries'] == 2
+    assert reopened.lookup(unit(1, 0, 0))['answer'] == "A"
+
+
+def test_namespaces_separate_retrieval_setups(tmp_path):
+    path = str(tmp_path / 'answers.sqlite3')
+    biology = retrieval_namespace("pinecone:vectors", "llama3", ["biology"])
+    physics = retrieval_namespace("pinecone:vectors", "llama3", ["physics"])
+    assert biology != physics
+    assert retrieval_namespace("chroma:db", "llama3", ["b", "a"]) == retrieval_namespace("chroma:db", "llama3", ["a", "b"])
+
+    SemanticAnswerCache(path, namespace=biology).store("q", unit(1, 0, 0), "from biology", [])
+
+    assert SemanticAnswerCache(path, namespace=physics).lookup(unit(1, 0, 0)) is None
+    assert SemanticAnswerCache(path, namespace=biology).lookup(unit(1, 0, 0))['answer'] == "from biology"
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv('ANSWER_CACHE_ENABLED', raising=False)
+    assert SemanticAnswerCache.from_env("pinecone:vectors") is None
+
+    monkeypatch.setenv('ANSWER_CACHE_ENABLED', '1')
+    monkeypatch.setenv('ANSWER_CACHE_PATH', ':memory:')
+    assert SemanticAnswerCache.from_env("pinecone:vectors").namespace == "pinecone:vectors"
+
+
+def test_entries_written_by_another_worker_are_seen(tmp_path):
+    path = str(tmp_path / 'answers.sqlite3')
+    worker_a = SemanticAnswerCache(path)
+    worker_b = SemanticAnswerCache(path)
+    assert worker_a.lookup(unit(1, 0, 0)) is None
+
+    worker_b.store("what is ATP", unit(1, 0, 0), "energy currency", [])
+
+    assert worker_a.lookup(unit(1, 0, 0))['answer'] == "energy currency"
+    worker_a.store("what is DNA", unit(0, 1, 0), "genetic material", [])
+    assert worker_b.lookup(unit(0, 1, 0))['answer'] == "genetic material"
+    assert worker_b.stats()['entries'] == 2
@@ -0,0 +1,63 @@
+import pytest
+
+from biology_rag_demo import BIOLOGY_KNOWLEDGE, KnowledgeIndex, load_knowledge_base
+
+
+@pytest.fixture(scope='module')
+def search():
+    index = KnowledgeIndex(BIOLOGY_KNOWLEDGE)
+    keys = {id(entry): key for key, entry in BIOLOGY_KNOWLEDGE.items()}
+    return lambda topic: [keys[id(entry)] for entry in index.search(topic, limit=3)]
+
+
+@pytest.mark.parametrize('topic, expected', [
+    ("cellular respiration", ['cell']),
+    ("cell", ['cell']),
+    ("Cells", ['cell']),
+    ("photo", ['photosynthesis']),
+    ("synthesis", ['photosynthesis']),
+    ("what is DNA", ['dna']),
+    ("natural selection", ['evolution']),
+    ("catalyst", ['enzyme']),
+])
+def test_key_and_content_matches(search, topic, expected):
+    assert search(topic) == expected
+
+
+def test_topic_words_match_the_words_they_begin(search):
+    assert sorted(search("gene")) == ['dna', 'evolution', 'mitosis']
+
+
+def test_entries_covering_more_topic_words_rank_first(search):
+    # mitosis mentions chromosomes and daughter cells, cell only the nucleus
+    assert search("chromosomes daughter nucleus") == ['mitosis', 'cell']
+    assert search("nucleus membrane chromosomes") == ['cell', 'mitosis']
+
+
+def test_unknown_topics_find_nothing(search):
+    assert search("xyzzy") == []
+
+
+def test_records_without_a_key_are_skipped(tmp_path):
+    path = tmp_path / 'knowledge.jsonl'
+    path.write_text(
+        '{"key": "Osmosis", "content": "Water crosses a membrane", "chapter": "c", "section": "s"}\n'
+        '{"content": "A record nobody can look up", "chapter": "c", "section": "s"}\n'
+        '{"topic": "Diffusion", "content": "Particles spread out", "chapter": "c", "section": "s"}\n'
+    )
+
+    knowledge = load_knowledge_base(str(path))
+
+    assert sorted(knowledge) == ['Diffusion', 'Osmosis']
+    assert KnowledgeIndex(knowledge).search("osmosis")[0]['content'] == "Water crosses a membrane"
+
+
+def test_topics_match_inside_words_like_the_old_scan():
+    knowledge = {
+        'tissue': {'content': "Multicellular organisms group their cells into tissues.", 'chapter': 'c', 'section': 's'},
+        'virus': {'content': "Viruses replicate only inside a host.", 'chapter': 'c', 'section': 's'},
+    }
+    index = KnowledgeIndex(knowledge)
+
+    assert index.search("cellular") == [knowledge['tissue']]
+    assert index.search("issu") == [knowledge['tissue']]
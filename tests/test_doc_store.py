@@ -0,0 +1,67 @@
+import pytest
+
+from doc_store import DocStore, DocStoreWriter, join_matches, open_doc_stores, store_path
+
+
+@pytest.fixture(params=[False, True], ids=['plain', 'zlib'])
+def store(tmp_path, request):
+    writer = DocStoreWriter(str(tmp_path / 'store'), compress=request.param)
+    for i in range(50):
+        writer.add(f"bio_{i}", f"chunk {i} text", {'chapter': str(i % 5)})
+    writer.close(collection='biology_textbook')
+    store = DocStore(str(tmp_path / 'store'))
+    yield store
+    store.close()
+
+
+def no_fetch(ids):
+    raise AssertionError(f"unexpected fetch for {ids}")
+
+
+def test_get_returns_records_by_id(store):
+    assert store.get('bio_7') == {'id': 'bio_7', 'text': 'chunk 7 text', 'metadata': {'chapter': '2'}}
+    assert store.get('physics_1') is None
+
+
+def test_join_uses_the_doc_store(store):
+    matches = [{'id': 'bio_3', 'score': 0.9}, {'id': 'bio_4', 'score': 0.8}]
+
+    joined = join_matches(matches, store, no_fetch)
+
+    assert [record['text'] for _, record in joined] == ['chunk 3 text', 'chunk 4 text']
+
+
+def test_join_fetches_ids_missing_from_the_store(store):
+    fetched = []
+
+    def fetch(ids):
+        fetched.extend(ids)
+        return {'physics_1': {'text': 'force equals mass times acceleration', 'chapter': 'Forces'}}
+
+    matches = [{'id': 'physics_1', 'score': 0.9}, {'id': 'bio_1', 'score': 0.8}, {'id': 'gone', 'score': 0.1}]
+    joined = join_matches(matches, store, fetch)
+
+    assert fetched == ['physics_1', 'gone']
+    assert [(match['id'], record['text']) for match, record in joined] == [
+        ('physics_1', 'force equals mass times acceleration'),
+        ('bio_1', 'chunk 1 text'),
+    ]
+
+
+def test_join_prefers_text_returned_with_the_match():
+    matches = [{'id': 'a', 'score': 0.5, 'metadata': {'text': 'inline', 'chapter': '1'}}]
+
+    assert join_matches(matches, None, no_fetch)[0][1]['text'] == 'inline'
+
+
+def test_stores_are_kept_per_namespace(tmp_path):
+    for namespace, text in [('biology', 'cell'), ('physics', 'force')]:
+        writer = DocStoreWriter(store_path(str(tmp_path), 'vectors', namespace))
+        writer.add('shared_id', text)
+        writer.close()
+
+    stores = open_doc_stores(str(tmp_path), 'vectors', ['biology', 'physics', 'chemistry'])
+
+    assert sorted(stores) == ['biology', 'physics']
+    assert stores['biology'].get('shared_id')['text'] == 'cell'
+    assert stores['physics'].get('shared_id')['text'] == 'force'
@@ -0,0 +1,39 @@
+from federated_retrieval import FederatedRetriever
+
+
+def chunk(text, score):
+    return {'text': text, 'metadata': {'chapter': '1'}, 'relevance_score': score}
+
+
+def test_irrelevant_shard_does_not_displace_relevant_hits():
+    retriever = FederatedRetriever({'biology': None, 'physics': None})
+    results = {
+        'biology': [chunk('photosynthesis', 0.82), chunk('chloroplast', 0.78), chunk('light reactions', 0.74)],
+        'physics': [chunk('inclined plane', 0.21), chunk('friction', 0.12)],
+    }
+
+    merged = retriever.merge(results, 3)
+
+    assert [c['text'] for c in merged] == ['photosynthesis', 'chloroplast', 'light reactions']
+    assert all(c['metadata']['collection'] == 'biology' for c in merged)
+
+
+def test_merge_keeps_raw_cosine_scores():
+    retriever = FederatedRetriever({'a': None, 'b': None})
+    merged = retriever.merge({'a': [chunk('x', 0.4)], 'b': [chunk('y', 0.6)]}, 2)
+
+    assert [c['text'] for c in merged] == ['y', 'x']
+    assert [c['relevance_score'] for c in merged] == [0.6, 0.4]
+    assert [c['raw_score'] for c in merged] == [0.6, 0.4]
+
+
+def test_failing_shard_is_skipped():
+    def broken(query_embedding, n_results):
+        raise RuntimeError("unavailable")
+
+    def working(query_embedding, n_results):
+        return [chunk('mitosis', 0.7)]
+
+    retriever = FederatedRetriever({'broken': broken, 'working': working})
+
+    assert [c['text'] for c in retriever.search([0.1, 0.2], 3)] == ['mitosis']
@@ -0,0 +1,39 @@
+from glossary import candidate_terms, rank_terms
+
+
+class FakeCollection:
+    def __init__(self, documents, metadatas=None):
+        self.documents = documents
+        self.metadatas = metadatas or [{} for _ in documents]
+
+    def get(self, limit, offset, include):
+        ids = [f"bio_{i}" for i in range(len(self.documents))][offset:offset + limit]
+        return {
+            'ids': ids,
+            'documents': self.documents[offset:offset + limit],
+            'metadatas': self.metadatas[offset:offset + limit]
+        }
+
+
+def test_short_technical_terms_are_candidates():
+    terms = candidate_terms("DNA and RNA carry genes; ATP, the pH, CO2 and mRNA. Photosystem II is in it.")
+
+    assert {'dna', 'rna', 'atp', 'ph', 'co2', 'mrna', 'genes', 'photosystem'} <= set(terms)
+    assert not {'and', 'the', 'ii', 'is', 'in', 'it'} & set(terms)
+
+
+def test_rank_terms_keeps_acronyms_and_formulas():
+    documents = [
+        "DNA replication copies the genome before mitosis",
+        "Transcription makes RNA from DNA",
+        "Cellular respiration releases CO2 and makes ATP",
+        "ATP synthase is driven by a proton gradient",
+        "Enzymes lose activity when the pH changes",
+        "Stomach acid has a low pH",
+        "Plants fix CO2 during photosynthesis",
+        "Ribosomes read the RNA message",
+    ] + [f"Filler sentence number {i} about ecology" for i in range(12)]
+
+    ranked = dict(rank_terms(FakeCollection(documents), min_df=2, max_df=0.5, page_size=7))
+
+    assert {'dna', 'rna', 'atp', 'ph', 'co2'} <= set(ranked)
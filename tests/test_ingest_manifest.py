@@ -0,0 +1,42 @@
+from ingest_manifest import IngestManifest, content_chunk_id
+
+
+def test_content_ids_ignore_whitespace():
+    assert content_chunk_id("Force  equals\nmass") == content_chunk_id("Force equals mass")
+    assert content_chunk_id("Force equals mass") != content_chunk_id("Force equals weight")
+
+
+def test_prune_keeps_chunks_other_documents_reference(tmp_path):
+    manifest = IngestManifest(str(tmp_path / 'manifest.sqlite3'))
+    manifest.record('edition1.pdf', ['shared', 'old'], [1, 2])
+    manifest.record('edition2.pdf', ['shared', 'new'], [1, 2])
+
+    unreferenced = manifest.remove('edition1.pdf', {'shared', 'old'})
+
+    assert unreferenced == {'old'}
+    assert manifest.ingested_ids('edition1.pdf') == set()
+    assert manifest.ingested_ids('edition2.pdf') == {'shared', 'new'}
+    assert manifest.ingested_ids() == {'shared', 'new'}
+
+
+def test_shared_chunks_are_recorded_per_document(tmp_path):
+    manifest = IngestManifest(str(tmp_path / 'manifest.sqlite3'))
+    manifest.record('a.pdf', ['shared'], [1])
+    manifest.record('b.pdf', ['shared'], [7])
+
+    assert manifest.ingested_ids('a.pdf') == {'shared'}
+    assert manifest.ingested_ids('b.pdf') == {'shared'}
+    assert manifest.stats()['chunks'] == 1
+
+
+
+def test_failures_are_cleared_one_batch_at_a_time(tmp_path):
+    manifest = IngestManifest(str(tmp_path / 'manifest.sqlite3'))
+    manifest.record_failure('book.pdf', ['a', 'b'], "timeout")
+    manifest.record_failure('book.pdf', ['c'], "timeout")
+    first, second = manifest.failed_batches('book.pdf')
+
+    manifest.clear_failures([first['id']])
+
+    assert [batch['chunk_ids'] for batch in manifest.failed_batches('book.pdf')] == [['c']]
+    assert manifest.failed_batches('other.pdf') == []
@@ -0,0 +1,129 @@
+import pytest
+
+from migration_journal import MigrationJournal, id_checksum
+
+
+class FakeCollection:
+    """Just enough of a ChromaDB collection for paging and id lookups"""
+
+    def __init__(self, count):
+        self.ids = [f"bio_{i}" for i in range(count)]
+        self.pages_with_embeddings = 0
+
+    def count(self):
+        return len(self.ids)
+
+    def page(self, ids, include):
+        page = {'ids': ids}
+        if 'embeddings' in include:
+            self.pages_with_embeddings += 1
+            page['embeddings'] = [[1.0, float(self.ids.index(id_))] for id_ in ids]
+            page['documents'] = [f"text of {id_}" for id_ in ids]
+            page['metadatas'] = [{'chapter': '1'} for _ in ids]
+        return page
+
+    def get(self, ids=None, limit=None, offset=0, include=()):
+        if ids is None:
+            ids = self.ids[offset:offset + limit]
+        return self.page(ids, include)
+
+
+def test_journal_is_kept_per_run(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+    biology = MigrationJournal(path, "chroma:biology->vectors/biology")
+    physics = MigrationJournal(path, "chroma:physics->vectors/physics")
+    biology.record(0, 100, id_checksum(['a', 'b']))
+
+    assert biology.completed() == {(0, 100): id_checksum(['a', 'b'])}
+    assert physics.completed() == {}
+    assert biology.stats() == {'batches': 1, 'vectors': 100}
+
+    biology.reset()
+    assert MigrationJournal(path, "chroma:biology->vectors/biology").completed() == {}
+
+
+def test_checksums_change_when_ids_move():
+    assert id_checksum(['a', 'b']) != id_checksum(['b', 'a'])
+    assert id_checksum(['a', 'b']) != id_checksum(['a', 'c'])
+
+
+def make_migration(collection, tmp_path):
+    pytest.importorskip('chromadb')
+    pytest.importorskip('pinecone')
+    pytest.importorskip('tqdm')
+    from migrate_to_pinecone import VectorMigration
+
+    migration = VectorMigration.__new__(VectorMigration)
+    migration.chroma_collection = collection
+    migration.page_size = 4
+    migration.doc_store_path = None
+    migration.journal = MigrationJournal(str(tmp_path / 'journal.sqlite3'), "test-run")
+    return migration
+
+
+def test_resume_skips_journaled_batches(tmp_path):
+    collection = FakeCollection(10)
+    migration = make_migration(collection, tmp_path)
+    first = list(migration.iter_upsert_batches(batch_size=2))
+    for start, end, batch in first[:3]:
+        migration.journal.record(start, end, id_checksum([vector['id'] for vector in batch]))
+    collection.pages_with_embeddings = 0
+
+    resumed = list(migration.iter_upsert_batches(batch_size=2, completed=migration.journal.completed()))
+
+    assert [(start, end) for start, end, _ in resumed] == [(6, 8), (8, 10)]
+    assert [vector['id'] for _, _, batch in resumed for vector in batch] == [f"bio_{i}" for i in range(6, 10)]
+    assert resumed[0][2][0]['metadata']['text'] == "text of bio_6"
+    # Pages whose batches were all done were read id-only
+    assert collection.pages_with_embeddings == 2
+
+
+def test_resume_resends_batches_whose_ids_changed(tmp_path):
+    collection = FakeCollection(4)
+    migration = make_migration(collection, tmp_path)
+    for start, end, batch in migration.iter_upsert_batches(batch_size=2):
+        migration.journal.record(start, end, id_checksum([vector['id'] for vector in batch]))
+
+    collection.ids[1] = "bio_new"
+    resumed = list(migration.iter_upsert_batches(batch_size=2, completed=migration.journal.completed()))
+
+    assert [(start, end) for start, end, _ in resumed] == [(0, 2)]
+
+
+class FakeUploader:
+    """Index that only shows each id after it has been fetched a few times, losing some upserts"""
+
+    def __init__(self, stored, lag=1):
+        self.stored = set(stored)
+        self.fetches = {}
+        self.lag = lag
+        self.uploaded = []
+
+    def verify(self, ids):
+        missing = []
+        for id_ in ids:
+            self.fetches[id_] = self.fetches.get(id_, 0) + 1
+            if id_ not in self.stored or self.fetches[id_] <= self.lag:
+                missing.append(id_)
+        return missing
+
+    def upload(self, batches, on_batch=None, on_uploaded=None):
+        for batch in batches:
+            self.uploaded.extend(vector['id'] for vector in batch)
+            self.stored.update(vector['id'] for vector in batch)
+        return {}
+
+
+def test_verify_waits_for_lagging_reads_and_journals_reuploads(tmp_path, monkeypatch):
+    collection = FakeCollection(4)
+    migration = make_migration(collection, tmp_path)
+    import migrate_to_pinecone
+    monkeypatch.setattr(migrate_to_pinecone.time, 'sleep', lambda seconds: None)
+    # bio_0/bio_1 landed but read back late; the batch with bio_2/bio_3 failed to upload
+    uploader = FakeUploader(['bio_0', 'bio_1'])
+
+    missing = migration.verify_upload(uploader, collection.ids, [(2, 4, ['bio_2', 'bio_3'])])
+
+    assert missing == []
+    assert uploader.uploaded == ['bio_2', 'bio_3']
+    assert migration.journal.completed() == {(2, 4): id_checksum(['bio_2', 'bio_3'])}
@@ -0,0 +1,32 @@
+from rag_batch import ask_many_pipelined
+
+
+def test_results_keep_input_order_and_record_failures():
+    queries = ["photosynthesis", "mitosis", "osmosis", "enzymes"]
+
+    def retrieve(i):
+        if queries[i] == "osmosis":
+            raise RuntimeError("index unavailable")
+        return [f"context for {queries[i]}"]
+
+    def generate(i, context):
+        if queries[i] == "mitosis":
+            return {'answer': "Error: Request timed out."}
+        return {'answer': f"about {queries[i]}", 'sources': context}
+
+    results = ask_many_pipelined(queries, retrieve, generate, concurrency=2)
+
+    assert [result['query'] for result in results] == queries
+    assert [result['error'] for result in results] == [
+        None, "Request timed out.", "index unavailable", None
+    ]
+    assert results[0]['answer'] == "about photosynthesis"
+
+
+def test_ollama_failures_are_recorded():
+    def generate(i, context):
+        return {'answer': "Error generating response: connection refused"}
+
+    results = ask_many_pipelined(["mitosis"], lambda i: [], generate)
+
+    assert results[0]['error'] == "connection refused"
@@ -4,12 +4,50 @@ Word Explanation System - AI-powered word definitions and etymologies
 Provides comprehensive explanations for words in educational context
 """
 import os
+import re
 import sys
+import time
+import argparse
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+import http_transport
+from explanation_cache import ExplanationCache
+
+_cache = None
+
+def get_explanation_cache():
+    """Process-wide explanation cache (None when WORD_CACHE_ENABLED=0)"""
+    global _cache
+    if _cache is None:
+        _cache = ExplanationCache.from_env() or False
+    return _cache or None
+
+_glossary = None
+
+def get_glossary():
+    """Precomputed textbook glossary (see glossary.py), or None if none has been built"""
+    global _glossary
+    if _glossary is None:
+        from glossary import Glossary
+        _glossary = Glossary.from_env() or False
+    return _glossary or None
 
 def get_word_explanation(word, context="general"):
-    """Get comprehensive explanation for a word using Groq API"""
+    """Get comprehensive explanation for a word, from the cache, the glossary or the Groq API"""
+    
+    cache = get_explanation_cache()
+    if cache:
+        cached = cache.get(word, context)
+        if cached is not None:
+            return cached
+    
+    glossary = get_glossary()
+    if glossary:
+        explanation = glossary.lookup(word, context)
+        if explanation is not None:
+            return explanation
     
     groq_api_key = os.getenv('GROQ_API_KEY')
     if not groq_api_key or groq_api_key == 'your_groq_api_key_here':
@@ -18,6 +56,18 @@ def get_word_explanation(word, context="general"):
     
     print(f"🤖 Using Groq API with key: {groq_api_key[:10]}...", file=sys.stderr)
     
+    explanation = request_explanation(word, context, groq_api_key)
+    if explanation is None:
+        # Fall back to demo mode if API fails (and don't cache the fallback)
+        return generate_demo_explanation(word, context)
+    
+    if cache:
+        cache.put(word, context, explanation)
+    return explanation
+
+def request_explanation(word, context, groq_api_key):
+    """One Groq call for one word; None if the API fails"""
+    
     groq_url = "https://api.groq.com/openai/v1/chat/completions"
     
     # Create a comprehensive prompt for word explanation
@@ -33,7 +83,7 @@ Alternative Words: [List 3-4 synonyms or related terms, separated by commas]
 Make sure the explanation is educational and appropriate for students. Focus on accuracy and clarity."""
 
     try:
-        response = requests.post(
+        response = http_transport.post(
             groq_url,
             headers={
                 "Authorization": f"Bearer {groq_api_key}",
@@ -63,13 +113,126 @@ Make sure the explanation is educational and appropriate for students. Focus on
             explanation = result['choices'][0]['message']['content']
             return explanation
         else:
-            # Fall back to demo mode if API fails
-            return generate_demo_explanation(word, context)
+            return None
             
     except requests.exceptions.Timeout:
-        return generate_demo_explanation(word, context)
+        return None
     except Exception as e:
-        return generate_demo_explanation(word, context)
+        return None
+
+def get_word_explanations(words, context="general", batch_size=8, concurrency=4):
+    """Explanations for several words: cache and glossary first, then one Groq call per batch_size misses
+
+    Words missing from a batch reply fall back to get_word_explanation. Returns {word: explanation}
+    """
+    words = list(dict.fromkeys(word.strip() for word in words if word.strip()))
+    explanations = {}
+    
+    cache = get_explanation_cache()
+    if cache:
+        for word in words:
+            cached = cache.get(word, context)
+            if cached is not None:
+                explanations[word] = cached
+    glossary = get_glossary()
+    if glossary:
+        for word in words:
+            if word not in explanations:
+                explanation = glossary.lookup(word, context)
+                if explanation is not None:
+                    explanations[word] = explanation
+    missing = [word for word in words if word not in explanations]
+    
+    groq_api_key = os.getenv('GROQ_API_KEY')
+    if missing and (not groq_api_key or groq_api_key == 'your_groq_api_key_here'):
+        print(f"🔧 No valid API key found, using demo mode", file=sys.stderr)
+        explanations.update((word, generate_demo_explanation(word, context)) for word in missing)
+        missing = []
+    
+    def explain_batch(batch):
+        parsed = request_explanations(batch, context, groq_api_key) or {}
+        found = {}
+        for word in batch:
+            explanation = parsed.get(word.lower())
+            if explanation is None:
+                # Batch reply failed or skipped this word: ask for it on its own
+                print(f"🔁 No section for '{word}' in batch reply, asking separately", file=sys.stderr)
+                found[word] = get_word_explanation(word, context)
+                continue
+            if cache:
+                cache.put(word, context, explanation)
+            found[word] = explanation
+        return found
+    
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    if batches:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+            for found in executor.map(explain_batch, batches):
+                explanations.update(found)
+    
+    return {word: explanations[word] for word in words}
+
+def request_explanations(words, context, groq_api_key):
+    """One Groq call for several words; {word.lower(): explanation}, or None if the API fails"""
+    
+    groq_url = "https://api.groq.com/openai/v1/chat/completions"
+    
+    word_list = "\n".join(f"- {word}" for word in words)
+    prompt = f"""Provide a comprehensive explanation for each of these words in the context of {context}:
+{word_list}
+
+For every word, write a section that starts with a header line "=== word ===" (the word exactly as listed) followed by exactly these four lines:
+
+Explanation: [Provide a clear, concise definition in 1-2 sentences]
+Context: [Explain how this word is used in {context} context, with a specific example]
+Etymology: [Provide the origin and historical development of the word]
+Alternative Words: [List 3-4 synonyms or related terms, separated by commas]
+
+Make sure the explanations are educational and appropriate for students. Focus on accuracy and clarity."""
+
+    try:
+        response = http_transport.post(
+            groq_url,
+            headers={
+                "Authorization": f"Bearer {groq_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "llama3-70b-8192",
+                "messages": [
+                    {
+                        "role": "system", 
+                        "content": "You are an educational assistant specializing in providing clear, accurate word definitions and etymologies. Always format your responses exactly as requested."
+                    },
+                    {
+                        "role": "user", 
+                        "content": prompt
+                    }
+                ],
+                "temperature": 0.3,
+                "max_tokens": min(300 * len(words) + 100, 4000),
+                "top_p": 0.9
+            },
+            timeout=15 + 5 * len(words)
+        )
+        
+        if response.status_code != 200:
+            return None
+        return parse_explanation_sections(response.json()['choices'][0]['message']['content'])
+            
+    except Exception as e:
+        return None
+
+def parse_explanation_sections(text):
+    """Split a batch reply into {word.lower(): section}; sections without an Explanation line are dropped"""
+    sections = {}
+    parts = re.split(r'^\s*=+\s*(.+?)\s*=+\s*$', text, flags=re.MULTILINE)
+    # parts = [preamble, word1, body1, word2, body2, ...]
+    for word, body in zip(parts[1::2], parts[2::2]):
+        body = body.strip()
+        if re.search(r'^Explanation:', body, flags=re.MULTILINE):
+            sections[word.strip().strip('*"\'').lower()] = body
+    return sections
 
 def generate_demo_explanation(word, context):
     DEMO_EXPLANATIONS = {
@@ -105,19 +268,60 @@ Context: This term is commonly used in {context} to describe key concepts and pr
 Etymology: The word has roots in scientific terminology developed over centuries of study.
 Alternative Words: concept, term, element, component"""
 
+def warmup(words, context="general", concurrency=4):
+    """Prefill the cache for a word list, skipping words that are already cached"""
+    cache = get_explanation_cache()
+    if not cache:
+        print("❌ Word cache is disabled (WORD_CACHE_ENABLED=0)")
+        return
+    if not os.getenv('GROQ_API_KEY') or os.getenv('GROQ_API_KEY') == 'your_groq_api_key_here':
+        print("❌ GROQ_API_KEY is required to warm the cache (demo explanations are not cached)")
+        return
+    
+    todo = [word for word in dict.fromkeys(words) if cache.get(word, context) is None]
+    print(f"🔥 Warming {len(todo)} of {len(words)} words ({context}) into {cache.path}")
+    
+    start_time = time.time()
+    for start in range(0, len(todo), 64):
+        get_word_explanations(todo[start:start + 64], context, concurrency=concurrency)
+        print(f"  ✅ {min(start + 64, len(todo))}/{len(todo)} words")
+    
+    print(f"🎉 Warmup done in {time.time() - start_time:.1f}s: {cache.stats()['entries']} cached explanations")
+
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Explain a word for students")
+    parser.add_argument('word', nargs='?', help="Word to explain")
+    parser.add_argument('context', nargs='?', default="general", help="Subject context (default: general)")
+    parser.add_argument('--warmup', metavar='FILE', help="Prefill the cache from a word list (one word per line)")
+    parser.add_argument('--batch', nargs='+', metavar='WORD', help="Explain several words at once (prints JSON)")
+    parser.add_argument('--context', dest='batch_context', default="general",
+                        help="Subject context for --warmup / --batch (default: general)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel API calls for --warmup / --batch")
+    args = parser.parse_args()
+    
+    if args.warmup:
+        with open(args.warmup, 'r', encoding='utf-8') as f:
+            words = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        warmup(words, args.batch_context, args.concurrency)
+        return
+    
+    if args.batch:
+        explanations = get_word_explanations(args.batch, args.batch_context, concurrency=args.concurrency)
+        print(json.dumps(explanations, ensure_ascii=False, indent=2))
+        return
+    
+    if args.word is None:
         print("Error: Word parameter required")
         sys.exit(1)
     
-    word = sys.argv[1].strip()
-    context = sys.argv[2].strip() if len(sys.argv) > 2 else "general"
+    word = args.word.strip()
+    context = args.context.strip()
     
     if not word:
         print("Error: Empty word provided")
         sys.exit(1)
     
-    # Get explanation from AI
+    # Get explanation from the cache or AI
     explanation = get_word_explanation(word, context)
     
     # Print the explanation (this will be captured by Node.js)